@@ -0,0 +1,112 @@
+"""Synthetic, reproducible test data for the benchmarks.
+
+Graphs are SKOS vocabularies of concepts, each of about ten triples, written as text line by line so that files of
+millions of triples can be made without holding them in memory. The same size and seed always give the same data."""
+
+import random
+from pathlib import Path
+
+NS = "https://example.com/bench/"
+SKOS = "http://www.w3.org/2004/02/skos/core#"
+TRIPLES_PER_CONCEPT = 10
+
+SHAPES = f"""
+PREFIX sh: <http://www.w3.org/ns/shacl#>
+PREFIX skos: <{SKOS}>
+PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+PREFIX ex: <{NS}>
+
+ex:ConceptShape
+    a sh:NodeShape ;
+    sh:targetClass skos:Concept ;
+    sh:property
+        [
+            sh:path skos:prefLabel ;
+            sh:minCount 1 ;
+            sh:maxCount 1 ;
+        ] ,
+        [
+            sh:path skos:definition ;
+            sh:minCount 1 ;
+            sh:datatype xsd:string ;
+        ] ,
+        [
+            sh:path skos:broader ;
+            sh:class skos:Concept ;
+        ] ,
+        [
+            sh:path ex:rank ;
+            sh:datatype xsd:integer ;
+            sh:maxCount 1 ;
+        ] ;
+.
+"""
+
+
+def _concept_lines(i: int, rng: random.Random) -> list[str]:
+    c = f"ex:c{i}"
+    lines = [
+        f"{c} a skos:Concept ;",
+        "    skos:inScheme ex:scheme ;",
+        f'    skos:definition "Definition of concept {i}, {rng.random():.6f}" ;',
+        f"    ex:rank {rng.randrange(1000)} ;",
+        f"    ex:related ex:thing{rng.randrange(i + 1)} ;",
+        f'    skos:notation "C{i:08d}" ;',
+        f'    skos:altLabel "concept {i}"@en , "Begriff {i}"@de ;',
+    ]
+    if i > 0:
+        lines.append(f"    skos:broader ex:c{rng.randrange(i)} ;")
+    # one in ten concepts is unlabelled, for the missing labels benchmarks
+    if i % 10 != 0:
+        lines.append(f'    skos:prefLabel "Concept {i}"@en ;')
+    lines[-1] = lines[-1][:-2] + " ."
+    return lines
+
+
+def write_turtle(n_triples: int, path: Path, seed: int = 0) -> Path:
+    """Writes a Turtle file of about n_triples triples to path"""
+    rng = random.Random(seed)
+    with open(path, "w") as f:
+        f.write(f"PREFIX ex: <{NS}>\nPREFIX skos: <{SKOS}>\n\n")
+        f.write(
+            'ex:scheme a skos:ConceptScheme ;\n    skos:prefLabel "Scheme"@en .\n\n'
+        )
+        for i in range(max(1, n_triples // TRIPLES_PER_CONCEPT)):
+            f.write("\n".join(_concept_lines(i, rng)) + "\n\n")
+    return path
+
+
+def data_file(n_triples: int, data_dir: Path, seed: int = 0) -> Path:
+    """A Turtle file of about n_triples triples, made on first use and reused afterwards"""
+    data_dir.mkdir(parents=True, exist_ok=True)
+    path = data_dir / f"concepts-{n_triples}-{seed}.ttl"
+    if not path.is_file():
+        tmp = path.with_suffix(".tmp")
+        write_turtle(n_triples, tmp, seed)
+        tmp.rename(path)
+    return path
+
+
+def make_sparql_json(n_rows: int, seed: int = 0) -> dict:
+    """A SPARQL JSON SELECT result of n_rows rows, each with an IRI, a language-tagged literal, a typed literal and,
+    for every other row, a blank node"""
+    rng = random.Random(seed)
+    bindings = []
+    for i in range(n_rows):
+        row = {
+            "c": {"type": "uri", "value": f"{NS}c{i}"},
+            "label": {"type": "literal", "value": f"Concept {i}", "xml:lang": "en"},
+            "rank": {
+                "type": "literal",
+                "value": str(rng.randrange(1000)),
+                "datatype": "http://www.w3.org/2001/XMLSchema#integer",
+            },
+        }
+        if i % 2 == 0:
+            row["b"] = {"type": "bnode", "value": f"b{i}"}
+        bindings.append(row)
+
+    return {
+        "head": {"vars": ["c", "label", "rank", "b"]},
+        "results": {"bindings": bindings},
+    }
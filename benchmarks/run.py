@@ -0,0 +1,185 @@
+"""Runs the benchmark suite and compares stored results.
+
+    python -m benchmarks.run run --sizes 10k,100k
+    python -m benchmarks.run compare benchmarks/results/abc1234.json benchmarks/results/def5678.json
+
+Results are written to ``benchmarks/results/<commit>.json`` so that runs on different commits can be compared."""
+
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from importlib.metadata import version
+from pathlib import Path
+from typing import Annotated
+
+import typer
+from rich.console import Console
+from rich.table import Table
+
+from benchmarks.suite import CASES, SIZES
+
+BENCHMARKS_DIR = Path(__file__).parent
+RESULTS_DIR = BENCHMARKS_DIR / "results"
+DATA_DIR = BENCHMARKS_DIR / "data"
+
+app = typer.Typer(help="kurra's benchmark suite")
+console = Console()
+
+
+def _commit() -> str:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=BENCHMARKS_DIR,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True,
+            text=True,
+            cwd=BENCHMARKS_DIR,
+        ).stdout.strip()
+        return f"{commit}-dirty" if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _time(f, repeat: int) -> list[float]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        f()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+@app.command(name="run", help="Runs the benchmarks and stores the results")
+def run_command(
+    sizes: Annotated[
+        str,
+        typer.Option(
+            "--sizes",
+            "-s",
+            help=f"Comma-separated sizes to run at, of {', '.join(SIZES)}",
+        ),
+    ] = "10k,100k",
+    cases: Annotated[
+        str,
+        typer.Option(
+            "--cases",
+            "-k",
+            help="Comma-separated names of the cases to run. All if not given",
+        ),
+    ] = None,
+    repeat: Annotated[
+        int, typer.Option("--repeat", "-r", help="Timed runs per case and size")
+    ] = 5,
+    output: Annotated[
+        Path,
+        typer.Option(
+            "--output",
+            "-o",
+            help="The results file. Default benchmarks/results/<commit>.json",
+        ),
+    ] = None,
+) -> None:
+    sizes = [s.strip() for s in sizes.split(",")]
+    if unknown := [s for s in sizes if s not in SIZES]:
+        raise typer.BadParameter(f"Unknown sizes {unknown}, use any of {list(SIZES)}")
+
+    names = list(CASES) if cases is None else [c.strip() for c in cases.split(",")]
+    if unknown := [c for c in names if c not in CASES]:
+        raise typer.BadParameter(f"Unknown cases {unknown}, use any of {list(CASES)}")
+
+    commit = _commit()
+    report = {
+        "commit": commit,
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "rdflib": version("rdflib"),
+        "machine": f"{platform.system()} {platform.machine()}",
+        "results": {},
+    }
+
+    t = Table(title=f"Benchmarks at {commit}")
+    for column in ["Case", "Size", "Min (s)", "Median (s)", "Per second"]:
+        t.add_column(column, justify="left" if column == "Case" else "right")
+
+    for name in names:
+        bench_case = CASES[name]
+        for size_name in sizes:
+            size = SIZES[size_name]
+            with bench_case.run(size, DATA_DIR) as f:
+                if f is None:
+                    continue
+                f()  # untimed, to warm caches and connections
+                times = _time(f, repeat)
+
+            key = f"{name}[{size_name}]"
+            report["results"][key] = {
+                "size": size,
+                "unit": bench_case.unit,
+                "min": min(times),
+                "median": statistics.median(times),
+                "times": times,
+            }
+            t.add_row(
+                name,
+                size_name,
+                f"{min(times):.4f}",
+                f"{statistics.median(times):.4f}",
+                f"{size / min(times):,.0f} {bench_case.unit}",
+            )
+
+    console.print(t)
+
+    output = output or RESULTS_DIR / f"{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    console.print(f"Results written to {output}")
+
+
+@app.command(name="compare", help="Compares two stored results files")
+def compare_command(
+    baseline: Path,
+    candidate: Path,
+    threshold: Annotated[
+        float,
+        typer.Option(
+            "--threshold",
+            help="The fractional slow-down, of the minimum time, reported as a regression",
+        ),
+    ] = 0.1,
+) -> None:
+    a = json.loads(baseline.read_text())
+    b = json.loads(candidate.read_text())
+
+    t = Table(title=f"{a['commit']} -> {b['commit']}")
+    for column in ["Case", a["commit"], b["commit"], "Change"]:
+        t.add_column(column, justify="left" if column == "Case" else "right")
+
+    regressions = 0
+    for key in [k for k in a["results"] if k in b["results"]]:
+        before, after = a["results"][key]["min"], b["results"][key]["min"]
+        change = after / before - 1
+        style = ""
+        if change > threshold:
+            style = "red"
+            regressions += 1
+        elif change < -threshold:
+            style = "green"
+        t.add_row(key, f"{before:.4f}", f"{after:.4f}", f"{change:+.1%}", style=style)
+
+    console.print(t)
+    if regressions:
+        console.print(f"[bold red]{regressions} regressions[/bold red]")
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    app()
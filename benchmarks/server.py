@@ -0,0 +1,67 @@
+"""An in-process stand-in for a SPARQL Endpoint, so that kurra's network paths can be benchmarked without a database.
+
+It answers every query with the same, pre-serialized, SELECT result and accepts, and discards, every update and Graph
+Store Protocol request. Timings against it measure kurra's request and response handling, not a database."""
+
+import json
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterator
+
+
+@contextmanager
+def stand_in_endpoint(select_result: dict) -> Iterator[str]:
+    """Runs a stand-in SPARQL Endpoint that answers queries with select_result, yielding its URL"""
+    body = json.dumps(select_result).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _read_body(self) -> bytes:
+            return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        def _results(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/sparql-results+json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _no_content(self):
+            self.send_response(204)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def do_GET(self):
+            self._results()
+
+        def do_POST(self):
+            content = self._read_body()
+            content_type = self.headers.get("Content-Type", "")
+            if content_type.startswith("application/sparql-query") or (
+                content_type.startswith("application/x-www-form-urlencoded")
+                and content.startswith(b"query=")
+            ):
+                self._results()
+            else:
+                self._no_content()
+
+        def do_PUT(self):
+            self._read_body()
+            self._no_content()
+
+        def do_DELETE(self):
+            self._no_content()
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/sparql"
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,133 @@
+"""The benchmark cases.
+
+Each case is a context manager, registered with ``@case``, that is given a size and the directory generated data is
+kept in. It does any setup that shouldn't be timed and yields the function to time, or None if the case can't run here.
+Sizes are triples for cases over graphs and rows for cases over SPARQL results."""
+
+import copy
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Callable
+
+import httpx
+from rdflib import Graph
+
+from benchmarks.generate import SHAPES, data_file, make_sparql_json
+from benchmarks.server import stand_in_endpoint
+from kurra.db.gsp import upload
+from kurra.db.sparql import query
+from kurra.file import do_format, merge
+from kurra.labels import find_missing_labels
+from kurra.shacl import validate
+from kurra.utils import (
+    convert_sparql_json_to_python,
+    load_graph,
+    make_sparql_dataframe,
+)
+
+SIZES = {
+    "1k": 1_000,
+    "10k": 10_000,
+    "100k": 100_000,
+    "1M": 1_000_000,
+    "10M": 10_000_000,
+}
+
+
+@dataclass
+class Case:
+    name: str
+    unit: str
+    run: Callable
+
+
+CASES: dict[str, Case] = {}
+
+
+def case(name: str, unit: str = "triples"):
+    """Registers a benchmark case, a context manager taking a size and a data directory"""
+
+    def decorator(f):
+        CASES[name] = Case(name, unit, contextmanager(f))
+        return f
+
+    return decorator
+
+
+@case("load_graph")
+def load_graph_case(size: int, data_dir: Path):
+    path = data_file(size, data_dir)
+    yield lambda: load_graph(path)
+
+
+@case("do_format")
+def do_format_case(size: int, data_dir: Path):
+    content = data_file(size, data_dir).read_text()
+    yield lambda: do_format(content)
+
+
+@case("merge")
+def merge_case(size: int, data_dir: Path):
+    files = [data_file(size // 2, data_dir, seed) for seed in [1, 2]]
+    with tempfile.TemporaryDirectory() as workdir:
+        destination = Path(workdir) / "merged.ttl"
+        yield lambda: merge(*files, destination=destination, output_format="turtle")
+
+
+@case("convert_sparql_json_to_python", unit="rows")
+def convert_sparql_json_case(size: int, data_dir: Path):
+    result = make_sparql_json(size)
+    # the conversion changes its input, so each run converts a fresh copy of it
+    yield lambda: convert_sparql_json_to_python(copy.deepcopy(result))
+
+
+@case("make_sparql_dataframe", unit="rows")
+def make_sparql_dataframe_case(size: int, data_dir: Path):
+    if find_spec("pandas") is None:
+        yield None  # skipped: pandas isn't installed
+        return
+
+    result = make_sparql_json(size)
+    yield lambda: make_sparql_dataframe(result)
+
+
+@case("shacl.validate")
+def shacl_validate_case(size: int, data_dir: Path):
+    data = load_graph(data_file(size, data_dir))
+    shapes = Graph().parse(data=SHAPES, format="turtle")
+    yield lambda: validate(data, shapes)
+
+
+@case("labels.find_missing_labels")
+def find_missing_labels_case(size: int, data_dir: Path):
+    data = load_graph(data_file(size, data_dir))
+    yield lambda: find_missing_labels(data)
+
+
+@case("db.sparql.query", unit="rows")
+def sparql_query_case(size: int, data_dir: Path):
+    with (
+        stand_in_endpoint(make_sparql_json(size)) as url,
+        httpx.Client(timeout=60) as http_client,
+    ):
+        yield lambda: query(
+            url,
+            "SELECT * WHERE { ?c ?label ?rank }",
+            http_client=http_client,
+            return_format="python",
+        )
+
+
+@case("db.gsp.upload")
+def gsp_upload_case(size: int, data_dir: Path):
+    data = load_graph(data_file(size, data_dir))
+    with (
+        stand_in_endpoint(make_sparql_json(0)) as url,
+        httpx.Client(timeout=60) as http_client,
+    ):
+        yield lambda: upload(
+            url, data, "https://example.com/g", http_client=http_client
+        )
@@ -1,3 +1,7 @@
-import importlib.metadata
+def __getattr__(name: str):
+    # read from the package metadata only when asked for, as importlib.metadata is slow to import
+    if name == "__version__":
+        import importlib.metadata
 
-__version__ = importlib.metadata.version(__package__)
+        return importlib.metadata.version(__package__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
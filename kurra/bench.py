@@ -0,0 +1,140 @@
+"""Query latency and throughput measurement."""
+
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import httpx
+from rdflib import Dataset, Graph
+
+from kurra.sparql import query
+from kurra.utils import add_namespaces_to_query_or_data, load_graph
+
+
+def _result_size(r) -> int:
+    """The number of rows, triples or booleans in a query result"""
+    if isinstance(r, Graph):
+        return len(r)
+    if isinstance(r, dict):
+        if r.get("results") is not None:
+            return len(r["results"]["bindings"])
+        if r.get("boolean") is not None:
+            return 1
+    return 0
+
+
+def latency_summary(latencies: list[float]) -> dict[str, float]:
+    """The min, mean, p50, p95, p99 and max of a non-empty list of latencies"""
+    latencies = sorted(latencies)
+    # the 99 cut points between percentiles, so that quantiles[49] is the 50th percentile
+    quantiles = (
+        statistics.quantiles(latencies, n=100, method="inclusive")
+        if len(latencies) > 1
+        else latencies * 99
+    )
+    return {
+        "min": latencies[0],
+        "mean": statistics.fmean(latencies),
+        "p50": quantiles[49],
+        "p95": quantiles[94],
+        "p99": quantiles[98],
+        "max": latencies[-1],
+    }
+
+
+def bench(
+    p: Path | str | Graph | Dataset,
+    q: str | Path,
+    runs: int = 20,
+    warmup: int = 2,
+    concurrency: int = 1,
+    namespaces: dict[str, str] | None = None,
+    http_client: httpx.Client | None = None,
+    timeout: float | None = None,
+) -> dict:
+    """Runs a query many times against a file, Graph or SPARQL Endpoint and reports its latency and throughput.
+
+    Each run is a call to [`sparql.query()`][kurra.sparql.query] returning Python results, so timings include the
+    request and result decoding but not process startup or result rendering. Files are parsed once, before any run.
+
+    Args:
+        p: the file, Graph, Dataset or SPARQL Endpoint to query
+        q: the query, or a path to a file containing it
+        runs: the number of timed runs
+        warmup: the number of untimed runs made first, to warm caches and connections
+        concurrency: the number of runs in flight at once. Queries to local data run one at a time regardless
+        namespaces: prefixes to add to the query
+        http_client: an HTTP client to use. Created internally, with concurrency connections, if not supplied
+        timeout: the timeout, in seconds, for each HTTP request
+
+    Returns:
+        dict: ``runs``, ``warmup``, ``concurrency``, ``errors``, ``error_rate``, ``latency`` - a dict of ``min``,
+            ``mean``, ``p50``, ``p95``, ``p99`` and ``max`` seconds over successful runs - ``throughput`` - successful
+            runs per second of wall time - ``result_size`` - rows or triples in the last result - and ``error_messages``
+            - the distinct errors raised
+    """
+    if runs < 1:
+        raise ValueError("runs must be at least 1")
+
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    if isinstance(q, Path) or (len(q) < 260 and Path(q).is_file()):
+        q = Path(q).read_text()
+
+    if namespaces is not None:
+        q = add_namespaces_to_query_or_data(q, namespaces)
+
+    remote = str(p).startswith("http")
+    if not remote:
+        p = load_graph(p)
+
+    close_http_client = False
+    if http_client is None and remote:
+        http_client = httpx.Client(limits=httpx.Limits(max_connections=concurrency))
+        close_http_client = True
+
+    def _run(_=None):
+        start = time.perf_counter()
+        try:
+            if remote:
+                r = query(
+                    p,
+                    q,
+                    http_client=http_client,
+                    return_format="python",
+                    timeout=timeout,
+                )
+            else:
+                r = query(p, q, return_format="python")
+            return time.perf_counter() - start, _result_size(r), None
+        except Exception as e:
+            return time.perf_counter() - start, 0, f"{type(e).__name__}: {e}"
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(_run, range(warmup)))
+
+            start = time.perf_counter()
+            outcomes = list(executor.map(_run, range(runs)))
+            wall_time = time.perf_counter() - start
+    finally:
+        if close_http_client:
+            http_client.close()
+
+    latencies = [d for d, _, error in outcomes if error is None]
+    errors = [error for _, _, error in outcomes if error is not None]
+    sizes = [size for _, size, error in outcomes if error is None]
+
+    return {
+        "runs": runs,
+        "warmup": warmup,
+        "concurrency": concurrency,
+        "errors": len(errors),
+        "error_rate": len(errors) / runs,
+        "latency": latency_summary(latencies) if latencies else None,
+        "throughput": len(latencies) / wall_time if wall_time > 0 else None,
+        "result_size": sizes[-1] if sizes else None,
+        "error_messages": sorted(set(errors)),
+    }
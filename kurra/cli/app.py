@@ -1,11 +1,49 @@
+import importlib
+import time
+from pathlib import Path
 from typing import Annotated
 
 import typer
+from typer.core import TyperGroup
 
-from kurra import __version__
 from kurra.cli.console import console
 
+# taken before the commands are imported, for the startup phase of --profile
+STARTED = time.perf_counter()
+
+# command name: the module holding its Typer app. Modules are imported only when their command is used, so that
+# starting kurra doesn't import pyshacl, rdflib's SPARQL engine and everything else every command needs. The apps are
+# made with add_completion=False, as kurra's completion options are only those of the root app
+COMMANDS = {
+    "db": "kurra.cli.commands.db",
+    "file": "kurra.cli.commands.file",
+    "labels": "kurra.cli.commands.labels",
+    "shacl": "kurra.cli.commands.shacl",
+    "sparql": "kurra.cli.commands.sparql",
+    "bench": "kurra.cli.commands.bench",
+}
+
+
+class LazyTyperGroup(TyperGroup):
+    """A command group that imports each command in ``COMMANDS`` the first time it's used"""
+
+    def list_commands(self, ctx: typer.Context) -> list[str]:
+        return [
+            *super().list_commands(ctx),
+            *(name for name in COMMANDS if name not in self.commands),
+        ]
+
+    def get_command(self, ctx: typer.Context, cmd_name: str):
+        if cmd_name not in self.commands and cmd_name in COMMANDS:
+            module = importlib.import_module(COMMANDS[cmd_name])
+            command = typer.main.get_command(module.app)
+            command.name = cmd_name
+            self.add_command(command, cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+
 app = typer.Typer(
+    cls=LazyTyperGroup,
     invoke_without_command=True,
     context_settings={
         "help_option_names": ["-h", "--help"],
@@ -16,9 +54,38 @@ app = typer.Typer(
 
 @app.callback(invoke_without_command=True)
 def main(
+    ctx: typer.Context,
     version: Annotated[bool, typer.Option("--version", "-v", is_eager=True)] = False,
+    profile: Annotated[
+        bool,
+        typer.Option(
+            "--profile",
+            help="Print the wall time, CPU time and peak memory of each phase of the command - startup, load/parse, query, validate, infer, serialise, network and other - to stderr when it ends",
+        ),
+    ] = False,
+    profile_file: Annotated[
+        Path,
+        typer.Option(
+            "--profile-file",
+            help="Also write a full cProfile profile of the command to this file, for use with pstats or snakeviz. Implies --profile",
+        ),
+    ] = None,
 ):
     """Main callback for the CLI app"""
     if version:
+        from kurra import __version__
+
         console.print(__version__)
         raise typer.Exit()
+
+    if profile or profile_file is not None:
+        from kurra.cli.profile import PhaseProfiler
+
+        profiler = PhaseProfiler(STARTED, profile_file)
+        profiler.start()
+
+        def _report():
+            profiler.stop()
+            profiler.print_report()
+
+        ctx.call_on_close(_report)
@@ -0,0 +1,107 @@
+import json
+from pathlib import Path
+from typing import Annotated
+
+import httpx
+import typer
+from rich.table import Table
+
+from kurra.bench import bench
+from kurra.cli.console import console
+
+app = typer.Typer(add_completion=False)
+
+
+@app.command(
+    name="bench",
+    help="Measures the latency and throughput of a SPARQL query against a local RDF file or a database",
+)
+def bench_command(
+    path_or_url: Path,
+    q: str,
+    runs: Annotated[
+        int, typer.Option("--runs", "-n", help="The number of timed runs")
+    ] = 20,
+    warmup: Annotated[
+        int,
+        typer.Option("--warmup", "-w", help="The number of untimed runs made first"),
+    ] = 2,
+    concurrency: Annotated[
+        int,
+        typer.Option(
+            "--concurrency", "-c", help="The number of runs in flight at once"
+        ),
+    ] = 1,
+    response_format: str = typer.Option(
+        "table",
+        "--response-format",
+        "-f",
+        help="The format of the report. Either 'table' (default) or 'json'",
+    ),
+    username: Annotated[
+        str, typer.Option("--username", "-u", help="Fuseki username.")
+    ] = None,
+    password: Annotated[
+        str, typer.Option("--password", "-p", help="Fuseki password.")
+    ] = None,
+    timeout: Annotated[
+        int, typer.Option("--timeout", "-t", help="Timeout per request")
+    ] = 60,
+) -> None:
+    """Runs a SPARQL query many times against a local file or SPARQL Endpoint and reports latency percentiles,
+    throughput, result size and error rate"""
+    if str(path_or_url).startswith("http"):
+        path_or_url = str(path_or_url).replace(":/", "://")
+
+    if response_format not in ["table", "json"]:
+        raise typer.BadParameter(
+            "response_format must be either 'table' (default) or 'json'"
+        )
+
+    auth = (
+        (username, password) if username is not None and password is not None else None
+    )
+    with httpx.Client(
+        auth=auth,
+        timeout=timeout,
+        limits=httpx.Limits(max_connections=concurrency),
+    ) as http_client:
+        try:
+            report = bench(
+                path_or_url,
+                q,
+                runs=runs,
+                warmup=warmup,
+                concurrency=concurrency,
+                http_client=http_client,
+            )
+        except ValueError as e:
+            raise typer.BadParameter(str(e))
+
+    if response_format == "json":
+        print(json.dumps(report, indent=2))
+        return
+
+    t = Table(title="Latency (ms)")
+    for column in ["min", "mean", "p50", "p95", "p99", "max"]:
+        t.add_column(column, justify="right")
+    if report["latency"] is not None:
+        t.add_row(*[f"{v * 1000:.1f}" for v in report["latency"].values()])
+    console.print(t)
+
+    throughput = report["throughput"]
+    console.print(
+        f"{report['runs']} runs, {report['warmup']} warm-up, concurrency {report['concurrency']}"
+    )
+    console.print(
+        f"Throughput: {throughput:.2f} queries/s"
+        if throughput is not None
+        else "Throughput: n/a"
+    )
+    console.print(f"Result size: {report['result_size']}")
+    console.print(f"Errors: {report['errors']} ({report['error_rate']:.1%})")
+    for message in report["error_messages"]:
+        console.print(f"  {message}")
+
+    if report["errors"] == report["runs"]:
+        raise typer.Exit(code=1)
@@ -1,12 +1,20 @@
+import json
 from pathlib import Path
 from typing import Annotated
 
+import httpx
 import typer
+from rich.table import Table
 
-from kurra.cli.commands.db.fuseki import app
-from kurra.cli.commands.sparql import sparql_command
+from kurra.cli.commands.db.fuseki import app as fuseki_app
+from kurra.cli.commands.db.gsp import app as gsp_app
+from kurra.cli.commands.db.olis import app as olis_app
+from kurra.cli.console import console
 
-app = typer.Typer(help="RDF Database commands")
+app = typer.Typer(help="RDF Database commands", add_completion=False)
+app.add_typer(fuseki_app, name="fuseki")
+app.add_typer(gsp_app, name="gsp")
+app.add_typer(olis_app, name="olis")
 
 
 @app.command(name="sparql", help="SPARQL query an RDF database")
@@ -33,4 +41,222 @@ def sparql_command3(
         int, typer.Option("--timeout", "-t", help="Timeout per request")
     ] = 60,
 ) -> None:
+    # imported here so that other db commands don't import the SPARQL machinery
+    from kurra.cli.commands.sparql import sparql_command
+
     sparql_command(path_or_url, q, response_format, username, password, timeout)
+
+
+@app.command(
+    name="replay",
+    help="Replays a SPARQL query log against a database and reports latencies per query class",
+)
+def replay_command(
+    sparql_endpoint_url: str = typer.Argument(
+        ..., help="Repository SPARQL Endpoint URL. E.g. http://localhost:3030/ds"
+    ),
+    log: Path = typer.Argument(
+        ...,
+        help="A directory of .rq or .sparql query files, or a JSON Lines file of queries with 'query' and optional 'timestamp' and 'class' keys",
+    ),
+    speed: Annotated[
+        float,
+        typer.Option(
+            "--speed",
+            "-x",
+            help="A multiple of the logged pace to replay at, e.g. 2 for twice as fast",
+        ),
+    ] = 1.0,
+    concurrency: Annotated[
+        int,
+        typer.Option(
+            "--concurrency",
+            "-c",
+            help="Ignore timestamps and send queries back to back, this many at a time",
+        ),
+    ] = None,
+    response_format: Annotated[
+        str,
+        typer.Option(
+            "--response-format",
+            "-f",
+            help="The format of the report. Either 'table' (default) or 'json'",
+        ),
+    ] = "table",
+    username: Annotated[
+        str, typer.Option("--username", "-u", help="Fuseki username.")
+    ] = None,
+    password: Annotated[
+        str, typer.Option("--password", "-p", help="Fuseki password.")
+    ] = None,
+    timeout: Annotated[
+        int, typer.Option("--timeout", "-t", help="Timeout per request")
+    ] = 60,
+) -> None:
+    """Replays a SPARQL query log against a database at its logged pace, a multiple of it or a fixed concurrency"""
+    if response_format not in ["table", "json"]:
+        raise typer.BadParameter(
+            "response_format must be either 'table' (default) or 'json'"
+        )
+
+    from kurra.db.replay import replay
+
+    auth = (
+        (username, password) if username is not None and password is not None else None
+    )
+    with httpx.Client(
+        auth=auth,
+        timeout=timeout,
+        limits=httpx.Limits(max_connections=concurrency or 64),
+    ) as http_client:
+        try:
+            report = replay(
+                sparql_endpoint_url,
+                log,
+                speed=speed,
+                concurrency=concurrency,
+                http_client=http_client,
+            )
+        except ValueError as e:
+            raise typer.BadParameter(str(e))
+
+    if response_format == "json":
+        print(json.dumps(report, indent=2))
+        return
+
+    t = Table(title="Latency (ms)")
+    t.add_column("Class")
+    t.add_column("Count", justify="right")
+    t.add_column("Errors", justify="right")
+    for column in ["min", "mean", "p50", "p95", "p99", "max"]:
+        t.add_column(column, justify="right")
+    for name, c in report["classes"].items():
+        latency = (
+            [f"{v * 1000:.1f}" for v in c["latency"].values()]
+            if c["latency"] is not None
+            else [""] * 6
+        )
+        t.add_row(name, str(c["count"]), str(c["errors"]), *latency)
+    console.print(t)
+
+    console.print(
+        f"{report['queries']} queries in {report['duration']:.2f}s, {report['errors']} errors, "
+        f"most {report['max_lag'] * 1000:.0f}ms behind schedule"
+    )
+    for name, c in report["classes"].items():
+        for message in c["error_messages"]:
+            console.print(f"  {name}: {message}")
+
+
+@app.command(
+    name="validate",
+    help="Validate the data in an RDF database using a given SHACL file, without downloading it",
+)
+def validate_command(
+    sparql_endpoint_url: str = typer.Argument(
+        ..., help="Repository SPARQL Endpoint URL. E.g. http://localhost:3030/ds"
+    ),
+    shacl: Annotated[
+        str,
+        typer.Option(
+            "--shacl",
+            "-s",
+            help="The file, directory of files, IRI of or the kurra ID for the SHACL graph to validate with",
+        ),
+    ] = ...,
+    graph: Annotated[
+        list[str],
+        typer.Option(
+            "--graph",
+            "-g",
+            help="The IRI of a graph to validate. Give more than once to validate graphs merged. The default graph if not given",
+        ),
+    ] = None,
+    hide_warnings: Annotated[
+        bool,
+        typer.Option(
+            "--hide-warnings", "-hw", help="Hides Shapes results of Warning and Info"
+        ),
+    ] = False,
+    summary: Annotated[
+        bool,
+        typer.Option(
+            "--summary",
+            "-y",
+            help="Print a summary table instead of the full validation results",
+        ),
+    ] = False,
+    response_format: Annotated[
+        str,
+        typer.Option(
+            "--response-format",
+            "-f",
+            help="The format of the results. Either 'table' (default) or 'rdf', for Long Turtle",
+        ),
+    ] = "table",
+    concurrency: Annotated[
+        int,
+        typer.Option(
+            "--concurrency",
+            "-c",
+            min=1,
+            help="The most validation queries to have the database run at once",
+        ),
+    ] = 4,
+    username: Annotated[
+        str, typer.Option("--username", "-u", help="Fuseki username.")
+    ] = None,
+    password: Annotated[
+        str, typer.Option("--password", "-p", help="Fuseki password.")
+    ] = None,
+    timeout: Annotated[
+        int, typer.Option("--timeout", "-t", help="Timeout per request")
+    ] = 60,
+) -> None:
+    """Validates the data in an RDF database by having it run SPARQL queries compiled from the SHACL shapes, so that
+    only the results are sent back"""
+    if response_format not in ["table", "rdf"]:
+        raise typer.BadParameter(
+            "response_format must be either 'table' (default) or 'rdf'"
+        )
+
+    # imported here so that other db commands don't import pyshacl
+    from kurra.cli.commands.shacl import _parse_shacl
+    from kurra.cli.utils import (
+        format_shacl_graph_as_rich_table,
+        format_shacl_summary_as_rich_table,
+    )
+    from kurra.db.shacl import validate
+
+    auth = (
+        (username, password) if username is not None and password is not None else None
+    )
+    with httpx.Client(
+        auth=auth,
+        timeout=timeout,
+        limits=httpx.Limits(max_connections=concurrency),
+    ) as http_client:
+        try:
+            valid, g, txt, summary_graph = validate(
+                sparql_endpoint_url,
+                _parse_shacl(shacl),
+                graph_iris=graph,
+                hide_warnings=hide_warnings,
+                http_client=http_client,
+                max_concurrency=concurrency,
+            )
+        except ValueError as e:
+            raise typer.BadParameter(str(e), param_hint="--shacl")
+
+    if response_format == "rdf":
+        output_graph = summary_graph if summary else g
+        console.print(output_graph.serialize(format="longturtle"))
+    elif valid:
+        console.print("The data is valid")
+    else:
+        console.print("The data is NOT valid")
+        console.print("The errors are:")
+        if summary:
+            console.print(format_shacl_summary_as_rich_table(summary_graph))
+        else:
+            console.print(format_shacl_graph_as_rich_table(g))
@@ -301,6 +301,18 @@ def upload_command(
     host_header: Annotated[
         str | None, typer.Option("--host-header", "-e", help="Override the Host header")
     ] = None,
+    compression: Annotated[
+        str | None,
+        typer.Option(
+            "--compression",
+            "-z",
+            help="Compress uploaded content, 'gzip' or 'zstd'. Sent uncompressed if the database rejects it",
+        ),
+    ] = None,
+    compression_level: Annotated[
+        int | None,
+        typer.Option("--compression-level", help="The compression level to use"),
+    ] = None,
 ) -> None:
     """Upload a file or a directory of files with an RDF file extension.
 
@@ -310,6 +322,9 @@ def upload_command(
     <urn:file:{file.name}>
     E.g. <urn:file:example.ttl>
     """
+    if compression not in (None, "gzip", "zstd"):
+        raise typer.BadParameter("--compression must be either 'gzip' or 'zstd'")
+
     files = []
 
     if path.is_file():
@@ -337,6 +352,8 @@ def upload_command(
                         file,
                         f"urn:file:{file.name}",
                         http_client=http_client,
+                        compression=compression,
+                        compression_level=compression_level,
                     )
                 else:
                     upload(
@@ -344,6 +361,8 @@ def upload_command(
                         file,
                         graph_identifier,
                         http_client=http_client,
+                        compression=compression,
+                        compression_level=compression_level,
                     )  # str and None handled by upload()
             except Exception as err:
                 console.print(
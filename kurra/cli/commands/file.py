@@ -4,7 +4,6 @@ from typing import Annotated
 
 import typer
 
-from kurra.cli.commands.sparql import sparql_command as gsp_sparql_command
 from kurra.cli.console import console
 from kurra.file import (
     FailOnChangeError,
@@ -16,7 +15,7 @@ from kurra.file import (
 )
 from kurra.utils import RDF_FILE_SUFFIXES
 
-app = typer.Typer(help="RDF file commands")
+app = typer.Typer(help="RDF file commands", add_completion=False)
 
 
 @app.command(name="reformat", help="Reformat RDF files")
@@ -151,4 +150,7 @@ def query_command(
             q = Path(q).read_text()
     except Exception:
         pass
-    gsp_sparql_command(path_or_url, q, response_format, username, password, timeout)
+    # imported here so that other file commands don't import the SPARQL machinery
+    from kurra.cli.commands.sparql import sparql_command
+
+    sparql_command(path_or_url, q, response_format, username, password, timeout)
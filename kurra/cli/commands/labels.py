@@ -5,7 +5,7 @@ import typer
 from kurra.cli.console import console
 from kurra.labels import find_missing_labels, get_missing_labels
 
-app = typer.Typer(help="Labelling commands")
+app = typer.Typer(help="Labelling commands", add_completion=False)
 from rich.table import Table
 
 
@@ -2,17 +2,24 @@ from pathlib import Path
 from typing import Annotated, Literal
 
 import typer
+from rdflib.namespace import RDF, SH
 from rich.table import Table
 
 import kurra.shacl
 from kurra.cli.console import console
 from kurra.cli.utils import (
+    format_shacl_files_summary_as_rich_table,
     format_shacl_graph_as_rich_table,
     format_shacl_summary_as_rich_table,
 )
-from kurra.shacl import list_local_validators, sync_validators, validate
+from kurra.shacl import (
+    list_local_validators,
+    sync_validators,
+    validate,
+    validate_files,
+)
 
-app = typer.Typer(help="SHACL commands")
+app = typer.Typer(help="SHACL commands", add_completion=False)
 
 
 def _parse_shacl(value: str | Path | int) -> Path | str | int:
@@ -68,9 +75,83 @@ def validate_command(
             help="Output format: a Rich table or Long Turtle RDF",
         ),
     ] = "table",
+    workers: Annotated[
+        int,
+        typer.Option(
+            "--workers",
+            "-w",
+            min=1,
+            help="The number of processes to validate in. With more than 1, the data's focus nodes are split between them, with shapes that may need all the data, such as those with sh:sparql constraints, validated in the main process",
+        ),
+    ] = 1,
+    incremental: Annotated[
+        bool,
+        typer.Option(
+            "--incremental",
+            help="Reuse the results of the last validation of the same files with the same SHACL graph for files that haven't changed since, and don't link to, or share IRIs with, files that have",
+        ),
+    ] = False,
+    per_file: Annotated[
+        bool,
+        typer.Option(
+            "--per-file",
+            help="Validate each file on its own, in --workers processes, printing the results of each and a summary of all of them. Exits with status 1 if any file is not valid",
+        ),
+    ] = False,
+    max_results: Annotated[
+        int,
+        typer.Option(
+            "--max-results",
+            "-n",
+            min=1,
+            help="Report at most this many results, of each file with --per-file. Validation stops once there are this many and the data is known not to be valid, after the batch of focus nodes (at least 100) that makes them",
+        ),
+    ] = None,
+    fail_fast: Annotated[
+        bool,
+        typer.Option(
+            "--fail-fast",
+            help="Stop validating at the first shape the data isn't valid against and, with --per-file, at the first file that isn't valid. Exits with status 1 if the data is not valid",
+        ),
+    ] = False,
+    prune: Annotated[
+        bool,
+        typer.Option(
+            "--prune",
+            help="Load only the triples the SHACL shapes may look at, those of the predicates of their paths and targets, types and class hierarchy, so that data with much else in it is loaded faster, in less memory",
+        ),
+    ] = False,
 ) -> None:
     """Validate a given file or directory of files using a given SHACL file or directory of files"""
-    valid, g, txt, summary_graph = validate(data, shacl, hide_warnings=hide_warnings)
+    if incremental and (per_file or max_results is not None or fail_fast):
+        raise typer.BadParameter(
+            "--incremental can't be used with --per-file, --max-results or --fail-fast",
+            param_hint="--incremental",
+        )
+    if per_file:
+        _validate_per_file(
+            data,
+            shacl,
+            hide_warnings,
+            summary,
+            output_format,
+            workers,
+            max_results,
+            fail_fast,
+            prune,
+        )
+        return
+
+    valid, g, txt, summary_graph = validate(
+        data,
+        shacl,
+        hide_warnings=hide_warnings,
+        max_workers=workers,
+        incremental=incremental,
+        max_results=max_results,
+        fail_fast=fail_fast,
+        prune=prune,
+    )
 
     output_graph = summary_graph if summary else g
 
@@ -87,6 +168,53 @@ def validate_command(
                 console.print(format_shacl_summary_as_rich_table(summary_graph))
             else:
                 console.print(format_shacl_graph_as_rich_table(g))
+            if max_results is not None and max_results == len(
+                set(g.subjects(RDF.type, SH.ValidationResult))
+            ):
+                console.print(f"Only the first {max_results} results are shown")
+
+    if fail_fast and not valid:
+        raise typer.Exit(code=1)
+
+
+def _validate_per_file(
+    data: list[Path],
+    shacl: Path | str | int,
+    hide_warnings: bool,
+    summary: bool,
+    output_format: str,
+    workers: int,
+    max_results: int | None,
+    fail_fast: bool,
+    prune: bool,
+) -> None:
+    reports = validate_files(
+        data,
+        shacl,
+        hide_warnings=hide_warnings,
+        max_workers=workers,
+        max_results=max_results,
+        fail_fast=fail_fast,
+        prune=prune,
+    )
+
+    for f, (valid, g, txt, summary_graph) in reports.items():
+        output_graph = summary_graph if summary else g
+        if output_format == "rdf":
+            console.print(f"# {f}")
+            console.print(output_graph.serialize(format="longturtle"))
+        elif not valid:
+            console.print(f"{f} is NOT valid. The errors are:")
+            if summary:
+                console.print(format_shacl_summary_as_rich_table(summary_graph))
+            else:
+                console.print(format_shacl_graph_as_rich_table(g))
+
+    if output_format != "rdf":
+        console.print(format_shacl_files_summary_as_rich_table(reports))
+
+    if not all(r[0] for r in reports.values()):
+        raise typer.Exit(code=1)
 
 
 @app.command(
@@ -112,9 +240,19 @@ def listv_command():
     name="syncv",
     help="Synchronizes SHACL validators",
 )
-def syncv_command():
+def syncv_command(
+    concurrency: Annotated[
+        int,
+        typer.Option(
+            "--concurrency",
+            "-c",
+            min=1,
+            help="The maximum number of validators fetched at once",
+        ),
+    ] = 4,
+):
     """Synchronizes SHACL validators"""
-    sync_validators()
+    sync_validators(max_workers=concurrency)
 
     console.print("Synchronizing SHACL validators")
 
@@ -1,21 +1,36 @@
+import sys
+from contextlib import ExitStack
+from itertools import chain, islice
 from pathlib import Path
 from typing import Annotated
 
 import httpx
 import rdflib
 import typer
+from rich.table import Table
 
 from kurra.cli.console import console
 from kurra.cli.utils import (
+    SPARQL_ROW_FORMATS,
     format_sparql_response_as_csv,
     format_sparql_response_as_json,
     format_sparql_response_as_rich_table,
+    write_sparql_rows,
+)
+from kurra.db.sparql import construct_raw, select_rows
+from kurra.sparql import federated_query, query
+from kurra.utils import (
+    RDF_MEDIA_TYPES,
+    is_construct_or_describe_query,
+    is_select_query,
 )
-from kurra.sparql import query
 
-app = typer.Typer(context_settings={"terminal_width": 10000})
+app = typer.Typer(context_settings={"terminal_width": 10000}, add_completion=False)
 # app = typer.Typer()
 
+# SELECT results with more rows than this are printed as CSV, not laid out as a table
+TABLE_MAX_ROWS = 1000
+
 
 @app.command(name="sparql", help="SPARQL queries to local RDF files or a database")
 def sparql_command(
@@ -25,7 +40,7 @@ def sparql_command(
         "table",
         "--response-format",
         "-f",
-        help="The response format of the SPARQL query. Either 'table' (default), 'json' or 'csv'",
+        help=f"The response format of the SPARQL query. Either 'table' (default), 'json', 'csv', 'tsv' or 'ndjson', the last two for SELECT queries only. SELECT results are written as they are received in 'csv', 'tsv' and 'ndjson' and tables of more than {TABLE_MAX_ROWS} rows are printed as CSV",
     ),
     username: Annotated[
         str, typer.Option("--username", "-u", help="Fuseki username.")
@@ -36,6 +51,37 @@ def sparql_command(
     timeout: Annotated[
         int, typer.Option("--timeout", "-t", help="Timeout per request")
     ] = 60,
+    sources: Annotated[
+        list[str],
+        typer.Option(
+            "--source",
+            "-s",
+            help="An additional file or SPARQL Endpoint to query. May be repeated. Results from all sources are merged and tagged with their source",
+        ),
+    ] = None,
+    deadline: Annotated[
+        float,
+        typer.Option(
+            "--deadline",
+            "-d",
+            help="Total seconds allowed for the query, including retries, or for all sources when querying more than one. Slower sources are reported as errors",
+        ),
+    ] = None,
+    output: Annotated[
+        Path,
+        typer.Option(
+            "--output",
+            "-o",
+            help="A file to write the results to, rather than printing them. SELECT and ASK results are written in the response format, which must not be 'table'",
+        ),
+    ] = None,
+    rdf_format: Annotated[
+        str,
+        typer.Option(
+            "--format",
+            help="The RDF format of CONSTRUCT and DESCRIBE results, e.g. 'turtle', 'nt', 'json-ld' or 'xml'. Default 'longturtle'. With --output or --format, a SPARQL Endpoint's response is passed through as it is sent, without parsing",
+        ),
+    ] = None,
 ) -> None:
     """SPARQL queries a local file or SPARQL Endpoint"""
     if str(path_or_url).startswith("http"):
@@ -46,28 +92,178 @@ def sparql_command(
             if Path(q).is_file():
                 q = Path(q).read_text()
 
-    if response_format not in ["table", "json", "csv"]:
+    if response_format not in ["table", "json", *SPARQL_ROW_FORMATS]:
+        raise typer.BadParameter(
+            "response_format must be either 'table' (default), 'json', 'csv', 'tsv' or 'ndjson'"
+        )
+
+    if response_format in ["tsv", "ndjson"] and not is_select_query(q):
+        raise typer.BadParameter(
+            f"response_format can't be '{response_format}' for queries other than SELECT queries"
+        )
+
+    if rdf_format is not None and rdf_format not in RDF_MEDIA_TYPES:
+        raise typer.BadParameter(
+            f"format must be one of {', '.join(RDF_MEDIA_TYPES.keys())}"
+        )
+
+    if (
+        output is not None
+        and response_format == "table"
+        and not is_construct_or_describe_query(q)
+    ):
         raise typer.BadParameter(
-            "response_format must be either 'table' (default), 'json' or 'csv'"
+            "response_format can't be 'table' when writing results to a file"
         )
 
+    if sources and (output is not None or rdf_format is not None):
+        raise typer.BadParameter("--output and --format can't be used with --source")
+
     auth = (
         (username, password) if username is not None and password is not None else None
     )
+    if sources:
+        _federated_sparql(
+            [path_or_url, *sources], q, response_format, auth, timeout, deadline
+        )
+        return
+
     with httpx.Client(auth=auth, timeout=timeout) as http_client:
-        r = query(path_or_url, q, http_client=http_client, return_format="python")
+        # pass the endpoint's RDF straight through, skipping parsing and re-serializing it
+        if (
+            str(path_or_url).startswith("http")
+            and (output is not None or rdf_format is not None)
+            and is_construct_or_describe_query(q)
+        ):
+            construct_raw(
+                path_or_url,
+                q,
+                output if output is not None else sys.stdout.buffer,
+                RDF_MEDIA_TYPES[rdf_format or "turtle"],
+                http_client=http_client,
+                deadline=deadline,
+            )
+            return
+
+        if is_select_query(q) and response_format != "json":
+            _stream_select(
+                path_or_url, q, response_format, output, http_client, deadline
+            )
+            return
+
+        r = query(
+            path_or_url,
+            q,
+            http_client=http_client,
+            return_format="python",
+            deadline=deadline,
+        )
 
         if r == "":
             console.print("Operation completed successfully")
             return
 
+        if output is not None:
+            if isinstance(r, rdflib.Graph):
+                r.serialize(output, format=rdf_format or "longturtle")
+            elif response_format == "json":
+                output.write_text(format_sparql_response_as_json(r))
+            else:
+                output.write_text(format_sparql_response_as_csv(r, q))
+            return
+
         # if it is a graph, just print return the serialized form plainly, not via console.print()
         # to avoid terminal width breaking long literals, as per Issue 37
         if isinstance(r, rdflib.Graph):
-            print(r.serialize(format="longturtle"))
+            print(r.serialize(format=rdf_format or "longturtle"))
         elif response_format == "table":
             console.print(format_sparql_response_as_rich_table(r, q))
-        elif response_format == "csv":
+        elif response_format == "json":
+            print(format_sparql_response_as_json(r))
+        else:
             console.print(format_sparql_response_as_csv(r, q))
+
+
+def _stream_select(path_or_url, q, response_format, output, http_client, deadline):
+    """Writes SELECT results row by row as they are received, rather than formatting them all at once"""
+    with ExitStack() as stack:
+        if str(path_or_url).startswith("http"):
+            variables, rows = stack.enter_context(
+                select_rows(path_or_url, q, http_client=http_client, deadline=deadline)
+            )
         else:
-            print(format_sparql_response_as_json(r))
+            r = query(path_or_url, q, return_format="python", deadline=deadline)
+            variables, rows = r["head"]["vars"], iter(r["results"]["bindings"])
+
+        if response_format == "table":
+            first = list(islice(rows, TABLE_MAX_ROWS + 1))
+            if len(first) <= TABLE_MAX_ROWS:
+                console.print(
+                    format_sparql_response_as_rich_table(
+                        {"head": {"vars": variables}, "results": {"bindings": first}},
+                        q,
+                    )
+                )
+                return
+
+            typer.echo(
+                f"More than {TABLE_MAX_ROWS} results, so printing them as CSV rather than a table. Use -f to choose a format",
+                err=True,
+            )
+            response_format = "csv"
+            rows = chain(first, rows)
+
+        out = (
+            stack.enter_context(open(output, "w", newline=""))
+            if output is not None
+            else sys.stdout
+        )
+        write_sparql_rows(variables, rows, out, response_format)
+
+
+def _federated_sparql(sources, q, response_format, auth, timeout, deadline):
+    """Queries many sources at once, prints the merged result and reports per-source timings and errors"""
+    sources = [
+        Path(s) if not str(s).startswith("http") and Path(s).exists() else str(s)
+        for s in sources
+    ]
+    with httpx.Client(
+        auth=auth,
+        timeout=timeout,
+        limits=httpx.Limits(max_connections=len(sources)),
+    ) as http_client:
+        r, report = federated_query(
+            sources, q, http_client=http_client, deadline=deadline
+        )
+
+    if isinstance(r, rdflib.Dataset):
+        print(r.serialize(format="trig"))
+    elif response_format == "table":
+        console.print(format_sparql_response_as_rich_table(r, q))
+    elif response_format == "json":
+        print(format_sparql_response_as_json(r))
+    elif r.get("results") is None:  # ASK
+        console.print(format_sparql_response_as_csv(r, q))
+    else:
+        write_sparql_rows(
+            r["head"]["vars"], r["results"]["bindings"], sys.stdout, response_format
+        )
+
+    if response_format == "table":
+        t = Table(title="Sources")
+        t.add_column("Source")
+        t.add_column("Results")
+        t.add_column("Seconds")
+        t.add_column("Error")
+        for source, outcome in report.items():
+            t.add_row(
+                source,
+                str(outcome["count"]),
+                f"{outcome['duration']:.3f}" if outcome["duration"] else "",
+                outcome["error"] or "",
+            )
+        console.print(t)
+    else:
+        for source, outcome in report.items():
+            if outcome["error"] is not None:
+                typer.echo(f"ERROR {source}: {outcome['error']}", err=True)
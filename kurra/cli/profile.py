@@ -0,0 +1,163 @@
+"""Per-phase timing and memory for a CLI command, as shown by ``kurra --profile``.
+
+Phases are built from the spans kurra opens around its work - see [`kurra.tracing`][kurra.tracing]. Each span's own
+time, less that of the spans within it, is counted against the phase its name belongs to, so nested phases, such as
+a request within a query, are not counted twice. Time spent outside any span, such as rendering results, is counted
+as ``other``."""
+
+import cProfile
+import sys
+import threading
+import time
+from pathlib import Path
+
+from rich.console import Console
+from rich.table import Table
+
+from kurra.tracing import Span, Tracer, add_tracer, remove_tracer
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PHASES = {
+    "http.request": "network",
+    "compress": "network",
+    "rdf.parse": "load/parse",
+    "rdf.serialize": "serialise",
+    "sparql.query": "query",
+    "sparql.query.local": "query",
+    "sparql.decode": "query",
+    "sparql.construct": "query",
+    "sparql.select": "query",
+    "shacl.compile": "validate",
+    "shacl.validate": "validate",
+    "shacl.infer": "infer",
+}
+
+
+def _peak_rss() -> int | None:
+    """The peak resident set size of the process so far, in bytes"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class PhaseProfiler(Tracer):
+    """Totals wall time, CPU time and peak RSS per phase of a command from the spans opened while it runs"""
+
+    def __init__(self, started: float, profile_file: Path | None = None):
+        self.started = started
+        self.profile_file = profile_file
+        self.phases: dict[str, dict] = {}
+        self._spans: dict[int, dict] = {}
+        self._lock = threading.Lock()
+        self._profiler = None
+
+    def start(self) -> None:
+        """Closes the startup phase, from started until now, and starts recording spans"""
+        self._record("startup", time.perf_counter() - self.started, time.process_time())
+        self._command_started = time.perf_counter()
+        self._command_cpu = time.process_time()
+        add_tracer(self)
+        if self.profile_file is not None:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def stop(self) -> None:
+        """Stops recording, counting time not spent in any phase as other"""
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler.dump_stats(self.profile_file)
+        remove_tracer(self)
+
+        wall = time.perf_counter() - self._command_started
+        cpu = time.process_time() - self._command_cpu
+        with self._lock:
+            # spans in other threads overlap in time, so other is what's left of the command, not less than 0
+            phased = [p for name, p in self.phases.items() if name != "startup"]
+            wall -= sum(p["wall"] for p in phased)
+            cpu -= sum(p["cpu"] for p in phased)
+        self._record("other", max(wall, 0.0), max(cpu, 0.0))
+
+    def _record(self, phase: str, wall: float, cpu: float) -> None:
+        with self._lock:
+            p = self.phases.setdefault(
+                phase, {"count": 0, "wall": 0.0, "cpu": 0.0, "peak_rss": None}
+            )
+            p["count"] += 1
+            p["wall"] += wall
+            p["cpu"] += cpu
+            rss = _peak_rss()
+            if rss is not None:
+                p["peak_rss"] = max(p["peak_rss"] or 0, rss)
+
+    def on_start(self, span: Span) -> None:
+        with self._lock:
+            parent = self._spans.get(span.parent_id)
+            phase = PHASES.get(span.name) or (
+                parent["phase"] if parent is not None else None
+            )
+            self._spans[span.id] = {
+                "phase": phase,
+                "cpu": time.thread_time(),
+                "child_wall": 0.0,
+                "child_cpu": 0.0,
+            }
+
+    def on_end(self, span: Span) -> None:
+        cpu = time.thread_time()
+        with self._lock:
+            s = self._spans.pop(span.id, None)
+            if s is None:
+                return
+            cpu -= s["cpu"]
+            parent = self._spans.get(span.parent_id)
+            if parent is not None:
+                parent["child_wall"] += span.duration
+                parent["child_cpu"] += cpu
+
+        if s["phase"] is not None:
+            self._record(
+                s["phase"],
+                max(span.duration - s["child_wall"], 0.0),
+                max(cpu - s["child_cpu"], 0.0),
+            )
+
+    def report(self) -> Table:
+        """The phases as a table"""
+        t = Table(title="Profile")
+        for column in ["Phase", "Spans", "Wall (s)", "CPU (s)", "Peak RSS (MB)"]:
+            t.add_column(column, justify="left" if column == "Phase" else "right")
+
+        total_wall = total_cpu = 0.0
+        for name, p in self.phases.items():
+            total_wall += p["wall"]
+            total_cpu += p["cpu"]
+            t.add_row(
+                name,
+                str(p["count"]) if name not in ["startup", "other"] else "",
+                f"{p['wall']:.3f}",
+                f"{p['cpu']:.3f}",
+                f"{p['peak_rss'] / 1024**2:.1f}" if p["peak_rss"] is not None else "",
+            )
+        peak = _peak_rss()
+        t.add_row(
+            "total",
+            "",
+            f"{total_wall:.3f}",
+            f"{total_cpu:.3f}",
+            f"{peak / 1024**2:.1f}" if peak is not None else "",
+            style="bold",
+        )
+        return t
+
+    def print_report(self) -> None:
+        """Prints the table to stderr, so as not to mix it with a command's output"""
+        console = Console(stderr=True)
+        console.print(self.report())
+        if self.profile_file is not None:
+            console.print(f"Full profile written to {self.profile_file}")
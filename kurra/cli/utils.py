@@ -3,6 +3,8 @@ import datetime
 import io
 import json
 from decimal import Decimal
+from pathlib import Path
+from typing import Iterable, TextIO
 
 from rdflib import Graph, Literal, Namespace
 from rdflib.namespace import RDF, SH
@@ -13,6 +15,93 @@ from kurra.utils import is_construct_or_describe_query
 
 EX = Namespace("http://example.com/")
 
+# formats SELECT results can be written in row by row
+SPARQL_ROW_FORMATS = ["csv", "tsv", "ndjson"]
+
+
+def _rdf_literal_to_json(value):
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+
+    # RDFLib uses additional Python types for literals such as xsd:duration.
+    # Converting them back to a Literal produces their canonical RDF lexical
+    # form, which is safe to represent as a JSON string.
+    try:
+        literal = Literal(value)
+        if literal.datatype is not None:
+            return str(literal)
+    except (TypeError, ValueError):
+        pass
+
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _cell(value) -> str:
+    """The text of a SELECT result value, empty if unbound"""
+    if value is None:
+        return ""
+    if isinstance(value, dict):  # a blank node
+        return f"_:{value['value']}"
+    return str(value)
+
+
+def _tsv_cell(value) -> str:
+    return (
+        _cell(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def write_sparql_rows(
+    variables: list[str],
+    rows: Iterable[dict],
+    out: TextIO,
+    output_format: str = "csv",
+) -> int:
+    """Writes SELECT result rows to out as they are read, so that the whole result is never held in memory
+
+    Args:
+        variables: the result variables, in column order
+        rows: result rows, as per [`convert_sparql_json_to_python()`][kurra.utils.convert_sparql_json_to_python]
+        out: a text file or stream, such as ``sys.stdout``
+        output_format: 'csv', 'tsv' - tab-separated with tabs, newlines and backslashes in values escaped - or
+            'ndjson' - one JSON object per row
+
+    Returns:
+        int: the number of rows written
+    """
+    if output_format not in SPARQL_ROW_FORMATS:
+        raise ValueError(
+            f"output_format must be one of {', '.join(SPARQL_ROW_FORMATS)}"
+        )
+
+    n = 0
+    if output_format == "csv":
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(variables)
+        for n, row in enumerate(rows, start=1):
+            writer.writerow([_cell(row.get(v)) for v in variables])
+    elif output_format == "tsv":
+        out.write("\t".join(variables) + "\n")
+        for n, row in enumerate(rows, start=1):
+            out.write("\t".join(_tsv_cell(row.get(v)) for v in variables) + "\n")
+    else:
+        for n, row in enumerate(rows, start=1):
+            out.write(
+                json.dumps(
+                    {v: row[v] for v in variables if v in row},
+                    default=_rdf_literal_to_json,
+                    ensure_ascii=False,
+                )
+                + "\n"
+            )
+    return n
+
 
 def format_sparql_response_as_rich_table(response, query):
     if is_construct_or_describe_query(query):
@@ -31,12 +120,7 @@ def format_sparql_response_as_rich_table(response, query):
         for x in response["head"]["vars"]:
             t.add_column(x)
         for row in response["results"]["bindings"]:
-            cols = []
-            for k, v in {
-                key: row[key] for key in response["head"]["vars"] if key in row
-            }.items():
-                cols.append(str(v))
-            t.add_row(*tuple(cols))
+            t.add_row(*[_cell(row.get(v)) for v in response["head"]["vars"]])
 
     return t
 
@@ -45,29 +129,9 @@ def format_sparql_response_as_json(response):
     if isinstance(response, SPARQLResult):
         response = json.loads(response.serialize(format="json").decode())
 
-    def rdf_literal_to_json(value):
-        if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
-            return value.isoformat()
-        if isinstance(value, Decimal):
-            return float(value)
-
-        # RDFLib uses additional Python types for literals such as xsd:duration.
-        # Converting them back to a Literal produces their canonical RDF lexical
-        # form, which is safe to represent as a JSON string.
-        try:
-            literal = Literal(value)
-            if literal.datatype is not None:
-                return str(literal)
-        except (TypeError, ValueError):
-            pass
-
-        raise TypeError(
-            f"Object of type {type(value).__name__} is not JSON serializable"
-        )
-
     return json.dumps(
         response,
-        default=rdf_literal_to_json,
+        default=_rdf_literal_to_json,
         ensure_ascii=False,
         indent=4,
     )
@@ -81,21 +145,14 @@ def format_sparql_response_as_csv(response, query):
         return response.serialize(format="longturtle")
 
     s = io.StringIO()
-    writer = csv.writer(s)
 
     # ASK
     if not response.get("results"):
-        writer.writerow("Ask")
+        csv.writer(s).writerow("Ask")
     else:  # SELECT
-        writer.writerow(response["head"]["vars"])
-
-        for row in response["results"]["bindings"]:
-            r = []
-            for k, v in {
-                key: row[key] for key in response["head"]["vars"] if key in row
-            }.items():
-                r.append(str(v))
-            writer.writerow(r)
+        write_sparql_rows(
+            response["head"]["vars"], response["results"]["bindings"], s, "csv"
+        )
 
     return s.getvalue()
 
@@ -117,14 +174,21 @@ def format_shacl_graph_as_rich_table(g: Graph):
     return t
 
 
-def format_shacl_summary_as_rich_table(g: Graph):
+def _shacl_summary_counts(g: Graph) -> tuple[Literal, Literal, Literal]:
+    """The numbers of Violation, Warning and Info results in a validation summary graph"""
     counts = g.value(
         subject=g.value(predicate=RDF.type, object=EX.ValidationReportSummary),
         predicate=EX["counts"],
     )
-    violations = g.value(counts, EX.violationCount, default=Literal(0))
-    warnings = g.value(counts, EX.warningCount, default=Literal(0))
-    info = g.value(counts, EX.infoCount, default=Literal(0))
+    return (
+        g.value(counts, EX.violationCount, default=Literal(0)),
+        g.value(counts, EX.warningCount, default=Literal(0)),
+        g.value(counts, EX.infoCount, default=Literal(0)),
+    )
+
+
+def format_shacl_summary_as_rich_table(g: Graph):
+    violations, warnings, info = _shacl_summary_counts(g)
 
     t = Table(
         title=(
@@ -153,3 +217,34 @@ def format_shacl_summary_as_rich_table(g: Graph):
         )
 
     return t
+
+
+def format_shacl_files_summary_as_rich_table(
+    reports: dict[Path, tuple[bool, Graph, str, Graph]],
+):
+    """A table of the validation status and numbers of results of each file validated by
+    [`validate_files()`][kurra.shacl.validate_files], with their totals"""
+    valid = sum(1 for r in reports.values() if r[0])
+    t = Table(
+        title=f"Validation summary — Files: {len(reports)}, Valid: {valid}, Not valid: {len(reports) - valid}",
+        padding=(0, 1),
+    )
+    t.add_column("File")
+    t.add_column("Valid")
+    t.add_column("Violations", justify="right")
+    t.add_column("Warnings", justify="right")
+    t.add_column("Info", justify="right")
+
+    totals = [0, 0, 0]
+    for f, (conforms, _, _, summary) in reports.items():
+        counts = [int(c) for c in _shacl_summary_counts(summary)]
+        totals = [a + b for a, b in zip(totals, counts)]
+        t.add_row(
+            str(f),
+            "yes" if conforms else "no",
+            *(str(c) for c in counts),
+            style=None if conforms else "red",
+        )
+    t.add_row("total", "", *(str(c) for c in totals), style="bold")
+
+    return t
@@ -0,0 +1,102 @@
+"""A record, per SPARQL Endpoint, of the protocol options known to work with it.
+
+kurra learns what an endpoint accepts - HTTP methods for queries and updates, result media types, Graph Store
+Protocol paths and so on - as it talks to it, so that later requests can use the known-good option directly rather
+than trying one and falling back to another.
+
+The record is held in memory for the life of the process. Call
+[`load_capabilities()`][kurra.db.capabilities.load_capabilities] to read a previously saved record and keep it saved,
+by default in ``~/.kurra/endpoints.json``, as it changes."""
+
+import json
+import os
+import threading
+from pathlib import Path
+
+CAPABILITIES_CACHE = Path().home() / ".kurra" / "endpoints.json"
+
+_capabilities: dict[str, dict] = {}
+_persist_path: Path | None = None
+_lock = threading.Lock()
+
+
+def get_capabilities(sparql_endpoint: str) -> dict:
+    """Returns what is known to work with the given SPARQL Endpoint. An empty dict if nothing is known yet.
+
+    Known keys are:
+
+    * ``query_method`` - ``"POST"`` or ``"GET"``, for SPARQL queries
+    * ``update_method`` - ``"POST"`` or ``"GET"``, for SPARQL updates
+    * ``results_media_types`` - media types the endpoint has returned results in
+    * ``compression`` - whether the endpoint accepts request bodies compressed with each content encoding tried,
+      e.g. ``{"gzip": True, "zstd": False}``
+    """
+    with _lock:
+        return dict(_capabilities.get(sparql_endpoint, {}))
+
+
+def remember(sparql_endpoint: str, **capabilities) -> None:
+    """Records capabilities of a SPARQL Endpoint, saving them if persistence is enabled.
+
+    List and dict values are merged with those already known, other values replace them."""
+    with _lock:
+        known = _capabilities.setdefault(sparql_endpoint, {})
+        changed = False
+        for k, v in capabilities.items():
+            if isinstance(v, list):
+                v = known.get(k, []) + [x for x in v if x not in known.get(k, [])]
+            elif isinstance(v, dict):
+                v = {**(known.get(k) if isinstance(known.get(k), dict) else {}), **v}
+            if known.get(k) != v:
+                known[k] = v
+                changed = True
+
+        if changed and _persist_path is not None:
+            _save(_persist_path)
+
+
+def accepts_compression(sparql_endpoint: str, encoding: str) -> bool | None:
+    """Whether a SPARQL Endpoint is known to accept request bodies compressed with the given content encoding, or
+    None if it's not known"""
+    known = get_capabilities(sparql_endpoint).get("compression")
+    return known.get(encoding) if isinstance(known, dict) else None
+
+
+def forget(sparql_endpoint: str | None = None) -> None:
+    """Forgets what is known about a SPARQL Endpoint, or about all endpoints if none is given"""
+    with _lock:
+        if sparql_endpoint is None:
+            _capabilities.clear()
+        else:
+            _capabilities.pop(sparql_endpoint, None)
+
+        if _persist_path is not None:
+            _save(_persist_path)
+
+
+def load_capabilities(path: Path = CAPABILITIES_CACHE) -> dict[str, dict]:
+    """Loads endpoint capabilities saved at path, if any, and saves the record there whenever it changes from now on"""
+    global _persist_path
+
+    with _lock:
+        if path.is_file():
+            try:
+                _capabilities.update(json.loads(path.read_text()))
+            except ValueError:
+                pass  # a corrupt record is rebuilt as endpoints are used
+        _persist_path = path
+        return {k: dict(v) for k, v in _capabilities.items()}
+
+
+def save_capabilities(path: Path = CAPABILITIES_CACHE) -> None:
+    """Saves the endpoint capabilities known so far to path"""
+    with _lock:
+        _save(path)
+
+
+def _save(path: Path) -> None:
+    # write then rename so that concurrent readers never see a partial file
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(_capabilities, indent=2))
+    os.replace(tmp, path)
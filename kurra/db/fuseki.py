@@ -6,6 +6,9 @@ from pathlib import Path
 import httpx
 from rdflib import RDF, Graph, URIRef
 
+from kurra.tracing import traced
+from kurra.utils import send_request
+
 
 class FusekiError(Exception):
     """An error that occurred while interacting with Fuseki."""
@@ -15,6 +18,7 @@ class FusekiError(Exception):
         super().__init__(self.message)
 
 
+@traced("fuseki.ping")
 def ping(
     server_url: str,
     http_client: httpx.Client | None = None,
@@ -24,7 +28,7 @@ def ping(
         http_client = httpx.Client()
         close_http_client = True
 
-    r = http_client.get(f"{server_url}/$/ping")
+    r = send_request(http_client, "GET", f"{server_url}/$/ping")
 
     if r.status_code != 200:
         raise FusekiError(
@@ -37,6 +41,7 @@ def ping(
     return r.text
 
 
+@traced("fuseki.server")
 def server(
     server_url: str,
     http_client: httpx.Client | None = None,
@@ -46,7 +51,7 @@ def server(
         http_client = httpx.Client()
         close_http_client = True
 
-    r = http_client.get(f"{server_url}/$/server")
+    r = send_request(http_client, "GET", f"{server_url}/$/server")
 
     if r.status_code != 200:
         raise FusekiError(
@@ -61,6 +66,7 @@ def server(
     return r.text
 
 
+@traced("fuseki.status")
 def status(
     server_url: str,
     http_client: httpx.Client | None = None,
@@ -68,6 +74,7 @@ def status(
     return server(server_url, http_client=http_client)
 
 
+@traced("fuseki.stats")
 def stats(
     server_url: str,
     name: str = None,
@@ -79,7 +86,7 @@ def stats(
         close_http_client = True
 
     url = f"{server_url}/$/stats" if name is None else f"{server_url}/$/stats/{name}"
-    r = http_client.get(url)
+    r = send_request(http_client, "GET", url)
 
     if r.status_code != 200:
         raise FusekiError(
@@ -92,6 +99,7 @@ def stats(
     return r.text
 
 
+@traced("fuseki.backup")
 def backup(
     server_url: str,
     name: str,
@@ -100,6 +108,7 @@ def backup(
     raise NotImplementedError("backup/backups is not implemented yet")
 
 
+@traced("fuseki.backups")
 def backups(
     server_url: str,
     name: str,
@@ -108,6 +117,7 @@ def backups(
     return backup(server_url, name, http_client)
 
 
+@traced("fuseki.backups_list")
 def backups_list(
     server_url: str,
     http_client: httpx.Client | None = None,
@@ -117,7 +127,7 @@ def backups_list(
         http_client = httpx.Client()
         close_http_client = True
 
-    r = http_client.get(f"{server_url}/$/backups-list")
+    r = send_request(http_client, "GET", f"{server_url}/$/backups-list")
 
     if r.status_code != 200:
         raise FusekiError(
@@ -130,6 +140,7 @@ def backups_list(
     return r.text
 
 
+@traced("fuseki.sleep")
 def sleep(
     server_url: str,
     http_client: httpx.Client | None = None,
@@ -137,6 +148,7 @@ def sleep(
     raise NotImplementedError("sleep is not implemented yet")
 
 
+@traced("fuseki.tasks")
 def tasks(
     server_url: str,
     name: str = None,
@@ -148,7 +160,7 @@ def tasks(
         close_http_client = True
 
     url = f"{server_url}/$/tasks" if name is None else f"{server_url}/$/tasks/{name}"
-    r = http_client.get(url)
+    r = send_request(http_client, "GET", url)
 
     if r.status_code != 200:
         raise FusekiError(
@@ -161,6 +173,7 @@ def tasks(
     return r.text
 
 
+@traced("fuseki.metrics")
 def metrics(
     server_url: str,
     http_client: httpx.Client | None = None,
@@ -170,7 +183,7 @@ def metrics(
         http_client = httpx.Client()
         close_http_client = True
 
-    r = http_client.get(f"{server_url}/$/metrics")
+    r = send_request(http_client, "GET", f"{server_url}/$/metrics")
 
     if r.status_code != 200:
         raise FusekiError(
@@ -183,6 +196,7 @@ def metrics(
     return r.text
 
 
+@traced("fuseki.describe")
 def describe(
     base_url: str,
     dataset_name: str = None,
@@ -208,7 +222,7 @@ def describe(
         if dataset_name is not None
         else f"{base_url}/$/datasets"
     )
-    r = http_client.get(url, headers=headers)
+    r = send_request(http_client, "GET", url, headers=headers)
 
     if r.status_code != 200:
         raise FusekiError(
@@ -232,6 +246,7 @@ def describe(
         )
 
 
+@traced("fuseki.create")
 def create(
     sparql_endpoint: str,
     dataset_name_or_config_file: str | TextIOBase | Path,
@@ -245,7 +260,9 @@ def create(
 
     if isinstance(dataset_name_or_config_file, str):
         data = {"dbName": dataset_name_or_config_file, "dbType": dataset_type}
-        r = http_client.post(f"{sparql_endpoint}/$/datasets", data=data)
+        r = send_request(
+            http_client, "POST", f"{sparql_endpoint}/$/datasets", data=data
+        )
         if r.status_code != 200 and r.status_code != 201:
             raise FusekiError(
                 f"Failed to create dataset {dataset_name_or_config_file} at {sparql_endpoint}",
@@ -268,7 +285,9 @@ def create(
             fuseki_service, URIRef("http://jena.apache.org/fuseki#name")
         )
 
-        r = http_client.post(
+        r = send_request(
+            http_client,
+            "POST",
             f"{sparql_endpoint}/$/datasets",
             content=data,
             headers={"Content-Type": "text/turtle"},
@@ -289,6 +308,7 @@ def create(
     return f"Dataset {msg} {sparql_endpoint}."
 
 
+@traced("fuseki.delete")
 def delete(
     base_url: str, dataset_name: str, http_client: httpx.Client | None = None
 ) -> str:
@@ -309,7 +329,7 @@ def delete(
         http_client = httpx.Client()
         close_http_client = True
 
-    r = http_client.delete(f"{base_url}/$/datasets/{dataset_name}")
+    r = send_request(http_client, "DELETE", f"{base_url}/$/datasets/{dataset_name}")
 
     if r.status_code != 200:
         raise FusekiError(
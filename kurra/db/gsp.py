@@ -12,15 +12,69 @@ from typing import Union
 import httpx
 from rdflib import Graph
 
+from kurra.db.capabilities import accepts_compression, remember
 from kurra.db.sparql import query
+from kurra.tracing import span, traced
 from kurra.utils import (
     RDF_SUFFIX_MAP,
     GspType,
+    compress,
     load_graph,
     make_system_specific_sparql_endpoint,
+    send_request,
 )
 
 
+def _send_rdf(
+    http_client: httpx.Client,
+    method: str,
+    sparql_endpoint: str,
+    url: str,
+    params: dict | None,
+    content: str,
+    content_type: str,
+    compression: str | None,
+    compression_level: int | None,
+) -> httpx.Response:
+    """Sends RDF content, compressed if requested and not known to be rejected by the endpoint"""
+    headers = {"Content-Type": content_type}
+    known = (
+        accepts_compression(sparql_endpoint, compression)
+        if compression is not None
+        else None
+    )
+
+    if compression is not None and known is not False:
+        with span("compress", encoding=compression, bytes_in=len(content)) as s:
+            compressed = compress(content, compression, compression_level)
+            s.set(bytes_out=len(compressed))
+        r = send_request(
+            http_client,
+            method,
+            url,
+            params=params,
+            headers={**headers, "Content-Encoding": compression},
+            content=compressed,
+        )
+        if r.is_success:
+            remember(sparql_endpoint, compression={compression: True})
+        # a 400 or 415 may mean the endpoint can't decode the body, unless it has before
+        if r.status_code not in (400, 415) or known:
+            return r
+
+        r = send_request(
+            http_client, method, url, params=params, headers=headers, content=content
+        )
+        if r.is_success:
+            remember(sparql_endpoint, compression={compression: False})
+        return r
+
+    return send_request(
+        http_client, method, url, params=params, headers=headers, content=content
+    )
+
+
+@traced("gsp.exists")
 def exists(
     sparql_endpoint: str, graph_iri: str, http_client: httpx.Client | None = None
 ) -> bool:
@@ -40,7 +94,9 @@ def exists(
     if graph_iri is None:
         ssse += "?default"
 
-    r = http_client.head(
+    r = send_request(
+        http_client,
+        "HEAD",
         ssse,
         params={"graph": graph_iri} if graph_iri is not None else None,
     )
@@ -51,6 +107,7 @@ def exists(
     return r.is_success
 
 
+@traced("gsp.get")
 def get(
     sparql_endpoint: str,
     graph_iri: str = None,
@@ -98,7 +155,9 @@ def get(
     if graph_iri is None:
         ssse += "?default"
 
-    r = http_client.get(
+    r = send_request(
+        http_client,
+        "GET",
         ssse,
         params={"graph": graph_iri} if graph_iri is not None else None,
         headers={"Accept": accept_type},
@@ -111,28 +170,37 @@ def get(
         if return_format == "original":
             return r.text
         else:
-            if graph_iri is not None and graph_iri != "default":
-                return Graph(identifier=graph_iri).parse(
-                    data=r.text, format=accept_type
-                )
-            else:
-                return Graph().parse(data=r.text, format=accept_type)
+            with span("rdf.parse", format=accept_type, characters=len(r.text)) as s:
+                if graph_iri is not None and graph_iri != "default":
+                    g = Graph(identifier=graph_iri).parse(
+                        data=r.text, format=accept_type
+                    )
+                else:
+                    g = Graph().parse(data=r.text, format=accept_type)
+                s.set(triples=len(g))
+                return g
     else:
         return r.status_code, r.text
 
 
+@traced("gsp.put")
 def put(
     sparql_endpoint: str,
     file_or_str_or_graph: Union[Path, str, Graph],
     graph_iri: str = None,
     content_type="text/turtle",
     http_client: httpx.Client | None = None,
+    compression: LiteralType["gzip", "zstd"] | None = None,
+    compression_level: int | None = None,
 ) -> Union[Graph, int]:
     """Graph Store Protocol's HTTP PUT: https://www.w3.org/TR/sparql12-graph-store-protocol/#http-put
 
     Inserts the RDF content supplied into a graph identified by graph_id or the default graph.
 
-    Will replace existing content."""
+    Will replace existing content.
+
+    The content may be sent compressed - see [`utils.compress()`][kurra.utils.compress]. If the endpoint rejects the
+    compressed content, it is resent uncompressed and not compressed for that endpoint again."""
     if not sparql_endpoint.startswith("http"):
         raise ValueError("SPARQL Endpoint given does not start with 'http'")
 
@@ -153,11 +221,20 @@ def put(
     if graph_iri is None:
         ssse += "?default"
 
-    r = http_client.put(
+    g = load_graph(file_or_str_or_graph)
+    with span("rdf.serialize", format=content_type, triples=len(g)):
+        content = g.serialize(format=content_type)
+
+    r = _send_rdf(
+        http_client,
+        "PUT",
+        sparql_endpoint,
         ssse,
-        params={"graph": graph_iri} if graph_iri is not None else None,
-        headers={"Content-Type": content_type},
-        content=load_graph(file_or_str_or_graph).serialize(format=content_type),
+        {"graph": graph_iri} if graph_iri is not None else None,
+        content,
+        content_type,
+        compression,
+        compression_level,
     )
 
     if close_http_client:
@@ -169,18 +246,23 @@ def put(
         return r.status_code, r.text
 
 
+@traced("gsp.post")
 def post(
     sparql_endpoint: str,
     file_or_str_or_graph: Union[Path, str, Graph],
     graph_iri: str = None,
     content_type="text/turtle",
     http_client: httpx.Client | None = None,
+    compression: LiteralType["gzip", "zstd"] | None = None,
+    compression_level: int | None = None,
 ) -> Union[Graph, int]:
     """Graph Store Protocol's HTTP POST: https://www.w3.org/TR/sparql12-graph-store-protocol/#http-post
 
     Inserts the RDF content supplied into a graph identified by graph_id or the default graph.
 
-    Will add to existing content."""
+    Will add to existing content.
+
+    The content may be sent compressed, as per put()."""
     if not sparql_endpoint.startswith("http"):
         raise ValueError("SPARQL Endpoint given does not start with 'http'")
 
@@ -201,13 +283,20 @@ def post(
     if graph_iri is None:
         ssse += "?default"
 
-    r = http_client.post(
+    g = load_graph(file_or_str_or_graph)
+    with span("rdf.serialize", format=content_type, triples=len(g)):
+        content = g.serialize(format=content_type)
+
+    r = _send_rdf(
+        http_client,
+        "POST",
+        sparql_endpoint,
         ssse,
-        params={"graph": graph_iri} if graph_iri is not None else None,
-        headers={
-            "Content-Type": content_type,
-        },
-        content=load_graph(file_or_str_or_graph).serialize(format=content_type),
+        {"graph": graph_iri} if graph_iri is not None else None,
+        content,
+        content_type,
+        compression,
+        compression_level,
     )
 
     if close_http_client:
@@ -219,6 +308,7 @@ def post(
         return r.status_code, r.text
 
 
+@traced("gsp.delete")
 def delete(
     sparql_endpoint: str,
     graph_iri: str = None,
@@ -242,7 +332,9 @@ def delete(
     if graph_iri is None:
         ssse += "?default"
 
-    r = http_client.delete(
+    r = send_request(
+        http_client,
+        "DELETE",
         ssse,
         params={"graph": graph_iri} if graph_iri is not None else None,
     )
@@ -256,6 +348,7 @@ def delete(
         return r.status_code, r.text
 
 
+@traced("gsp.clear")
 def clear(
     sparql_endpoint: str, graph_iri: str, http_client: httpx.Client | None = None
 ):
@@ -307,6 +400,8 @@ def upload(
     append: bool = False,
     content_type: str = "text/turtle",
     http_client: httpx.Client | None = None,
+    compression: LiteralType["gzip", "zstd"] | None = None,
+    compression_level: int | None = None,
 ) -> Union[bool, int]:
     """This function uploads a file to a SPARQL Endpoint using the Graph Store Protocol.
 
@@ -320,9 +415,21 @@ def upload(
 
     if append:
         return post(
-            sparql_endpoint, file_or_str_or_graph, graph_id, content_type, http_client
+            sparql_endpoint,
+            file_or_str_or_graph,
+            graph_id,
+            content_type,
+            http_client,
+            compression,
+            compression_level,
         )
     else:
         return put(
-            sparql_endpoint, file_or_str_or_graph, graph_id, content_type, http_client
+            sparql_endpoint,
+            file_or_str_or_graph,
+            graph_id,
+            content_type,
+            http_client,
+            compression,
+            compression_level,
         )
@@ -0,0 +1,227 @@
+"""Replays a log of SPARQL queries against a SPARQL Endpoint to measure how it copes with a real workload.
+
+A log is either a directory of query files - ``.rq`` or ``.sparql`` - replayed in name order, or a JSON Lines file with
+one object per query:
+
+```json
+{"query": "SELECT * WHERE { ?s ?p ?o } LIMIT 10", "timestamp": "2025-03-01T09:00:00.250Z", "class": "browse"}
+```
+
+``timestamp`` is an ISO 8601 date-time or seconds since the epoch and ``class`` a name for grouping results. Both are
+optional. Queries without a class are grouped by their shape: the same query with different IRIs, literals or numbers
+is in the same class."""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+
+from kurra.bench import latency_summary
+from kurra.db.sparql import query
+
+QUERY_FILE_SUFFIXES = [".rq", ".sparql"]
+
+
+def query_class(q: str) -> str:
+    """A name for the shape of a query: its form and a hash of its text with IRIs, literals and numbers removed"""
+    shape = re.sub(r"#[^\n]*", " ", q)
+    shape = re.sub(r'"""(?:.|\n)*?"""|\'\'\'(?:.|\n)*?\'\'\'', "?", shape)
+    shape = re.sub(r'"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\'', "?", shape)
+    shape = re.sub(r"<[^<>\s]*>", "?", shape)
+    shape = re.sub(r"\b\d+(?:\.\d+)?\b", "?", shape)
+    shape = " ".join(shape.split())
+
+    form = re.search(
+        r"\b(SELECT|CONSTRUCT|DESCRIBE|ASK|INSERT|DELETE|LOAD|CLEAR|DROP|CREATE)\b",
+        re.sub(r"PREFIX\s+\S*\s*\?|BASE\s*\?", "", shape, flags=re.IGNORECASE),
+        flags=re.IGNORECASE,
+    )
+    form = form.group(1).upper() if form is not None else "QUERY"
+
+    return f"{form}-{hashlib.sha1(shape.encode()).hexdigest()[:8]}"
+
+
+def _parse_timestamp(t: str | int | float) -> float:
+    if isinstance(t, (int, float)):
+        return float(t)
+    return datetime.fromisoformat(t).timestamp()
+
+
+def load_workload(log: Path | str) -> list[dict]:
+    """Reads a query log, a directory of query files or a JSON Lines file, into a list of queries to replay
+
+    Args:
+        log: the directory or JSON Lines file
+
+    Returns:
+        list[dict]: one dict per query, in log order, with ``query``, ``class`` and ``offset`` - the seconds after the
+            first query it was made at in the log. Queries without timestamps are given the offset of the query
+            before them, or 0 if there is none, and all queries from a directory are given 0
+    """
+    log = Path(log)
+    if log.is_dir():
+        return [
+            {"query": f.read_text(), "class": f.stem, "offset": 0.0}
+            for f in sorted(log.iterdir())
+            if f.suffix in QUERY_FILE_SUFFIXES
+        ]
+
+    if not log.is_file():
+        raise ValueError(f"The query log {log} is not a file or directory")
+
+    workload = []
+    start = None
+    offset = 0.0
+    with open(log) as f:
+        for n, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                q = entry["query"]
+                if entry.get("timestamp") is not None:
+                    t = _parse_timestamp(entry["timestamp"])
+                    start = t if start is None else start
+                    offset = t - start
+            except (ValueError, KeyError, TypeError) as e:
+                raise ValueError(
+                    f"Line {n} of {log} is not a valid query entry: {e}"
+                ) from e
+
+            workload.append(
+                {
+                    "query": q,
+                    "class": entry.get("class") or query_class(q),
+                    "offset": offset,
+                }
+            )
+
+    return workload
+
+
+def replay(
+    sparql_endpoint: str,
+    workload: list[dict] | Path | str,
+    speed: float = 1.0,
+    concurrency: int | None = None,
+    http_client: httpx.Client | None = None,
+    timeout: float | None = None,
+    max_in_flight: int = 64,
+) -> dict:
+    """Replays a query log against a SPARQL Endpoint and reports latencies and failures per query class
+
+    By default queries are sent at the pace they were logged at, each at its logged offset from the first, divided by
+    speed. With concurrency set, timestamps are ignored and queries are sent back to back, concurrency at a time.
+
+    Args:
+        sparql_endpoint: the SPARQL Endpoint to query
+        workload: a log as read by [`load_workload()`][kurra.db.replay.load_workload], or the path to one
+        speed: a multiple of the logged pace, e.g. 2 to send queries twice as fast as they were logged
+        concurrency: the number of queries in flight at once, ignoring timestamps, if set
+        http_client: an HTTP client to use. Created internally if not supplied
+        timeout: the timeout, in seconds, for each HTTP request
+        max_in_flight: the most queries in flight at once when replaying at the logged pace. Queries due while this
+            many are in flight start late, and their lateness is reported as ``max_lag``
+
+    Returns:
+        dict: ``queries``, ``errors``, ``duration`` - the wall time of the replay in seconds - ``throughput``,
+            ``max_lag`` - the most seconds any query was sent after it was due - and ``classes``, a dict per query
+            class of ``count``, ``errors``, ``latency`` - as per [`bench()`][kurra.bench.bench] - and
+            ``error_messages``
+    """
+    if not isinstance(workload, list):
+        workload = load_workload(workload)
+
+    if speed <= 0:
+        raise ValueError("speed must be greater than 0")
+
+    if concurrency is not None and concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    close_http_client = False
+    if http_client is None:
+        http_client = httpx.Client(
+            limits=httpx.Limits(max_connections=concurrency or max_in_flight)
+        )
+        close_http_client = True
+
+    outcomes = []
+    outcomes_lock = threading.Lock()
+    max_lag = 0.0
+
+    def _run(entry):
+        start = time.perf_counter()
+        error = None
+        try:
+            query(
+                sparql_endpoint,
+                entry["query"],
+                http_client=http_client,
+                timeout=timeout,
+            )
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        with outcomes_lock:
+            outcomes.append((entry["class"], time.perf_counter() - start, error))
+
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency or max_in_flight) as executor:
+            if concurrency is not None:
+                list(executor.map(_run, workload))
+            else:
+                in_flight = threading.BoundedSemaphore(max_in_flight)
+
+                def _paced(entry):
+                    try:
+                        _run(entry)
+                    finally:
+                        in_flight.release()
+
+                for entry in workload:
+                    due = start + entry["offset"] / speed
+                    time.sleep(max(0.0, due - time.perf_counter()))
+                    in_flight.acquire()
+                    max_lag = max(max_lag, time.perf_counter() - due)
+                    executor.submit(_paced, entry)
+    finally:
+        duration = time.perf_counter() - start
+        if close_http_client:
+            http_client.close()
+
+    classes = {}
+    for query_class_, latency, error in outcomes:
+        c = classes.setdefault(
+            query_class_,
+            {"count": 0, "errors": 0, "latencies": [], "error_messages": set()},
+        )
+        c["count"] += 1
+        if error is None:
+            c["latencies"].append(latency)
+        else:
+            c["errors"] += 1
+            c["error_messages"].add(error)
+
+    errors = sum(c["errors"] for c in classes.values())
+    return {
+        "queries": len(outcomes),
+        "errors": errors,
+        "duration": duration,
+        "throughput": (len(outcomes) - errors) / duration if duration > 0 else None,
+        "max_lag": max_lag,
+        "classes": {
+            name: {
+                "count": c["count"],
+                "errors": c["errors"],
+                "latency": latency_summary(c["latencies"]) if c["latencies"] else None,
+                "error_messages": sorted(c["error_messages"]),
+            }
+            for name, c in sorted(classes.items())
+        },
+    }
@@ -0,0 +1,704 @@
+"""SHACL validation of data in an RDF database, without downloading it.
+
+The constraints of SHACL shapes are compiled into SPARQL SELECT queries, one per constraint, that find the focus nodes
+and value nodes that don't conform to them. The database runs the queries, so only the results of the validation, not
+the data, are sent over the network, and they are made into a validation report like that of
+[`kurra.shacl.validate()`][kurra.shacl.validate].
+
+The targets, paths and constraint components of SHACL Core are supported, other than sh:qualifiedValueShapesDisjoint.
+SPARQL-based constraints and targets and custom constraint components are not, nor are shapes that refer to themselves,
+through sh:node and the like, and blank nodes as values of sh:targetNode, sh:in and sh:hasValue, which queries can't
+match."""
+
+import io
+from itertools import combinations
+from pathlib import Path
+
+import httpx
+from pyshacl.rdfutil import stringify_node
+from rdflib import BNode, Graph, Literal, URIRef
+from rdflib.collection import Collection
+from rdflib.namespace import OWL, RDF, RDFS, SH, XSD
+from rdflib.query import Result
+
+from kurra.db.sparql import query_many
+from kurra.shacl import (
+    SHAPE_TARGETS,
+    _hide_warnings,
+    _load_shapes_graph,
+    _summarize_validation_results,
+)
+from kurra.tracing import span
+
+TYPE_PATH = f"{RDF.type.n3()}/{RDFS.subClassOf.n3()}*"
+
+# the datatypes SPARQL can cast literals to, and so tell ill-formed literals of
+CASTABLE_DATATYPES = [
+    XSD.string,
+    XSD.boolean,
+    XSD.integer,
+    XSD.decimal,
+    XSD.float,
+    XSD.double,
+    XSD.dateTime,
+]
+
+NODE_KINDS = {
+    SH.IRI: "isIRI({v})",
+    SH.BlankNode: "isBlank({v})",
+    SH.Literal: "isLiteral({v})",
+    SH.BlankNodeOrIRI: "(isBlank({v}) || isIRI({v}))",
+    SH.BlankNodeOrLiteral: "(isBlank({v}) || isLiteral({v}))",
+    SH.IRIOrLiteral: "(isIRI({v}) || isLiteral({v}))",
+}
+
+RANGES = {
+    SH.minInclusive: (">=", SH.MinInclusiveConstraintComponent),
+    SH.maxInclusive: ("<=", SH.MaxInclusiveConstraintComponent),
+    SH.minExclusive: (">", SH.MinExclusiveConstraintComponent),
+    SH.maxExclusive: ("<", SH.MaxExclusiveConstraintComponent),
+}
+
+
+class _Violation:
+    """A way the focus nodes of a shape may not conform to it: a SPARQL pattern that matches those that don't, binding
+    the SPARQL variables of their focus nodes, their value nodes and, for sh:closed, the predicates of the values, if
+    reported.
+
+    Count constraints also have a pattern to group by focus node and a HAVING condition that the groups of focus nodes
+    that don't conform to them meet, which databases evaluate far faster than the pattern's join of as many value
+    nodes as the count."""
+
+    def __init__(
+        self,
+        shape,
+        component: URIRef,
+        pattern: str,
+        message: str,
+        focus: str,
+        value: str | None = None,
+        path: str | None = None,
+        grouped: tuple[str, str] | None = None,
+    ):
+        self.shape = shape
+        self.component = component
+        self.pattern = pattern
+        self.message = message
+        self.focus = focus
+        self.value = value
+        self.path = path
+        self.grouped = grouped
+
+    def reached_by(self, this: str, path: str) -> None:
+        """Makes the violation one of the value nodes of this along path"""
+        self.pattern = f"{this} {path} {self.focus} . {self.pattern}"
+        if self.grouped is not None:
+            pattern, having = self.grouped
+            self.grouped = f"{this} {path} {self.focus} . {pattern}", having
+
+
+class _ShapesCompiler:
+    """Compiles the constraints of shapes into SPARQL patterns"""
+
+    def __init__(self, sg: Graph):
+        self.sg = sg
+        self._n = 0
+        self._compiling = []
+
+    def _var(self) -> str:
+        self._n += 1
+        return f"?v{self._n}"
+
+    def _list(self, node) -> list:
+        return list(Collection(self.sg, node))
+
+    def _term(self, term) -> str:
+        if isinstance(term, BNode):
+            raise ValueError(
+                f"The blank node {term} in the shapes can't be matched by a query, so can't be validated remotely"
+            )
+        return term.n3()
+
+    def path(self, node) -> str:
+        """The SPARQL property path of a SHACL path"""
+        sg = self.sg
+        if isinstance(node, URIRef):
+            return node.n3()
+        if (node, RDF.first, None) in sg:
+            return "(" + "/".join(self.path(n) for n in self._list(node)) + ")"
+        if (p := sg.value(node, SH.inversePath)) is not None:
+            return f"^({self.path(p)})"
+        if (p := sg.value(node, SH.alternativePath)) is not None:
+            return "(" + "|".join(self.path(n) for n in self._list(p)) + ")"
+        for predicate, modifier in [
+            (SH.zeroOrMorePath, "*"),
+            (SH.oneOrMorePath, "+"),
+            (SH.zeroOrOnePath, "?"),
+        ]:
+            if (p := sg.value(node, predicate)) is not None:
+                return f"({self.path(p)}){modifier}"
+        raise ValueError(f"{node} is not a SHACL path")
+
+    def targets(self, shape) -> str | None:
+        """A SPARQL pattern binding ?this to the focus nodes of a shape's targets, or None if it has none"""
+        sg = self.sg
+        patterns = []
+        if nodes := list(sg.objects(shape, SH.targetNode)):
+            patterns.append(
+                "VALUES ?this { " + " ".join(self._term(n) for n in nodes) + " }"
+            )
+        classes = list(sg.objects(shape, SH.targetClass))
+        if (shape, RDF.type, RDFS.Class) in sg or (shape, RDF.type, OWL.Class) in sg:
+            classes.append(shape)
+        patterns.extend(f"?this {TYPE_PATH} {self._term(c)} ." for c in classes)
+        patterns.extend(
+            f"?this {self._term(p)} [] ."
+            for p in sg.objects(shape, SH.targetSubjectsOf)
+        )
+        patterns.extend(
+            f"[] {self._term(p)} ?this ." for p in sg.objects(shape, SH.targetObjectsOf)
+        )
+        if not patterns:
+            return None
+        return " UNION ".join("{ " + p + " }" for p in patterns)
+
+    def severity(self, shape) -> URIRef:
+        return self.sg.value(shape, SH.severity) or SH.Violation
+
+    def conforms(self, shape, node: str) -> str:
+        """A SPARQL expression that is true if the node conforms to the shape. As kurra validates allowing warnings,
+        results of Warning and Info severity don't stop it conforming"""
+        violations = [
+            v
+            for v in self.violations(shape, node)
+            if self.severity(v.shape) == SH.Violation
+        ]
+        if not violations:
+            return "true"
+        return "!(" + " || ".join(f"EXISTS {{ {v.pattern} }}" for v in violations) + ")"
+
+    def _distinct_values(self, this: str, path: str, n: int, shape=None) -> str:
+        """A SPARQL pattern matching n different value nodes of this along path, that conform to shape if given"""
+        values = [self._var() for _ in range(n)]
+        pattern = " ".join(f"{this} {path} {v} ." for v in values)
+        filters = [f"!sameTerm({a}, {b})" for a, b in combinations(values, 2)]
+        if shape is not None:
+            filters.extend(self.conforms(shape, v) for v in values)
+        if filters:
+            pattern += f" FILTER({' && '.join(filters)})"
+        return pattern
+
+    def violations(self, shape, this: str) -> list[_Violation]:
+        """The ways the node bound to the SPARQL variable this may not conform to a shape and to the property shapes
+        of it, which, for a property shape, are those of its value nodes"""
+        sg = self.sg
+        if (shape, SH.deactivated, Literal(True)) in sg:
+            return []
+        if shape in self._compiling:
+            raise ValueError(
+                f"The shape {shape} refers to itself, so can't be validated remotely"
+            )
+        for p in [SH.sparql, SH.target]:
+            if (shape, p, None) in sg:
+                raise ValueError(
+                    f"The shape {shape} has a SPARQL-based {sg.qname(p)}, which can't be validated remotely"
+                )
+
+        self._compiling.append(shape)
+        try:
+            violations = self._constraint_violations(shape, this)
+            shacl_path = sg.value(shape, SH.path)
+            for property_shape in sg.objects(shape, SH.property):
+                if shacl_path is None:
+                    violations.extend(self.violations(property_shape, this))
+                    continue
+                v = self._var()
+                for violation in self.violations(property_shape, v):
+                    violation.reached_by(this, self.path(shacl_path))
+                    violations.append(violation)
+        finally:
+            self._compiling.pop()
+        return violations
+
+    def _constraint_violations(self, shape, this: str) -> list[_Violation]:
+        sg = self.sg
+        violations = []
+
+        def add(component, pattern, message, value=None, path=None, grouped=None):
+            violations.append(
+                _Violation(
+                    shape, component, pattern, message, this, value, path, grouped
+                )
+            )
+
+        shacl_path = sg.value(shape, SH.path)
+        if shacl_path is not None:
+            path = self.path(shacl_path)
+            v = self._var()
+            values = f"{this} {path} {v} . "
+        else:
+            path = None
+            v = this
+            values = ""
+
+        def each_value(component, condition, message):
+            """Adds a violation by each value node the condition is true of"""
+            add(component, f"{values}FILTER({condition})", message, v)
+
+        for c in sg.objects(shape, SH["class"]):
+            add(
+                SH.ClassConstraintComponent,
+                f"{values}FILTER NOT EXISTS {{ {v} {TYPE_PATH} {self._term(c)} }}",
+                f"Value does not have class {stringify_node(sg, c)}",
+                v,
+            )
+
+        for datatype in sg.objects(shape, SH.datatype):
+            d = self._term(datatype)
+            condition = f"!isLiteral({v}) || datatype({v}) != {d}"
+            if datatype in CASTABLE_DATATYPES:
+                # ill-formed literals can't be cast
+                condition += f" || !COALESCE(sameTerm({d}({v}), {d}({v})), false)"
+            each_value(
+                SH.DatatypeConstraintComponent,
+                condition,
+                f"Value is not Literal with datatype {stringify_node(sg, datatype)}",
+            )
+
+        for kind in sg.objects(shape, SH.nodeKind):
+            if kind not in NODE_KINDS:
+                raise ValueError(f"{kind} is not a SHACL node kind")
+            each_value(
+                SH.NodeKindConstraintComponent,
+                "!" + NODE_KINDS[kind].format(v=v),
+                f"Value is not of Node Kind {stringify_node(sg, kind)}",
+            )
+
+        for predicate, (operator, component) in RANGES.items():
+            for bound in sg.objects(shape, predicate):
+                each_value(
+                    component,
+                    f"!COALESCE({v} {operator} {self._term(bound)}, false)",
+                    f"Value is not {operator} {stringify_node(sg, bound)}",
+                )
+
+        for n in sg.objects(shape, SH.minLength):
+            each_value(
+                SH.MinLengthConstraintComponent,
+                f"!COALESCE(!isBlank({v}) && STRLEN(STR({v})) >= {int(n)}, false)",
+                f"String length not >= {stringify_node(sg, n)}",
+            )
+
+        for n in sg.objects(shape, SH.maxLength):
+            each_value(
+                SH.MaxLengthConstraintComponent,
+                f"!COALESCE(!isBlank({v}) && STRLEN(STR({v})) <= {int(n)}, false)",
+                f"String length not <= {stringify_node(sg, n)}",
+            )
+
+        for pattern in sg.objects(shape, SH.pattern):
+            flags = sg.value(shape, SH.flags)
+            args = Literal(str(pattern)).n3()
+            if flags is not None:
+                args += ", " + Literal(str(flags)).n3()
+            each_value(
+                SH.PatternConstraintComponent,
+                f"!COALESCE(!isBlank({v}) && REGEX(STR({v}), {args}), false)",
+                f"Value does not match pattern '{pattern}'",
+            )
+
+        for languages in sg.objects(shape, SH.languageIn):
+            languages = self._list(languages)
+            matches = " || ".join(
+                f"langMatches(lang({v}), {Literal(str(lang)).n3()})"
+                for lang in languages
+            )
+            each_value(
+                SH.LanguageInConstraintComponent,
+                f"!COALESCE(isLiteral({v}) && ({matches or 'false'}), false)",
+                f"String language is not in {[str(lang) for lang in languages]}",
+            )
+
+        for members in sg.objects(shape, SH["in"]):
+            members = self._list(members)
+            same = " || ".join(f"sameTerm({v}, {self._term(m)})" for m in members)
+            each_value(
+                SH.InConstraintComponent,
+                f"!({same or 'false'})",
+                "Value {value} not in list "
+                + str([stringify_node(sg, m) for m in members]),
+            )
+
+        for node_shape in sg.objects(shape, SH.node):
+            each_value(
+                SH.NodeConstraintComponent,
+                f"!({self.conforms(node_shape, v)})",
+                f"Value does not conform to Shape {stringify_node(sg, node_shape)}",
+            )
+
+        for not_shape in sg.objects(shape, SH["not"]):
+            each_value(
+                SH.NotConstraintComponent,
+                self.conforms(not_shape, v),
+                f"Node {{value}} conforms to shape {stringify_node(sg, not_shape)}",
+            )
+
+        for predicate, component, join, message in [
+            (SH["and"], SH.AndConstraintComponent, " && ", "all shapes"),
+            (SH["or"], SH.OrConstraintComponent, " || ", "one or more shapes"),
+        ]:
+            for members in sg.objects(shape, predicate):
+                members = self._list(members)
+                conforms = join.join(self.conforms(m, v) for m in members)
+                each_value(
+                    component,
+                    f"!({conforms or ('true' if join == ' && ' else 'false')})",
+                    f"Node {{value}} does not conform to {message} in "
+                    + str([stringify_node(sg, m) for m in members]),
+                )
+
+        for members in sg.objects(shape, SH.xone):
+            members = self._list(members)
+            count = " + ".join(f"IF({self.conforms(m, v)}, 1, 0)" for m in members)
+            each_value(
+                SH.XoneConstraintComponent,
+                f"({count or '0'}) != 1",
+                "Node {value} does not conform to exactly one shape in "
+                + str([stringify_node(sg, m) for m in members]),
+            )
+
+        for value in sg.objects(shape, SH.hasValue):
+            if path is None:
+                pattern = f"FILTER(!sameTerm({this}, {self._term(value)}))"
+            else:
+                pattern = f"FILTER NOT EXISTS {{ {this} {path} {self._term(value)} }}"
+            add(
+                SH.HasValueConstraintComponent,
+                pattern,
+                "Node {focus}"
+                + ("->{path}" if path is not None else "")
+                + f" does not contain a value in the set: [{stringify_node(sg, value)}]",
+            )
+
+        if (shape, SH.closed, Literal(True)) in sg:
+            allowed = [
+                p
+                for p in (
+                    sg.value(ps, SH.path) for ps in sg.objects(shape, SH.property)
+                )
+                if isinstance(p, URIRef)
+            ]
+            for ignored in sg.objects(shape, SH.ignoredProperties):
+                allowed.extend(self._list(ignored))
+            predicate, value = self._var(), self._var()
+            others = " && ".join(
+                f"!sameTerm({predicate}, {self._term(p)})" for p in allowed
+            )
+            add(
+                SH.ClosedConstraintComponent,
+                f"{values}{v} {predicate} {value} . FILTER({others or 'true'})",
+                "Node {focus} is closed. It cannot have value: {value}",
+                value,
+                predicate,
+            )
+
+        for predicate in sg.objects(shape, SH.equals):
+            p = self._term(predicate)
+            other = self._var()
+            add(
+                SH.EqualsConstraintComponent,
+                f"{values}FILTER NOT EXISTS {{ {this} {p} {v} }}",
+                "Value of {focus}->" + stringify_node(sg, predicate) + " != {value}",
+                v,
+            )
+            add(
+                SH.EqualsConstraintComponent,
+                f"{this} {p} {other} . "
+                + (
+                    f"FILTER NOT EXISTS {{ {this} {path} {other} }}"
+                    if path is not None
+                    else f"FILTER(!sameTerm({this}, {other}))"
+                ),
+                "Value of {focus}->" + stringify_node(sg, predicate) + " != {value}",
+                other,
+            )
+
+        for p in sg.objects(shape, SH.disjoint):
+            add(
+                SH.DisjointConstraintComponent,
+                f"{values}{this} {self._term(p)} {v} .",
+                "Value of {focus}->" + stringify_node(sg, p) + " == {value}",
+                v,
+            )
+
+        if path is None:
+            return violations
+
+        for predicate, operator, component in [
+            (SH.lessThan, "<", SH.LessThanConstraintComponent),
+            (SH.lessThanOrEquals, "<=", SH.LessThanOrEqualsConstraintComponent),
+        ]:
+            for p in sg.objects(shape, predicate):
+                other = self._var()
+                add(
+                    component,
+                    f"{values}{this} {self._term(p)} {other} . "
+                    f"FILTER(!COALESCE({v} {operator} {other}, false))",
+                    "Value of {focus}->"
+                    + stringify_node(sg, p)
+                    + f" not {operator} "
+                    + "{value}",
+                    v,
+                )
+
+        for n in sg.objects(shape, SH.minCount):
+            if int(n) > 0:
+                pattern = self._distinct_values(this, path, int(n))
+                add(
+                    SH.MinCountConstraintComponent,
+                    f"FILTER NOT EXISTS {{ {pattern} }}",
+                    f"Less than {int(n)} values on " + "{focus}->{path}",
+                    grouped=(
+                        f"OPTIONAL {{ {values}}}",
+                        f"COUNT(DISTINCT {v}) < {int(n)}",
+                    ),
+                )
+
+        for n in sg.objects(shape, SH.maxCount):
+            pattern = self._distinct_values(this, path, int(n) + 1)
+            add(
+                SH.MaxCountConstraintComponent,
+                pattern,
+                f"More than {int(n)} values on " + "{focus}->{path}",
+                grouped=(values, f"COUNT(DISTINCT {v}) > {int(n)}"),
+            )
+
+        if (shape, SH.uniqueLang, Literal(True)) in sg:
+            a, b = self._var(), self._var()
+            add(
+                SH.UniqueLangConstraintComponent,
+                f"{this} {path} {a} . {this} {path} {b} . "
+                f'FILTER(!sameTerm({a}, {b}) && lang({a}) != "" && lang({a}) = lang({b}))',
+                "More than one String shares the same Language",
+            )
+
+        for qualified in sg.objects(shape, SH.qualifiedValueShape):
+            if (shape, SH.qualifiedValueShapesDisjoint, Literal(True)) in sg:
+                raise ValueError(
+                    f"The shape {shape} has sh:qualifiedValueShapesDisjoint, which can't be validated remotely"
+                )
+            conforming = f"{values}FILTER({self.conforms(qualified, v)})"
+            for n in sg.objects(shape, SH.qualifiedMinCount):
+                if int(n) > 0:
+                    pattern = self._distinct_values(this, path, int(n), qualified)
+                    add(
+                        SH.QualifiedMinCountConstraintComponent,
+                        f"FILTER NOT EXISTS {{ {pattern} }}",
+                        f"Focus node does not conform to shape {stringify_node(sg, qualified)}",
+                        grouped=(
+                            f"OPTIONAL {{ {conforming} }}",
+                            f"COUNT(DISTINCT {v}) < {int(n)}",
+                        ),
+                    )
+            for n in sg.objects(shape, SH.qualifiedMaxCount):
+                pattern = self._distinct_values(this, path, int(n) + 1, qualified)
+                add(
+                    SH.QualifiedMaxCountConstraintComponent,
+                    pattern,
+                    f"Focus node conforms to too many shapes {stringify_node(sg, qualified)}",
+                    grouped=(conforming, f"COUNT(DISTINCT {v}) > {int(n)}"),
+                )
+
+        return violations
+
+
+def _stringify(g: Graph, node) -> str:
+    try:
+        return stringify_node(g, node)
+    except (LookupError, ValueError):
+        # the node is in the database, not the shapes
+        return str(node)
+
+
+def _result_text(
+    sg: Graph, shape, component, severity, focus, value, path, messages
+) -> str:
+    """The description of a result in the text of a pyshacl validation report"""
+    text = (
+        "{} in {} ({}):\n\tSeverity: {}\n\tSource Shape: {}\n\tFocus Node: {}\n".format(
+            "Constraint Violation" if severity == SH.Violation else "Validation Result",
+            component.split("#")[-1],
+            component,
+            _stringify(sg, severity),
+            _stringify(sg, shape),
+            _stringify(sg, focus),
+        )
+    )
+    if value is not None:
+        text += f"\tValue Node: {_stringify(sg, value)}\n"
+    if path is not None:
+        text += f"\tResult Path: {_stringify(sg, path)}\n"
+    for m in sorted(messages):
+        text += f"\tMessage: {m}\n"
+    return text
+
+
+def _query(violation: _Violation, targets: str, graph_iris: list[str] | None) -> str:
+    variables = []
+    for var in ["?this", violation.focus, violation.value, violation.path]:
+        if var is not None and var not in variables:
+            variables.append(var)
+    datasets = "".join(f"FROM <{g}>\n" for g in graph_iris or [])
+    pattern = violation.pattern
+    grouping = ""
+    if violation.grouped is not None:
+        # the focus nodes are counted over, not each matched by as many value nodes as the count
+        pattern, having = violation.grouped
+        grouping = f"\nGROUP BY {' '.join(variables)}\nHAVING ({having})"
+    return (
+        f"SELECT DISTINCT {' '.join(variables)}\n"
+        f"{datasets}"
+        "WHERE {\n"
+        f"    {{ SELECT DISTINCT ?this WHERE {{ {targets} }} }}\n"
+        f"    {pattern}\n"
+        "}"
+        f"{grouping}"
+    )
+
+
+def validate(
+    sparql_endpoint: str,
+    shacl: Graph | Path | str | int,
+    graph_iris: list[str] | None = None,
+    hide_warnings: bool = False,
+    http_client: httpx.Client | None = None,
+    max_concurrency: int = 4,
+    timeout: float | httpx.Timeout | None = None,
+) -> tuple[bool, Graph, str, Graph]:
+    """Validates the data in an RDF database with SHACL shapes, without downloading it.
+
+    Each constraint of the shapes is compiled into a SPARQL query, run by the database, that selects the focus nodes,
+    and value nodes, that don't conform to it, so that only they are sent back. Focus nodes are those of the shapes'
+    targets in the database.
+
+    Args:
+        sparql_endpoint: The SPARQL Endpoint of the database
+        shacl: The SHACL shapes to validate with, as for [`kurra.shacl.validate()`][kurra.shacl.validate]
+        graph_iris: The IRIs of the graphs to validate, merged, as by SPARQL's FROM. The endpoint's default graph if
+            not given
+        hide_warnings: Whether to remove results of Warning and Info severity from the results graph
+        http_client: An HTTP client to use, as for [`query_many()`][kurra.db.sparql.query_many]
+        max_concurrency: The most queries to have the database run at once
+        timeout: The timeout, in seconds, for each query. Defaults to the http_client's timeout
+
+    Returns:
+        Tuple[bool, Graph, str, Graph]: The validation status, results graph, message and summary graph. Blank nodes
+            in the results are those of the database's query results, so may not be those of the data
+
+    Raises:
+        ValueError: If the shapes have constraints that can't be compiled into SPARQL queries, such as SPARQL-based
+            ones, or the ID of the SHACL validator is invalid
+        RuntimeError: If a query fails, or the IRI of the SHACL validator cannot be resolved locally or against the
+            Semantic Background's validators
+    """
+    sg = _load_shapes_graph(shacl)
+    if (None, RDF.type, SH.ConstraintComponent) in sg:
+        raise ValueError(
+            "The shapes have custom constraint components, which can't be validated remotely"
+        )
+
+    compiler = _ShapesCompiler(sg)
+    shapes = set()
+    for p in SHAPE_TARGETS:
+        shapes.update(sg.subjects(p, None))
+    for c in [RDFS.Class, OWL.Class]:
+        for shape in sg.subjects(RDF.type, c):
+            if (shape, RDF.type, SH.NodeShape) in sg or (
+                shape,
+                RDF.type,
+                SH.PropertyShape,
+            ) in sg:
+                shapes.add(shape)
+
+    violations = []
+    queries = []
+    for shape in sorted(shapes):
+        targets = compiler.targets(shape)
+        for violation in compiler.violations(shape, "?this"):
+            violations.append(violation)
+            queries.append(_query(violation, targets, graph_iris))
+
+    g = Graph()
+    for prefix, namespace in sg.namespaces():
+        g.bind(prefix, namespace)
+    report = BNode()
+    g.add((report, RDF.type, SH.ValidationReport))
+    texts = []
+    # as for kurra.shacl.validate(), results of Warning and Info severity don't stop the data conforming
+    conforms = True
+
+    with span(
+        "shacl.validate",
+        endpoint=sparql_endpoint,
+        shapes_triples=len(sg),
+        queries=len(queries),
+    ):
+        for i, r, e in query_many(
+            sparql_endpoint,
+            queries,
+            http_client=http_client,
+            return_format="original",
+            max_concurrency=max_concurrency,
+            timeout=timeout,
+        ):
+            if e is not None:
+                raise e
+
+            v = violations[i]
+            shape = v.shape
+            severity = compiler.severity(shape)
+            shacl_path = sg.value(shape, SH.path)
+            for row in Result.parse(io.StringIO(r), format="json"):
+                focus = row[v.focus[1:]]
+                value = row[v.value[1:]] if v.value is not None else None
+                path = row[v.path[1:]] if v.path is not None else shacl_path
+                messages = [str(m) for m in sg.objects(shape, SH.message)] or [
+                    v.message.replace("{focus}", _stringify(sg, focus))
+                    .replace("{value}", _stringify(sg, value))
+                    .replace("{path}", _stringify(sg, path))
+                ]
+
+                result = BNode()
+                g.add((report, SH.result, result))
+                g.add((result, RDF.type, SH.ValidationResult))
+                g.add((result, SH.focusNode, focus))
+                g.add((result, SH.resultSeverity, severity))
+                g.add((result, SH.sourceConstraintComponent, v.component))
+                g.add((result, SH.sourceShape, shape))
+                for m in messages:
+                    g.add((result, SH.resultMessage, Literal(m)))
+                if value is not None:
+                    g.add((result, SH.value, value))
+                if path is not None:
+                    g.add((result, SH.resultPath, path))
+                    if isinstance(path, BNode):
+                        g += sg.cbd(path)
+                if isinstance(shape, BNode):
+                    g += sg.cbd(shape)
+
+                conforms = conforms and severity != SH.Violation
+                texts.append(
+                    _result_text(
+                        sg, shape, v.component, severity, focus, value, path, messages
+                    )
+                )
+
+    g.add((report, SH.conforms, Literal(conforms)))
+    text = f"Validation Report\nConforms: {conforms}\n"
+    if texts:
+        text += f"Results ({len(texts)}):\n" + "".join(sorted(texts))
+
+    if hide_warnings:
+        g = _hide_warnings(g)
+
+    return conforms, g, text, _summarize_validation_results(g)
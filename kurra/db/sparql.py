@@ -1,28 +1,62 @@
 """SPARQL functions for remote SPARQL endpoints (not local files)"""
 
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager, nullcontext
+from itertools import batched
 from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator
 from typing import Literal as LiteralType
 
 import httpx
+from rdflib import Graph
+from rdflib.plugins.parsers.ntriples import W3CNTriplesParser
 
 from kurra import __version__
+from kurra.db.capabilities import accepts_compression, get_capabilities, remember
+from kurra.tracing import current_span, span, traced
 from kurra.utils import (
+    SPARQL_TSV_MEDIA_TYPE,
+    Deadline,
     add_namespaces_to_query_or_data,
+    compress,
     convert_sparql_json_to_python,
+    convert_sparql_tsv_to_python,
     is_construct_or_describe_query,
     is_select_or_ask_query,
+    is_select_query,
     is_update_query,
     make_sparql_dataframe,
+    make_sparql_tsv_dataframe,
     make_system_specific_sparql_endpoint,
+    parse_sparql_tsv,
+    send_request,
     sparql_statement_return_type,
+    split_lines,
     statement_type_for_query,
+    stream_request,
 )
 
 USER_AGENT_STRING = (
     f"kurra/{__version__} (https://pypi.org/project/kurra/; info@kurrawong.ai)"
 )
 
+# used for HTTP clients created internally, when the caller doesn't supply one
+DEFAULT_TIMEOUT = 25
 
+# CONSTRUCT and DESCRIBE results are asked for as N-Triples, which can be parsed line by line
+CONSTRUCT_ACCEPT = "application/n-triples, text/plain;q=0.9, text/turtle;q=0.8"
+N_TRIPLES_MEDIA_TYPES = ["application/n-triples", "text/plain"]
+
+# and streamed SELECT results as TSV, for the same reason
+SELECT_ACCEPT = f"{SPARQL_TSV_MEDIA_TYPE}, application/sparql-results+json;q=0.9"
+
+# the statuses of a POSTed query that mean the endpoint doesn't take POST, or a query POSTed as
+# application/sparql-query, rather than that the query failed
+POST_NOT_ALLOWED = (405, 415, 501)
+
+
+@traced("sparql.query")
 def query(
     sparql_endpoint: str,
     q: str | Path,
@@ -31,8 +65,41 @@ def query(
     return_format: LiteralType["original", "python", "dataframe"] = "original",
     return_bindings_only: bool = False,
     user_agent: str = USER_AGENT_STRING,
+    timeout: float | httpx.Timeout | None = None,
+    deadline: float | Deadline | None = None,
+    compression: LiteralType["gzip", "zstd"] | None = None,
+    compression_level: int | None = None,
+    results_format: LiteralType["json", "tsv"] = "json",
 ):
-    """Pose a SPARQL query to a SPARQL Endpoint"""
+    """Pose a SPARQL query to a SPARQL Endpoint
+
+    Queries are POSTed and, if the endpoint doesn't allow POST, responding 405 or 501, retried with GET. The method
+    that works is remembered per endpoint - see [`db.capabilities`][kurra.db.capabilities] - and used directly for
+    later queries. Other errors, and any once POST is known to work, are the query's or the server's, not the
+    method's, so are not retried with GET.
+
+    Args:
+        sparql_endpoint: the SPARQL Endpoint URL to query
+        q: the query or update, or a path to a file containing it
+        namespaces: prefixes to add to the query
+        http_client: an HTTP client to use. Created internally, with a timeout of DEFAULT_TIMEOUT, if not supplied
+        return_format: 'original' - the endpoint's response text, 'python' or 'dataframe'
+        return_bindings_only: for 'python' SELECT and ASK results, return only the bindings or boolean value
+        user_agent: the User-Agent header to send
+        timeout: the timeout, in seconds, for each HTTP request. Defaults to the http_client's timeout
+        deadline: the total number of seconds, or a Deadline, allowed for the query including any fallback request.
+            Cancelling the Deadline from another thread aborts the query
+        compression: 'gzip' or 'zstd' to compress the body of POSTed updates. If the endpoint rejects the compressed
+            update, it is resent uncompressed and updates to that endpoint are not compressed again
+        compression_level: the compression level to use. Defaults to the compression's own default
+        results_format: 'tsv' to ask for SELECT results as tab-separated values, which are smaller than JSON and
+            parsed line by line, when return_format is 'python' or 'dataframe'. JSON is used if the endpoint
+            doesn't return TSV
+
+    Raises:
+        TimeoutError: if the deadline passes before a response is read
+        RequestCancelledError: if the deadline is cancelled
+    """
     if sparql_endpoint is None:
         raise ValueError("You must supply a sparql_endpoint")
 
@@ -49,11 +116,19 @@ def query(
             f"return_format {return_format} must be either 'original', 'python' or 'dataframe'"
         )
 
+    if results_format not in ["json", "tsv"]:
+        raise ValueError(
+            f"results_format {results_format} must be either 'json' or 'tsv'"
+        )
+
     if namespaces is not None:
         q = add_namespaces_to_query_or_data(q, namespaces)
 
     if http_client is None:
-        http_client = httpx.Client()
+        http_client = httpx.Client(timeout=DEFAULT_TIMEOUT)
+
+    if not isinstance(deadline, Deadline):
+        deadline = Deadline(deadline)
 
     headers = {}
     headers["Content-Type"] = "application/sparql-update"
@@ -79,31 +154,99 @@ def query(
         headers = {"Content-Type": "application/sparql-query"}
 
     headers["Accept"] = sparql_statement_return_type(q, statement)
+    if (
+        results_format == "tsv"
+        and return_format in ["python", "dataframe"]
+        and is_select_query(q, statement)
+    ):
+        headers["Accept"] = f"{SPARQL_TSV_MEDIA_TYPE}, {headers['Accept']};q=0.9"
     headers["User-Agent"] = user_agent
 
     ssse = make_system_specific_sparql_endpoint(sparql_endpoint, q, statement)
 
-    r = http_client.post(
-        ssse,
-        headers=headers,
-        content=q,
-        follow_redirects=True,
-        timeout=25,
+    # use the method known to work with this endpoint, if any, rather than POSTing and falling back to GET
+    method_capability = (
+        "update_method" if is_update_query(q, statement) else "query_method"
     )
+    known_method = get_capabilities(sparql_endpoint).get(method_capability)
 
-    status_code = r.status_code
+    if known_method == "GET":
+        method = "GET"
+    else:
+        method = "POST"
+        known_compression = (
+            accepts_compression(sparql_endpoint, compression)
+            if compression is not None
+            else None
+        )
+        compressed = (
+            compression is not None
+            and known_compression is not False
+            and is_update_query(q, statement)
+        )
+        r = send_request(
+            http_client,
+            "POST",
+            ssse,
+            deadline,
+            timeout,
+            headers={**headers, "Content-Encoding": compression}
+            if compressed
+            else headers,
+            content=compress(q, compression, compression_level) if compressed else q,
+            follow_redirects=True,
+        )
+
+        if compressed:
+            if r.is_success:
+                remember(sparql_endpoint, compression={compression: True})
+            elif r.status_code in (400, 415) and not known_compression:
+                # the endpoint may not decode compressed bodies, so try once more without compression
+                r = send_request(
+                    http_client,
+                    "POST",
+                    ssse,
+                    deadline,
+                    timeout,
+                    headers=headers,
+                    content=q,
+                    follow_redirects=True,
+                )
+                if r.is_success:
+                    remember(sparql_endpoint, compression={compression: False})
 
-    # in case the endpoint doesn't allow POST
-    if 400 <= status_code < 600:
-        r = http_client.get(
+        # in case the endpoint doesn't allow POST. If POST is known to work, the error is the query's, so don't retry
+        if r.status_code in POST_NOT_ALLOWED and known_method != "POST":
+            method = "GET"
+
+    if method == "GET":
+        r = send_request(
+            http_client,
+            "GET",
             sparql_endpoint,
+            deadline,
+            timeout,
             headers=headers,
             params={"query": q},
             follow_redirects=True,
-            timeout=25,
         )
 
-        status_code = r.status_code
+    status_code = r.status_code
+
+    media_type = r.headers.get("Content-Type", "").split(";")[0].strip()
+    current_span().set(
+        endpoint=sparql_endpoint,
+        method=method,
+        fallback=method == "GET" and known_method != "GET",
+        status_code=status_code,
+        media_type=media_type,
+    )
+    if status_code in (200, 201, 204):
+        remember(
+            sparql_endpoint,
+            **{method_capability: method},
+            results_media_types=[media_type] if media_type else [],
+        )
 
     if status_code != 200 and status_code != 201 and status_code != 204:
         raise RuntimeError(f"ERROR {status_code}: {r.text}")
@@ -114,11 +257,421 @@ def query(
     if is_construct_or_describe_query(q, statement):
         return r.text
 
-    if return_format == "python":
-        return convert_sparql_json_to_python(r, return_bindings_only)
+    if return_format == "original":
+        return r.text
+
+    with span("sparql.decode", media_type=media_type, return_format=return_format):
+        if media_type == SPARQL_TSV_MEDIA_TYPE:
+            if return_format == "python":
+                return convert_sparql_tsv_to_python(r, return_bindings_only)
+            return make_sparql_tsv_dataframe(r)
+
+        if return_format == "python":
+            return convert_sparql_json_to_python(r, return_bindings_only)
 
-    elif return_format == "dataframe":
         return make_sparql_dataframe(r.json())
 
-    # original format - JSON
-    return r.text
+
+def query_many(
+    sparql_endpoint: str,
+    queries: Iterable[str],
+    namespaces: dict[str, str] | None = None,
+    http_client: httpx.Client | None = None,
+    return_format: LiteralType["original", "python", "dataframe"] = "python",
+    return_bindings_only: bool = False,
+    max_concurrency: int = 8,
+    ordered: bool = True,
+    timeout: float | httpx.Timeout | None = None,
+    results_format: LiteralType["json", "tsv"] = "json",
+) -> Iterator[tuple[int, object, Exception | None]]:
+    """Poses many queries to one SPARQL Endpoint, with up to max_concurrency of them in flight at a time.
+
+    Queries are taken from the iterable only as there is room for them, so a generator of any length may be given.
+    A failed query does not stop the others: its error is yielded in place of its result.
+
+    Args:
+        sparql_endpoint: the SPARQL Endpoint URL to query
+        queries: the queries to pose
+        namespaces: prefixes to add to each query
+        http_client: an HTTP client to use, which should allow at least max_concurrency connections. Created
+            internally, with max_concurrency connections and a timeout of DEFAULT_TIMEOUT, if not supplied
+        return_format: as per [`query()`][kurra.db.sparql.query]
+        return_bindings_only: as per [`query()`][kurra.db.sparql.query]
+        max_concurrency: the maximum number of queries in flight at once
+        ordered: yield results in the order of the queries, rather than as they complete
+        timeout: the timeout, in seconds, for each HTTP request. Defaults to the http_client's timeout
+        results_format: as per [`query()`][kurra.db.sparql.query]
+
+    Returns:
+        Iterator[tuple[int, object, Exception | None]]: (position of the query, its result or None, the error it
+            raised or None) per query
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+
+    close_http_client = False
+    if http_client is None:
+        http_client = httpx.Client(
+            timeout=DEFAULT_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency,
+            ),
+        )
+        close_http_client = True
+
+    def _query(i, q):
+        try:
+            r = query(
+                sparql_endpoint,
+                q,
+                namespaces,
+                http_client,
+                return_format,
+                return_bindings_only,
+                timeout=timeout,
+                results_format=results_format,
+            )
+            return i, r, None
+        except Exception as e:
+            return i, None, e
+
+    queries = iter(enumerate(queries))
+    executor = ThreadPoolExecutor(max_workers=max_concurrency)
+    try:
+        pending = deque()
+        while True:
+            # top up the window of queries in flight
+            for i, q in queries:
+                pending.append(executor.submit(_query, i, q))
+                if len(pending) >= max_concurrency:
+                    break
+
+            if not pending:
+                return
+
+            if ordered:
+                yield pending.popleft().result()
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+                    yield future.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        if close_http_client:
+            http_client.close()
+
+
+class _TripleSink:
+    def __init__(self):
+        self.triples = []
+
+    def triple(self, s, p, o):
+        self.triples.append((s, p, o))
+
+
+@contextmanager
+def _stream_query(
+    sparql_endpoint: str,
+    q: str,
+    http_client: httpx.Client,
+    user_agent: str,
+    timeout: float | httpx.Timeout | None,
+    deadline: Deadline,
+    accept: str = CONSTRUCT_ACCEPT,
+):
+    """Yields the unread response to a SELECT, CONSTRUCT or DESCRIBE query, falling back from POST to GET as query()
+    does"""
+    statement = statement_type_for_query(q)
+    if is_select_query(q, statement):
+        if "sparql-results" not in accept and SPARQL_TSV_MEDIA_TYPE not in accept:
+            raise ValueError("SELECT results can't be streamed as RDF")
+    elif not is_construct_or_describe_query(q, statement):
+        raise ValueError("Only SELECT, CONSTRUCT and DESCRIBE queries can be streamed")
+
+    headers = {
+        "Content-Type": "application/sparql-query",
+        "Accept": accept,
+        "User-Agent": user_agent,
+    }
+
+    known_method = get_capabilities(sparql_endpoint).get("query_method")
+    methods = [known_method] if known_method is not None else ["POST", "GET"]
+
+    for i, method in enumerate(methods):
+        if method == "POST":
+            url = make_system_specific_sparql_endpoint(sparql_endpoint, q, statement)
+            request = {"content": q}
+        else:
+            url = sparql_endpoint
+            request = {"params": {"query": q}}
+
+        with stream_request(
+            http_client,
+            method,
+            url,
+            deadline,
+            timeout,
+            headers=headers,
+            follow_redirects=True,
+            **request,
+        ) as r:
+            if r.status_code in POST_NOT_ALLOWED and i < len(methods) - 1:
+                continue
+
+            if r.status_code != 200:
+                r.read()
+                raise RuntimeError(f"ERROR {r.status_code}: {r.text}")
+
+            media_type = r.headers.get("Content-Type", "").split(";")[0].strip()
+            remember(
+                sparql_endpoint,
+                query_method=method,
+                results_media_types=[media_type] if media_type else [],
+            )
+            yield r
+            return
+
+
+@contextmanager
+def select_rows(
+    sparql_endpoint: str,
+    q: str | Path,
+    namespaces: dict[str, str] | None = None,
+    http_client: httpx.Client | None = None,
+    user_agent: str = USER_AGENT_STRING,
+    timeout: float | httpx.Timeout | None = None,
+    deadline: float | Deadline | None = None,
+) -> Iterator[tuple[list[str], Iterator[dict]]]:
+    """Yields the variables of a SELECT query's result and an iterator of its rows, read as they are received from a
+    SPARQL Endpoint.
+
+    The result is asked for as TSV and parsed line by line, so memory use does not grow with the size of the result.
+    If the endpoint returns JSON, the whole result is read and parsed before rows are yielded:
+
+    ```python
+    with select_rows("http://localhost:3030/ds", "SELECT * WHERE { ?s ?p ?o }") as (variables, rows):
+        for row in rows:
+            ...
+    ```
+
+    See [`construct_triples()`][kurra.db.sparql.construct_triples] for the arguments.
+
+    Returns:
+        tuple[list[str], Iterator[dict]]: the result variables and the rows, as per
+            [`convert_sparql_json_to_python()`][kurra.utils.convert_sparql_json_to_python]. The rows must be read
+            within the ``with`` block
+    """
+    if isinstance(q, Path) or (len(q) < 260 and Path(q).is_file()):
+        q = Path(q).read_text()
+
+    if namespaces is not None:
+        q = add_namespaces_to_query_or_data(q, namespaces)
+
+    close_http_client = False
+    if http_client is None:
+        http_client = httpx.Client(timeout=DEFAULT_TIMEOUT)
+        close_http_client = True
+
+    if not isinstance(deadline, Deadline):
+        deadline = Deadline(deadline)
+
+    try:
+        with (
+            span("sparql.select", endpoint=sparql_endpoint) as s,
+            _stream_query(
+                sparql_endpoint,
+                q,
+                http_client,
+                user_agent,
+                timeout,
+                deadline,
+                SELECT_ACCEPT,
+            ) as r,
+        ):
+            media_type = r.headers.get("Content-Type", "").split(";")[0].strip()
+            s.set(media_type=media_type)
+            if media_type == SPARQL_TSV_MEDIA_TYPE:
+                yield parse_sparql_tsv(split_lines(r.iter_text()))
+            else:
+                r.read()
+                result = convert_sparql_json_to_python(r)
+                yield result["head"]["vars"], iter(result["results"]["bindings"])
+    finally:
+        if close_http_client:
+            http_client.close()
+
+
+def construct_triples(
+    sparql_endpoint: str,
+    q: str | Path,
+    namespaces: dict[str, str] | None = None,
+    http_client: httpx.Client | None = None,
+    user_agent: str = USER_AGENT_STRING,
+    timeout: float | httpx.Timeout | None = None,
+    deadline: float | Deadline | None = None,
+) -> Iterator[tuple]:
+    """Yields the triples of a CONSTRUCT or DESCRIBE query's result as they are received from a SPARQL Endpoint.
+
+    The result is asked for as N-Triples and parsed line by line, so memory use does not grow with the size of the
+    result. If the endpoint returns another RDF format, the whole result is read and parsed before triples are yielded.
+
+    Args:
+        sparql_endpoint: the SPARQL Endpoint URL to query
+        q: the CONSTRUCT or DESCRIBE query, or a path to a file containing it
+        namespaces: prefixes to add to the query
+        http_client: an HTTP client to use. Created internally, with a timeout of DEFAULT_TIMEOUT, if not supplied
+        user_agent: the User-Agent header to send
+        timeout: the timeout, in seconds, for each HTTP request. Defaults to the http_client's timeout
+        deadline: the total number of seconds, or a Deadline, allowed for the whole result to be received
+
+    Returns:
+        Iterator[tuple]: (subject, predicate, object) triples of RDFLib terms
+    """
+    if isinstance(q, Path) or (len(q) < 260 and Path(q).is_file()):
+        q = Path(q).read_text()
+
+    if namespaces is not None:
+        q = add_namespaces_to_query_or_data(q, namespaces)
+
+    close_http_client = False
+    if http_client is None:
+        http_client = httpx.Client(timeout=DEFAULT_TIMEOUT)
+        close_http_client = True
+
+    if not isinstance(deadline, Deadline):
+        deadline = Deadline(deadline)
+
+    try:
+        with (
+            span("sparql.construct", endpoint=sparql_endpoint) as s,
+            _stream_query(
+                sparql_endpoint, q, http_client, user_agent, timeout, deadline
+            ) as r,
+        ):
+            media_type = r.headers.get("Content-Type", "").split(";")[0].strip()
+            s.set(media_type=media_type, triples=0)
+            if media_type in N_TRIPLES_MEDIA_TYPES:
+                sink = _TripleSink()
+                parser = W3CNTriplesParser(sink, bnode_context={})
+                for line in split_lines(r.iter_text()):
+                    parser.line = line
+                    parser.parseline()
+                    s.attributes["triples"] += len(sink.triples)
+                    yield from sink.triples
+                    sink.triples.clear()
+            else:
+                r.read()
+                g = Graph().parse(data=r.text, format=media_type or "turtle")
+                s.set(triples=len(g))
+                yield from g
+    finally:
+        if close_http_client:
+            http_client.close()
+
+
+def construct(
+    sparql_endpoint: str,
+    q: str | Path,
+    destination: Graph | Path | None = None,
+    namespaces: dict[str, str] | None = None,
+    http_client: httpx.Client | None = None,
+    user_agent: str = USER_AGENT_STRING,
+    timeout: float | httpx.Timeout | None = None,
+    deadline: float | Deadline | None = None,
+    batch_size: int = 10_000,
+) -> Graph | Path:
+    """Stores the result of a CONSTRUCT or DESCRIBE query as it is received from a SPARQL Endpoint.
+
+    See [`construct_triples()`][kurra.db.sparql.construct_triples] for the other arguments.
+
+    Args:
+        destination: a Graph to add the triples to, a path to write them to as N-Triples or None to add them to a new
+            Graph. Give a Graph with an on-disk store, such as BerkeleyDB, or a path to keep large results out of memory
+        batch_size: the number of triples added, or written, at a time
+
+    Returns:
+        Graph | Path: the destination
+    """
+    triples = construct_triples(
+        sparql_endpoint, q, namespaces, http_client, user_agent, timeout, deadline
+    )
+
+    if destination is None:
+        destination = Graph()
+
+    if isinstance(destination, Graph):
+        for batch in batched(triples, batch_size):
+            destination.addN((s, p, o, destination) for s, p, o in batch)
+        return destination
+
+    destination = Path(destination)
+    with destination.open("w") as f:
+        for batch in batched(triples, batch_size):
+            g = Graph()
+            for triple in batch:
+                g.add(triple)
+            f.write(g.serialize(format="nt"))
+
+    return destination
+
+
+def construct_raw(
+    sparql_endpoint: str,
+    q: str | Path,
+    destination: BinaryIO | Path,
+    media_type: str = "text/turtle",
+    namespaces: dict[str, str] | None = None,
+    http_client: httpx.Client | None = None,
+    user_agent: str = USER_AGENT_STRING,
+    timeout: float | httpx.Timeout | None = None,
+    deadline: float | Deadline | None = None,
+) -> str:
+    """Writes the result of a CONSTRUCT or DESCRIBE query to destination as the SPARQL Endpoint sends it, without
+    parsing or re-serializing it.
+
+    See [`construct_triples()`][kurra.db.sparql.construct_triples] for the other arguments.
+
+    Args:
+        destination: a binary file object, such as ``sys.stdout.buffer``, or a path to write the result to
+        media_type: the RDF media type to ask the endpoint for
+
+    Returns:
+        str: the media type the endpoint sent, which may not be the one asked for if the endpoint can't produce it
+    """
+    if isinstance(q, Path) or (len(q) < 260 and Path(q).is_file()):
+        q = Path(q).read_text()
+
+    if namespaces is not None:
+        q = add_namespaces_to_query_or_data(q, namespaces)
+
+    close_http_client = False
+    if http_client is None:
+        http_client = httpx.Client(timeout=DEFAULT_TIMEOUT)
+        close_http_client = True
+
+    if not isinstance(deadline, Deadline):
+        deadline = Deadline(deadline)
+
+    try:
+        with (
+            _stream_query(
+                sparql_endpoint,
+                q,
+                http_client,
+                user_agent,
+                timeout,
+                deadline,
+                media_type,
+            ) as r,
+            open(destination, "wb")
+            if isinstance(destination, Path)
+            else nullcontext(destination) as f,
+        ):
+            for chunk in r.iter_bytes():
+                f.write(chunk)
+            return r.headers.get("Content-Type", "").split(";")[0].strip()
+    finally:
+        if close_http_client:
+            http_client.close()
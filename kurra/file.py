@@ -7,12 +7,14 @@ from typing import Optional, Tuple, Union
 from rdflib import Dataset, Graph, URIRef
 from rdflib.namespace import DCTERMS, OWL, RDF, RDFS, SKOS
 
+from kurra.tracing import span
 from kurra.utils import (
     DEFAULT_GRAPH_IRI,
     RDF_FILE_SUFFIXES,
     RDF_GRAPH_AWARE_FORMATS,
     RDF_SUFFIX_MAP,
     _parse_dataset,
+    _parse_graph,
     _serialize_dataset,
     load_graph,
 )
@@ -61,14 +63,15 @@ def merge(
                 for subject, predicate, obj, _ in parsed.quads():
                     merged.add((subject, predicate, obj))
         else:
-            parsed = Graph().parse(source=path, format=input_format)
+            parsed = _parse_graph(path, format=input_format)
             if output_is_dataset:
                 for triple in parsed:
                     merged.add((*triple, DEFAULT_GRAPH_IRI))
             else:
                 merged += parsed
 
-    serialized = merged.serialize(format=output_format)
+    with span("rdf.serialize", format=output_format, triples=len(merged)):
+        serialized = merged.serialize(format=output_format)
 
     if destination is None:
         print(serialized, end="" if serialized.endswith("\n") else "\n")
@@ -120,13 +123,14 @@ def do_format(
         graph = (
             load_graph(content_no_comments)
             if input_format is None
-            else Graph().parse(data=content_no_comments, format=input_format)
+            else _parse_graph(data=content_no_comments, format=input_format)
         )
         if comments != []:
             header = "\n".join(comments) + "\n"
         else:
             header = ""
-        new_content = header + graph.serialize(format=output_format, canon=True)
+        with span("rdf.serialize", format=output_format, triples=len(graph)):
+            new_content = header + graph.serialize(format=output_format, canon=True)
     else:
         clean_content = ""
         for line in content.split("\n"):
@@ -137,7 +141,7 @@ def do_format(
         if source_format in RDF_GRAPH_AWARE_FORMATS:
             graph = _parse_dataset(data=clean_content, format=source_format)
         else:
-            graph = Graph().parse(data=clean_content, format=source_format)
+            graph = _parse_graph(data=clean_content, format=source_format)
 
         output_is_dataset = output_format in RDF_GRAPH_AWARE_FORMATS and (
             output_format != "json-ld" or source_format in RDF_GRAPH_AWARE_FORMATS
@@ -152,7 +156,8 @@ def do_format(
             for subject, predicate, obj, _ in graph.quads():
                 flattened.add((subject, predicate, obj))
             graph = flattened
-        new_content = graph.serialize(format=output_format, canon=True)
+        with span("rdf.serialize", format=output_format, triples=len(graph)):
+            new_content = graph.serialize(format=output_format, canon=True)
 
     changed = content != new_content
     return new_content, changed
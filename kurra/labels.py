@@ -7,7 +7,7 @@ from typing import Literal
 import httpx
 from rdflib import DCTERMS, RDFS, SDO, SKOS, BNode, Graph, URIRef
 
-from kurra.sparql import query
+from kurra.sparql import VALUES_PLACEHOLDER, query_with_values
 from kurra.utils import load_graph
 
 
@@ -85,15 +85,12 @@ def get_missing_labels(
     return_type: Literal["graph", "dict"] = "graph",
     http_client: httpx.Client = None,
 ) -> Graph | dict[URIRef, str]:
-    """Gets labels for given IRIs from a given context"""
-    values = ""
-    for i in iris:
-        values += f"\t<{i}>\n"
-    values = "VALUES ?iri {\n" + values + "}\n\n"
+    """Gets labels for given IRIs from a given context
 
+    The IRIs are looked up in batches, so that any number of them may be given."""
     where_clause = f"""
         WHERE {{
-            {values}
+            {VALUES_PLACEHOLDER}
             
             ?iri schema:name ?label .
         }} 
@@ -108,7 +105,14 @@ def get_missing_labels(
             }}
             {where_clause} 
             """
-        return query(context, q, http_client=http_client, return_format="python")
+        return query_with_values(
+            context,
+            q,
+            [URIRef(i) for i in iris],
+            ["iri"],
+            http_client=http_client,
+            return_format="python",
+        )
     else:
         q = f"""
             PREFIX schema: <https://schema.org/>
@@ -117,9 +121,11 @@ def get_missing_labels(
             {where_clause}
             """
         d = {}
-        for r in query(
+        for r in query_with_values(
             context,
             q,
+            [URIRef(i) for i in iris],
+            ["iri"],
             http_client=http_client,
             return_format="python",
             return_bindings_only=True,
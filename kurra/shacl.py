@@ -1,23 +1,99 @@
-"""SHACL functions."""
-
+"""SHACL functions.
+
+SHACL validators from the KurrawongAI Semantic Background are cached locally, by
+[`sync_validators()`][kurra.shacl.sync_validators], in ``~/.kurra/validators/``: an ``index.json`` of each validator's
+IRI, ID and name and one N-Triples file per validator, so that validators can be listed without loading any of them
+and only the one used for a validation is loaded.
+
+Shapes are compiled by pyshacl into the structures it validates with before each validation. Shapes given as a file,
+directory or cached validator are compiled once: the compiled shapes are cached, in memory and pickled in
+``~/.kurra/shapes/``, keyed by a hash of the shapes' content and the versions of Python, pyshacl and rdflib, so
+validating again with the same shapes, in the same or a later process, skips parsing and compiling them. A cached copy
+that can't be loaded is compiled again. Shapes given as a graph are compiled for each validation, as hashing a graph
+costs about as much as compiling it.
+
+The results of incremental validations are cached in ``~/.kurra/validations/``, for each set of data files and shapes,
+with the content hash of each file and the IRIs it describes and links to."""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import pickle
+import re
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from pickle import dump, load
+from pickle import load
 from random import choice
 
 import httpx
-from pyshacl import validate as v
+import pyshacl
+import rdflib
+from pyshacl import ShapesGraph, Validator
 from rdflib import BNode, Dataset, Graph, Literal, Namespace, URIRef
-from rdflib.namespace import RDF, SDO, SH
+from rdflib.collection import Collection
+from rdflib.extras.shacl import parse_shacl_path
+from rdflib.namespace import OWL, RDF, RDFS, SDO, SH
+from rdflib.paths import AlternativePath, InvPath, MulPath, SequencePath
 from srl.engine import RuleEngine
 from srl.parser import SRLParser
 
 import kurra.sparql
-from kurra.db.gsp import get as gsp_get
 from kurra.sparql import query
-from kurra.utils import load_graph
+from kurra.tracing import span
+from kurra.utils import (
+    GspType,
+    load_graph,
+    make_system_specific_sparql_endpoint,
+    send_request,
+)
+
+try:
+    from pyshacl.graph_abstraction import DataGraph
+except ImportError:  # pyshacl < 0.40 validates rdflib graphs directly
+    DataGraph = None
 
 EX = Namespace("http://example.com/")
 
+VALIDATORS_CACHE = Path().home() / ".kurra" / "validators"
+SHAPES_CACHE = Path().home() / ".kurra" / "shapes"
+VALIDATIONS_CACHE = Path().home() / ".kurra" / "validations"
+
+# the fewest focus nodes of a shape validated at a time when the results reported are capped
+FOCUS_BATCH_MIN = 100
+
+# the most compiled shapes kept in memory, least recently used first
+COMPILED_SHAPES_MAX = 8
+_compiled_shapes: OrderedDict[str, ShapesGraph] = OrderedDict()
+_compiled_shapes_lock = threading.Lock()
+
+# the data and shapes graphs, and the shapes graph without targets, given to each process validating shards of a data
+# graph
+_shard_data: Graph | None = None
+_shard_shapes: Graph | None = None
+_shard_untargeted_shapes: Graph | None = None
+
+# the shapes each process validating files on their own validates with
+_file_shapes: ShapesGraph | None = None
+_file_max_results: int | None = None
+_file_fail_fast = False
+_file_predicates: set | None = None
+
+# the first line of the description of a result in the text of a pyshacl validation report
+RESULT_TEXT_START = re.compile(
+    r"(Constraint Violation|Validation Result) in \S+ \(.*\):$"
+)
+
+SHAPE_TARGETS = [
+    SH.targetClass,
+    SH.targetNode,
+    SH.targetSubjectsOf,
+    SH.targetObjectsOf,
+]
+
 
 def _summarize_validation_results(validation_report: Graph) -> Graph:
     """Create a compact summary of a pySHACL validation results graph."""
@@ -78,47 +154,207 @@ def _load_pickle(path: Path):
         return load(pickle_file)
 
 
-def validate(
-    data: Path | Graph | list[Path] | list[Graph],
-    shacl: Graph | Path | str | int,
-    hide_warnings: bool = False,
-) -> tuple[bool, Graph, str, Graph]:
-    """Validates a data graph using a shapes graph.
+def _read_validator_index() -> dict[str, dict]:
+    """The validator cache's index of validator IRI to ID, name and file, migrating an older pickled cache if needed"""
+    index_file = VALIDATORS_CACHE / "index.json"
+    if not index_file.is_file():
+        _migrate_pickled_validators()
+    if not index_file.is_file():
+        return {}
 
-    Args:
-        data: The path to an RDF data file, a graph, a list of Paths or a list of Graphs to validate. List items will be merged
-        shacl: The SHACL shapes to validate with
+    try:
+        return json.loads(index_file.read_text())["validators"]
+    except (ValueError, KeyError):
+        return {}  # a corrupt index is rebuilt by the next sync
+
+
+def _write_validator_index(index: dict[str, dict]) -> None:
+    """Writes the index, numbering validators from 1 in IRI order"""
+    for i, iri in enumerate(sorted(index)):
+        index[iri]["id"] = i + 1
+    _write_atomic(
+        VALIDATORS_CACHE / "index.json",
+        json.dumps(
+            {"validators": dict(sorted(index.items()))}, indent=2, ensure_ascii=False
+        ).encode(),
+    )
 
-    Returns:
-        Tuple[bool, Graph, str, Graph]: The validation status, results graph, message and summary graph
 
-    Raises:
-        ValueError: If the ID of the SHACL validator is invalid
-        RuntimeError: If the IRI of the SHACL validator cannot be resolved locally or against the Semantic Background's validators
-    """
-    kurra_cache = Path().home() / ".kurra"
-    validators_cache = kurra_cache / "validators.pkl"
+def _write_atomic(path: Path, content: bytes) -> None:
+    # write then rename so that concurrent readers never see a partial file
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_bytes(content)
+    os.replace(tmp, path)
 
-    data_graph = None
+
+def _store_validator(g: Graph, index: dict[str, dict], **metadata) -> bool:
+    """Writes a validator's graph to the cache and records it in index, which is not written.
+
+    Keyword arguments, such as the ETag the graph was served with, are recorded with it. The graph's file is only
+    rewritten if its content has changed. Returns True if it was."""
+    iri = str(g.identifier)
+    content = g.serialize(format="nt", encoding="utf-8")
+    file_name = f"{hashlib.sha1(iri.encode()).hexdigest()}.nt"
+    sha256 = hashlib.sha256(content).hexdigest()
+    entry = index.get(iri, {})
+    changed = (
+        entry.get("sha256") != sha256 or not (VALIDATORS_CACHE / file_name).is_file()
+    )
+    if changed:
+        _write_atomic(VALIDATORS_CACHE / file_name, content)
+    index[iri] = {
+        "id": entry.get("id"),
+        "name": str(g.value(URIRef(iri), SDO.name)),
+        "file": file_name,
+        "sha256": sha256,
+        **{k: v for k, v in metadata.items() if v is not None},
+    }
+    return changed
+
+
+def _load_validator(iri: str, index: dict[str, dict] | None = None) -> Graph | None:
+    """Loads a cached validator's graph, or returns None if it isn't cached"""
+    entry = (index if index is not None else _read_validator_index()).get(str(iri))
+    if entry is None:
+        return None
+
+    g = Graph(identifier=URIRef(iri))
+    with span("rdf.parse", source=entry["file"]):
+        g.parse(VALIDATORS_CACHE / entry["file"], format="nt")
+    return g
+
+
+def _load_validator_by_id(id: int | str) -> Graph | None:
+    index = _read_validator_index()
+    for iri, entry in index.items():
+        if entry["id"] == int(id):
+            return _load_validator(iri, index)
+    return None
+
+
+def _migrate_pickled_validators() -> None:
+    """Moves validators from the pickled Dataset cache of earlier versions of kurra into the validator cache"""
+    validators_pickle = VALIDATORS_CACHE.parent / "validators.pkl"
+    if not validators_pickle.is_file():
+        return
+
+    try:
+        d: Dataset = _load_pickle(validators_pickle)
+    except Exception:
+        return  # the cache is rebuilt by the next sync
+
+    index = {}
+    for g in d.graphs():
+        if str(g.identifier) != "urn:x-rdflib:default" and len(g) > 0:
+            _store_validator(g, index)
+    _write_validator_index(index)
+
+
+def _hash_graph(g: Graph) -> str:
+    return hashlib.sha256(
+        "\n".join(sorted(g.serialize(format="nt").splitlines())).encode()
+    ).hexdigest()
+
+
+def _shapes_hash(shacl: Graph | Path | str | int) -> str | None:
+    """A hash of the content of the SHACL shapes, or None if they must be loaded to know it"""
+    if isinstance(shacl, int) or (
+        isinstance(shacl, str) and (shacl.isnumeric() or shacl.startswith("http"))
+    ):
+        index = _read_validator_index()
+        if isinstance(shacl, int) or shacl.isnumeric():
+            entry = next((e for e in index.values() if e["id"] == int(shacl)), None)
+        else:
+            entry = index.get(shacl)
+        return entry.get("sha256") if entry is not None else None
+
+    if isinstance(shacl, Graph):
+        return None
+
+    path = Path(shacl)
+    if path.is_file():
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    if path.is_dir():
+        h = hashlib.sha256()
+        for f in sorted(path.glob("**/*")):
+            if f.is_file():
+                h.update(str(f.relative_to(path)).encode())
+                h.update(f.read_bytes())
+        return h.hexdigest()
+
+    return None
+
+
+def _compile_shapes(shacl: Graph | Path | str | int) -> ShapesGraph:
+    """pyshacl's compiled form of the SHACL shapes, from the compiled shapes cache if they are in it"""
+    content_hash = _shapes_hash(shacl)
+    if content_hash is not None:
+        key = _compiled_shapes_key(content_hash)
+        with _compiled_shapes_lock:
+            if key in _compiled_shapes:
+                _compiled_shapes.move_to_end(key)
+                return _compiled_shapes[key]
+
+        cache_file = SHAPES_CACHE / f"{key}.pkl"
+        if cache_file.is_file():
+            try:
+                shapes = _load_pickle(cache_file)
+            except Exception:
+                shapes = None  # an unreadable cached copy is replaced below
+            if isinstance(shapes, pyshacl.ShapesGraph):
+                _remember_compiled_shapes(key, shapes)
+                return shapes
+
+    shapes_graph = _load_shapes_graph(shacl)
+    if content_hash is None and not isinstance(shacl, Graph):
+        # a validator not cached before is cached by loading it
+        content_hash = _shapes_hash(shacl)
+
+    with span("shacl.compile", shapes_triples=len(shapes_graph)):
+        # pyshacl adds triples to the shapes graph it is given, so it's given a copy
+        shapes = ShapesGraph(shapes_graph + Graph())
+        shapes.shapes  # harvesting the shapes compiles them
+
+    if content_hash is not None:
+        key = _compiled_shapes_key(content_hash)
+        _remember_compiled_shapes(key, shapes)
+        try:
+            _write_atomic(SHAPES_CACHE / f"{key}.pkl", pickle.dumps(shapes))
+        except (OSError, pickle.PicklingError, TypeError, AttributeError):
+            pass  # the shapes are still cached in memory
+    return shapes
+
+
+def _compiled_shapes_key(content_hash: str) -> str:
+    # compiled shapes are pickled pyshacl and rdflib objects, so they, and the incremental validation results of them,
+    # are only reused by the same versions of Python, pyshacl and rdflib
+    return hashlib.sha256(
+        f"{content_hash}/{sys.version_info[:2]}/{pyshacl.__version__}/{rdflib.__version__}".encode()
+    ).hexdigest()
+
+
+def _remember_compiled_shapes(key: str, shapes: ShapesGraph) -> None:
+    with _compiled_shapes_lock:
+        _compiled_shapes[key] = shapes
+        _compiled_shapes.move_to_end(key)
+        while len(_compiled_shapes) > COMPILED_SHAPES_MAX:
+            _compiled_shapes.popitem(last=False)
+
+
+def _load_shapes_graph(shacl: Graph | Path | str | int) -> Graph:
+    """Resolves SHACL shapes given as a graph, file, directory, URL or validator IRI or ID to a graph"""
     shapes_graph = None
 
     def _get_shapes_from_iri(iri):
-        local_validators = list_local_validators()
-        for local_validator in local_validators.keys():
-            if iri == local_validator:
-                cv = _load_pickle(validators_cache)
-                return cv.graph(URIRef(iri))
+        return _load_validator(iri)
 
     def _get_shapes_from_id(id):
         id = int(id)
-        local_validators = list_local_validators()
-        max = len(local_validators.keys())
+        max = len(_read_validator_index())
         if id < 0 or id > max:
             raise ValueError(f"shacl graph id value out of range. Must be <= {max}")
-        for k, x in local_validators.items():
-            if int(x["id"]) == id:
-                cv = _load_pickle(validators_cache)
-                return cv.graph(URIRef(k))
+        return _load_validator_by_id(id)
 
     # Try and resolve a validator IRI or string ID to a graph
     if isinstance(shacl, str):
@@ -147,123 +383,1074 @@ def validate(
     if shapes_graph is None:
         raise RuntimeError(f"Not able to load shapes graph: {shacl}")
 
-    if isinstance(data, (Path, Graph)):
-        data_graph = load_graph(data)
-    elif isinstance(data, list):
+    return shapes_graph
+
+
+def _run_pyshacl(
+    data_graph: Graph,
+    shapes: ShapesGraph,
+    max_results: int | None = None,
+    fail_fast: bool = False,
+) -> tuple[bool, Graph, str]:
+    """Validates data_graph with compiled shapes, as ``pyshacl.validate(data_graph, shacl_graph=...,
+    allow_warnings=True, abort_on_first=fail_fast)`` does with uncompiled ones, reporting at most max_results
+    results"""
+    validator = Validator(
+        DataGraph.from_rdflib(data_graph) if DataGraph is not None else data_graph,
+        shacl_graph=Graph(),
+        options={"allow_warnings": True, "abort_on_first": fail_fast},
+    )
+    validator.shacl_graph = shapes
+    if max_results is None:
+        return validator.run()
+
+    # run() validates with every shape before reporting, so the shapes are validated with one by one here instead,
+    # each with its focus nodes in batches, to stop once there are enough results to report and the data is known not
+    # to conform. Each focus node that doesn't conform has at least one result, so a batch is no bigger than the
+    # results still to be reported, unless that's fewer than FOCUS_BATCH_MIN
+    executor = validator.make_executor()
+    data = validator.data_graph
+    conforms = True
+    reports = []
+    for shape in shapes.shapes:
+        if executor.sparql_mode:
+            focus = list(shape.focus_nodes_sparql(data))
+        else:
+            focus = list(shape.focus_nodes(data))
+        while focus and (conforms or not fail_fast and len(reports) < max_results):
+            size = max(max_results - len(reports), FOCUS_BATCH_MIN)
+            batch, focus = focus[:size], focus[size:]
+            shape_conforms, shape_reports = shape.validate(executor, data, focus=batch)
+            conforms = conforms and shape_conforms
+            reports.extend(shape_reports)
+        if not conforms and (fail_fast or len(reports) >= max_results):
+            break
+    g, text = validator.create_validation_report(
+        shapes, conforms, reports[:max_results]
+    )
+    return conforms, g, text
+
+
+def _nested_shapes(sg: Graph, shape) -> list:
+    """The shapes a shape's value nodes are also validated against"""
+    nested = [
+        o
+        for p in [SH.property, SH.node, SH.qualifiedValueShape, SH["not"]]
+        for o in sg.objects(shape, p)
+    ]
+    for p in [SH["and"], SH["or"], SH.xone]:
+        for shapes_list in sg.objects(shape, p):
+            nested.extend(Collection(sg, shapes_list))
+    return nested
+
+
+def _needs_whole_graph(sg: Graph, shape) -> bool:
+    """Whether validating a shape may need any of the data graph, not just what its paths reach from its focus nodes,
+    as SPARQL-based constraints can"""
+    seen = set()
+    todo = [shape]
+    while todo:
+        s = todo.pop()
+        if s in seen:
+            continue
+        seen.add(s)
+        if (s, SH.sparql, None) in sg:
+            return True
+        todo.extend(_nested_shapes(sg, s))
+    return False
+
+
+def _follow_path(g: Graph, nodes: set, path, out: Graph, inverse: bool = False) -> set:
+    """The value nodes reached from nodes along a SHACL path, adding the triples traversed to out"""
+    if isinstance(path, URIRef):
+        values = set()
+        for n in nodes:
+            if inverse:
+                for s in g.subjects(path, n):
+                    out.add((s, path, n))
+                    values.add(s)
+            elif not isinstance(n, Literal):
+                for o in g.objects(n, path):
+                    out.add((n, path, o))
+                    values.add(o)
+        return values
+    if isinstance(path, InvPath):
+        return _follow_path(g, nodes, path.arg, out, not inverse)
+    if isinstance(path, SequencePath):
+        for step in reversed(path.args) if inverse else path.args:
+            nodes = _follow_path(g, nodes, step, out, inverse)
+        return nodes
+    if isinstance(path, AlternativePath):
+        return set().union(
+            *(_follow_path(g, nodes, a, out, inverse) for a in path.args)
+        )
+    if isinstance(path, MulPath):
+        values = set(nodes) if path.zero else set()
+        frontier = set(nodes)
+        while frontier:
+            step = _follow_path(g, frontier, path.path, out, inverse)
+            frontier = step - values
+            values |= step
+            if not path.more:
+                break
+        return values
+    raise ValueError(f"Unsupported SHACL path {path}")
+
+
+def _add_node_triples(g: Graph, node, out: set, seen: set) -> None:
+    """Adds the triples about a node, and those about blank nodes it refers to, to out"""
+    todo = [node]
+    while todo:
+        n = todo.pop()
+        if n in seen or isinstance(n, Literal):
+            continue
+        seen.add(n)
+        for triple in g.triples((n, None, None)):
+            out.add(triple)
+            if isinstance(triple[2], BNode):
+                todo.append(triple[2])
+
+
+def _shard_graph(data_graph: Graph, sg: Graph, focus: dict) -> Graph:
+    """The triples needed to validate the given focus nodes, each against its shapes: those about the focus nodes and
+    the nodes the shapes' paths reach from them, the types of every value node and the data's class hierarchy"""
+    triples = set(data_graph.triples((None, RDFS.subClassOf, None)))
+    shapes = {}
+    described = set()
+    typed = set()
+    seen = set()
+    todo = [
+        (node, shape) for node, node_shapes in focus.items() for shape in node_shapes
+    ]
+    while todo:
+        node, shape = todo.pop()
+        if (node, shape) in seen or isinstance(node, Literal):
+            continue
+        seen.add((node, shape))
+
+        if shape not in shapes:
+            path = sg.value(shape, SH.path)
+            shapes[shape] = (
+                parse_shacl_path(sg, path) if path is not None else None,
+                _nested_shapes(sg, shape),
+                list(sg.objects(shape, SH.targetObjectsOf)),
+            )
+        path, nested, target_objects_of = shapes[shape]
+
+        _add_node_triples(data_graph, node, triples, described)
+        for p in target_objects_of:
+            triples.update(data_graph.triples((None, p, node)))
+
+        values = (
+            {node} if path is None else _follow_path(data_graph, {node}, path, triples)
+        )
+        for v in values - typed:
+            if not isinstance(v, Literal):
+                triples.update(data_graph.triples((v, RDF.type, None)))
+        typed |= values
+        for n in nested:
+            todo.extend((v, n) for v in values)
+
+    # pyshacl's messages name nodes with the data graph's prefixes
+    shard = Graph(bind_namespaces="none")
+    for prefix, namespace in data_graph.namespaces():
+        shard.bind(prefix, namespace)
+    shard += triples
+    return shard
+
+
+class _PrunedGraph(Graph):
+    """A graph that keeps only triples of the given predicates, and those about blank nodes, even as it's parsed"""
+
+    def __init__(self, predicates: set, **kwargs):
+        super().__init__(**kwargs)
+        self._kept_predicates = predicates
+
+    def _keep(self, triple) -> bool:
+        return triple[1] in self._kept_predicates or isinstance(triple[0], BNode)
+
+    def add(self, triple):
+        if self._keep(triple):
+            super().add(triple)
+        return self
+
+    def addN(self, quads):
+        return super().addN(q for q in quads if self._keep(q[:3]))
+
+
+def _validated_predicates(shapes: ShapesGraph) -> set | None:
+    """The predicates of the only triples validating with the shapes may look at, other than those about blank nodes,
+    which messages describe blank nodes with, or None if it may look at any"""
+    sg = shapes.graph
+    if (
+        (None, RDF.type, SH.ConstraintComponent) in sg
+        or any(_needs_whole_graph(sg, shape.node) for shape in shapes.shapes)
+        or any(o == Literal(True) for o in sg.objects(None, SH.closed))
+    ):
+        return None
+
+    predicates = _path_predicates(sg) | {RDF.type, RDFS.subClassOf}
+    for p in [SH.equals, SH.disjoint, SH.lessThan, SH.lessThanOrEquals]:
+        predicates.update(sg.objects(None, p))
+    return predicates
+
+
+def _load_pruned(
+    data: Path | Graph | list[Path] | list[Graph], predicates: set
+) -> Graph:
+    """The data, as for [`load_graph()`][kurra.utils.load_graph], with only the triples of the given predicates and
+    those about blank nodes. Files are pruned as they're parsed, so the rest are never held in memory"""
+    g = _PrunedGraph(predicates)
+    for x in data if isinstance(data, list) else [data]:
+        files = sorted(x.glob("*.ttl")) if isinstance(x, Path) and x.is_dir() else [x]
+        for f in files:
+            if (
+                isinstance(f, Path)
+                and f.is_file()
+                and f.suffix.lower() != ".trig"
+                and not f.with_suffix(".pkl").is_file()
+            ):
+                with span("rdf.parse", source=str(f)) as s:
+                    n = len(g)
+                    g.parse(f)
+                    s.set(triples=len(g) - n)
+            else:
+                g += load_graph(f)
+    return g
+
+
+def _without_targets(sg: Graph, shapes: list) -> Graph:
+    """A copy of a shapes graph in which the given shapes have no targets, so are only validated when other shapes
+    refer to them"""
+    g = sg + Graph()
+    for shape in shapes:
+        for p in SHAPE_TARGETS:
+            g.remove((shape, p, None))
+        # implicit class targets
+        g.remove((shape, RDF.type, RDFS.Class))
+        g.remove((shape, RDF.type, OWL.Class))
+    return g
+
+
+def _compile(g: Graph) -> ShapesGraph:
+    shapes = ShapesGraph(g)
+    shapes.shapes  # harvesting the shapes compiles them
+    return shapes
+
+
+def _init_shard_worker(data_graph: Graph, sg: Graph, untargeted: Graph) -> None:
+    global _shard_data, _shard_shapes, _shard_untargeted_shapes
+    _shard_data = data_graph
+    _shard_shapes = sg
+    _shard_untargeted_shapes = untargeted
+
+
+def _validate_focus(
+    data_graph: Graph, sg: Graph, untargeted: Graph, focus: dict
+) -> tuple[bool, Graph, str]:
+    """Validates the given focus nodes, each against the shapes targeting it in the whole data graph, with only the
+    triples needed to.
+
+    The shapes are given each focus node as a target node, in place of their own targets: pyshacl's focus_nodes
+    option can't be used instead as it also filters the value nodes of nested shapes."""
+    if not focus:
+        return _merge_reports([])
+    shard = _shard_graph(data_graph, sg, focus)
+    g = untargeted + Graph()
+    for node, shapes in focus.items():
+        for shape in shapes:
+            g.add((shape, SH.targetNode, node))
+    return _run_pyshacl(shard, _compile(g))
+
+
+def _validate_shard(focus: dict) -> tuple[bool, Graph, str]:
+    return _validate_focus(_shard_data, _shard_shapes, _shard_untargeted_shapes, focus)
+
+
+def _shard_pool(
+    data_graph: Graph, sg: Graph, untargeted: Graph, max_workers: int
+) -> ProcessPoolExecutor:
+    """A pool of processes validating shards of data_graph with _validate_shard"""
+    # processes extract their shards from the data graph themselves. Forked processes share it with this one, others
+    # are each sent a copy of it
+    mp_context = (
+        multiprocessing.get_context("fork") if sys.platform == "linux" else None
+    )
+    return ProcessPoolExecutor(
+        max_workers,
+        mp_context=mp_context,
+        initializer=_init_shard_worker,
+        initargs=(data_graph, sg, untargeted),
+    )
+
+
+def _result_texts(text: str) -> list[str]:
+    """The description of each result in the text of a pyshacl validation report"""
+    texts = []
+    if "\nResults (" in text:
+        # the descriptions follow the report's Validation Report, Conforms and Results lines
+        for line in text.split("\n", 3)[3].splitlines(keepends=True):
+            if RESULT_TEXT_START.match(line) or not texts:
+                texts.append(line)
+            else:
+                texts[-1] += line
+    return texts
+
+
+def _merge_reports(reports: list[tuple[bool, Graph, str]]) -> tuple[bool, Graph, str]:
+    """Merges pyshacl validation reports into one, as if from a single validation"""
+    conforms = all(r[0] for r in reports)
+    g = Graph()
+    report = BNode()
+    g.add((report, RDF.type, SH.ValidationReport))
+    g.add((report, SH.conforms, Literal(conforms)))
+
+    texts = []
+    for _, rg, text in reports:
+        for prefix, namespace in rg.namespaces():
+            g.bind(prefix, namespace, override=False)
+        for r in list(rg.subjects(RDF.type, SH.ValidationReport)):
+            for result in rg.objects(r, SH.result):
+                g.add((report, SH.result, result))
+            rg.remove((r, None, None))
+        g += rg
+        texts.extend(_result_texts(text))
+
+    text = f"Validation Report\nConforms: {conforms}\n"
+    results = len(set(g.objects(report, SH.result)))
+    if results > 0:
+        # pyshacl orders results by their descriptions
+        text += f"Results ({results}):\n" + "".join(sorted(texts))
+
+    return conforms, g, text
+
+
+def _validate_sharded(
+    data_graph: Graph, shapes: ShapesGraph, max_workers: int
+) -> tuple[bool, Graph, str]:
+    """Validates data_graph in up to max_workers processes, each validating a shard of its focus nodes with just the
+    triples needed to validate them. Shapes whose constraints may need the whole data graph are validated in this
+    process, with all of it"""
+    sg = shapes.graph
+    if (None, RDF.type, SH.ConstraintComponent) in sg:
+        # custom constraint components are SPARQL-based, so may need any of the data
+        return _run_pyshacl(data_graph, shapes)
+
+    local = {}
+    whole_graph = []
+    for shape in shapes.shapes:
+        focus_nodes = shape.focus_nodes(data_graph)
+        if not focus_nodes:
+            continue
+        # literal focus nodes can't be made target nodes
+        if _needs_whole_graph(sg, shape.node) or not all(
+            isinstance(n, (URIRef, BNode)) for n in focus_nodes
+        ):
+            whole_graph.append(shape.node)
+        else:
+            local[shape.node] = focus_nodes
+
+    if not local:
+        return _run_pyshacl(data_graph, shapes)
+
+    focus = {}
+    for shape, focus_nodes in local.items():
+        for n in focus_nodes:
+            focus.setdefault(n, []).append(shape)
+    nodes = list(focus)
+    # more shards than processes, so that processes given quick shards aren't left idle
+    n_shards = min(len(nodes), max_workers * 4)
+    shards = [nodes[i::n_shards] for i in range(n_shards)]
+
+    with _shard_pool(
+        data_graph,
+        sg,
+        _without_targets(sg, [s.node for s in shapes.shapes]),
+        max_workers,
+    ) as pool:
+        futures = [
+            pool.submit(_validate_shard, {n: focus[n] for n in shard})
+            for shard in shards
+        ]
+        reports = []
+        if whole_graph:
+            reports.append(
+                _run_pyshacl(data_graph, _compile(_without_targets(sg, list(local))))
+            )
+        reports.extend(f.result() for f in futures)
+
+    return _merge_reports(reports)
+
+
+def _data_files(data: list[Path]) -> dict[str, Path]:
+    """The files validated for the given files and directories, as for ``load_graph()``, by their absolute paths"""
+    files = {}
+    for p in data:
+        for f in sorted(p.glob("*.ttl")) if p.is_dir() else [p]:
+            if f.is_file() or not p.is_dir():
+                files[str(f.resolve())] = f
+    return files
+
+
+def _path_predicates(sg: Graph) -> set:
+    """The predicates the shapes' paths follow and their targets select focus nodes by"""
+    predicates = set(sg.objects(None, SH.targetSubjectsOf)) | set(
+        sg.objects(None, SH.targetObjectsOf)
+    )
+    todo = list(sg.objects(None, SH.path))
+    while todo:
+        node = todo.pop()
+        if isinstance(node, URIRef):
+            predicates.add(node)
+        else:
+            for p, o in sg.predicate_objects(node):
+                if o != RDF.nil:
+                    todo.append(o)
+    return predicates
+
+
+def _path_length(sg: Graph, path) -> int | None:
+    """The number of links a SHACL path follows, or None if it may follow any number"""
+    if isinstance(path, URIRef):
+        return 1
+    if (path, SH.zeroOrMorePath, None) in sg or (path, SH.oneOrMorePath, None) in sg:
+        return None
+    for p in [SH.inversePath, SH.zeroOrOnePath]:
+        inner = sg.value(path, p)
+        if inner is not None:
+            return _path_length(sg, inner)
+
+    alternatives = sg.value(path, SH.alternativePath)
+    lengths = [
+        _path_length(sg, m)
+        for m in Collection(sg, alternatives if alternatives is not None else path)
+    ]
+    if None in lengths:
+        return None
+    if alternatives is not None:
+        return max(lengths, default=0)
+    return sum(lengths)  # a sequence
+
+
+def _shape_reach(sg: Graph, shape, seen: frozenset = frozenset()) -> int | None:
+    """How many links from its focus nodes a shape may look at the description of a node, or None if there's no
+    limit, as for shapes with sh:zeroOrMorePath or sh:oneOrMorePath paths or that are recursive"""
+    if shape in seen:
+        return None
+    seen = seen | {shape}
+
+    path = sg.value(shape, SH.path)
+    length = 0 if path is None else _path_length(sg, path)
+    if length is None:
+        return None
+    # the nodes along the path are described to follow it, value nodes for their classes
+    reach = max(length - 1, 0)
+    if path is not None and (shape, SH["class"], None) in sg:
+        reach = length
+
+    nested = [
+        o
+        for p in [SH.node, SH.property, SH.qualifiedValueShape, SH["not"]]
+        for o in sg.objects(shape, p)
+    ]
+    for p in [SH["and"], SH["or"], SH.xone]:
+        for members in sg.objects(shape, p):
+            nested.extend(Collection(sg, members))
+    for n in nested:
+        r = _shape_reach(sg, n, seen)
+        if r is None:
+            return None
+        reach = max(reach, length + r)
+    return reach
+
+
+def _hop(entries, iris: set, forward: bool, backward: bool) -> set:
+    """The given IRIs and those one link on from them, across files: those that files describing them link to, if
+    forward, and those described by files linking to them, if backward"""
+    hop = set(iris)
+    for e in entries:
+        if forward and not iris.isdisjoint(e["subjects"]):
+            hop.update(e["objects"])
+        if backward and not iris.isdisjoint(e["objects"]):
+            hop.update(e["subjects"])
+    return hop
+
+
+def _file_links(g: Graph, predicates: set) -> dict:
+    """The IRIs a data file describes, links to along the given predicates and types nodes with, and whether it
+    holds any of the data's class hierarchy"""
+    subjects = set()
+    objects = set()
+    classes = set()
+    for s, p, o in g:
+        if isinstance(s, URIRef):
+            subjects.add(str(s))
+        if isinstance(o, URIRef):
+            if p == RDF.type:
+                classes.add(str(o))
+            elif p in predicates:
+                objects.add(str(o))
+    return {
+        "subjects": sorted(subjects),
+        "objects": sorted(objects),
+        "classes": sorted(classes),
+        "hierarchy": (None, RDFS.subClassOf, None) in g,
+    }
+
+
+def _node_owners(entries: dict[str, dict]) -> dict[str, str]:
+    """The file each IRI's results are kept with: the first to describe it or, if none do, to link to it"""
+    owners = {}
+    for path in sorted(entries, reverse=True):
+        for iri in entries[path]["objects"] + entries[path]["classes"]:
+            owners[iri] = path
+    for path in sorted(entries, reverse=True):
+        for iri in entries[path]["subjects"]:
+            owners[iri] = path
+    return owners
+
+
+def _validate_incremental(
+    data: list[Path],
+    shacl: Graph | Path | str | int,
+    shapes: ShapesGraph,
+    max_workers: int,
+) -> tuple[bool, Graph, str]:
+    """Validates the data files, reusing the results of the last validation of the same files with the same shapes
+    for each file that hasn't changed since and doesn't link to, or share IRIs with, one that has.
+
+    Results are kept with the file describing their focus node, so each file's are those of validating its focus
+    nodes with all the data, as in [`_validate_sharded()`][kurra.shacl._validate_sharded]. Files changed since the
+    last validation are validated again, along with those describing IRIs that link, within as many links as the
+    shapes' paths and nested shapes reach, to IRIs that changed files describe, and all of them if the data's class
+    hierarchy changed. Only links along the predicates of the shapes' paths and targets count, and links are followed
+    backwards too if the shapes have inverse paths or sh:targetObjectsOf targets, through which the results for an IRI
+    depend on what links to it. Each file is validated with the files describing the IRIs within that many links of
+    those it describes. Data validated with shapes that may reach any number of links, or that may need the whole data
+    graph, is validated in full."""
+    sg = shapes.graph
+    files = _data_files(data)
+    reach = [_shape_reach(sg, shape.node) for shape in shapes.shapes]
+    if (
+        (None, RDF.type, SH.ConstraintComponent) in sg
+        or None in reach
+        or any(_needs_whole_graph(sg, shape.node) for shape in shapes.shapes)
+    ):
+        return _run_pyshacl(load_graph(list(files.values())), shapes)
+    hops = max([1, *reach])
+
+    key = hashlib.sha256(
+        "\n".join(
+            [
+                _compiled_shapes_key(_shapes_hash(shacl) or _hash_graph(sg)),
+                *sorted(str(p.resolve()) for p in data),
+            ]
+        ).encode()
+    ).hexdigest()
+    cache_file = VALIDATIONS_CACHE / f"{key}.json"
+    predicates = _path_predicates(sg)
+    # whether results can depend on the nodes linking to focus nodes, not only those linked to
+    backwards = any((None, p, None) in sg for p in [SH.inversePath, SH.targetObjectsOf])
+    try:
+        cache = json.loads(cache_file.read_text())
+    except (OSError, ValueError):
+        cache = {"files": {}, "unowned": None}
+    cached = cache["files"]
+
+    entries = {}
+    graphs = {}
+    changed = set()
+    for path, f in files.items():
+        sha256 = hashlib.sha256(f.read_bytes()).hexdigest()
+        if path in cached and cached[path]["sha256"] == sha256:
+            entries[path] = cached[path]
+        else:
+            graphs[path] = load_graph(f)
+            entries[path] = {"sha256": sha256, **_file_links(graphs[path], predicates)}
+            changed.add(path)
+    removed = set(cached) - set(files)
+
+    if changed or removed or cache["unowned"] is None:
+        # what the changed files describe and link to, before and after they changed
+        changes = [entries[p] for p in changed] + [
+            cached[p] for p in changed | removed if p in cached
+        ]
+        if any(e["hierarchy"] for e in changes):
+            affected = set(files)
+        else:
+            iris = {iri for e in changes for iri in e["subjects"]}
+            if backwards:
+                iris.update(iri for e in changes for iri in e["objects"])
+            # the IRIs whose results may look at what changed
+            for _ in range(hops):
+                iris = _hop(entries.values(), iris, backwards, True)
+            # results move between files as the files describing their focus nodes change
+            owners = [_node_owners(entries), _node_owners(cached)]
+            affected = changed | {o[iri] for o in owners for iri in iris if iri in o}
+            affected &= set(files)
+
+        # the IRIs the affected files' results may look at
+        affected_iris = {iri for p in affected for iri in entries[p]["subjects"]}
+        for _ in range(hops):
+            affected_iris = _hop(entries.values(), affected_iris, True, backwards)
+        context = affected | {
+            p
+            for p, e in entries.items()
+            if e["hierarchy"]
+            or not affected_iris.isdisjoint(e["subjects"])
+            or (backwards and not affected_iris.isdisjoint(e["objects"]))
+        }
+
         data_graph = Graph()
-        for x in data:
-            data_graph += load_graph(x)
+        blank_node_files = {}
+        for p in sorted(context):
+            g = graphs[p] if p in graphs else load_graph(files[p])
+            data_graph += g
+            # the report describes nodes with the data's prefixes, as a full validation's does
+            for prefix, namespace in g.namespaces():
+                data_graph.bind(prefix, namespace, override=False)
+            for n in g.all_nodes():
+                if isinstance(n, BNode):
+                    blank_node_files[n] = p
+
+        owners = _node_owners(entries)
+        focus = {p: {} for p in affected}
+        unowned = {}
+        for shape in shapes.shapes:
+            for n in shape.focus_nodes(data_graph):
+                if isinstance(n, Literal):
+                    # literal focus nodes can't be made target nodes
+                    return _run_pyshacl(load_graph(list(files.values())), shapes)
+                owner = (
+                    blank_node_files.get(n)
+                    if isinstance(n, BNode)
+                    else owners.get(str(n))
+                )
+                if owner is None:
+                    unowned.setdefault(n, []).append(shape.node)
+                elif owner in focus:
+                    focus[owner].setdefault(n, []).append(shape.node)
+
+        untargeted = _without_targets(sg, [s.node for s in shapes.shapes])
+        paths = sorted(affected)
+        focus_sets = [focus[p] for p in paths] + [unowned]
+        if max_workers > 1 and len(focus_sets) > 1:
+            with _shard_pool(data_graph, sg, untargeted, max_workers) as pool:
+                reports = list(pool.map(_validate_shard, focus_sets))
+        else:
+            reports = [
+                _validate_focus(data_graph, sg, untargeted, f) for f in focus_sets
+            ]
+
+        for path, (conforms, rg, text) in zip(paths + [None], reports):
+            report = {
+                "conforms": conforms,
+                "report": rg.serialize(format="turtle") if _result_texts(text) else "",
+                "text": text,
+            }
+            if path is None:
+                cache["unowned"] = report
+            else:
+                entries[path] = {**entries[path], **report}
+
+        cache["files"] = entries
+        try:
+            _write_atomic(cache_file, json.dumps(cache).encode())
+        except OSError:
+            pass  # the next validation validates all the files again
+
+    return _merge_reports(
+        [
+            (
+                e["conforms"],
+                Graph().parse(data=e["report"], format="turtle")
+                if e["report"]
+                else Graph(),
+                e["text"],
+            )
+            for e in [*entries.values(), cache["unowned"]]
+        ]
+    )
+
+
+def validate(
+    data: Path | Graph | list[Path] | list[Graph],
+    shacl: Graph | Path | str | int,
+    hide_warnings: bool = False,
+    max_workers: int = 1,
+    incremental: bool = False,
+    max_results: int | None = None,
+    fail_fast: bool = False,
+    prune: bool = False,
+) -> tuple[bool, Graph, str, Graph]:
+    """Validates a data graph using a shapes graph.
+
+    Args:
+        data: The path to an RDF data file, a graph, a list of Paths or a list of Graphs to validate. List items will be merged
+        shacl: The SHACL shapes to validate with
+        hide_warnings: Whether to remove results of Warning and Info severity from the results graph
+        max_workers: The number of processes to validate in. If more than 1, the data's focus nodes are split into
+            shards, each validated, with only the triples reachable from its focus nodes along the shapes' paths, in
+            its own process. Shapes that may need the whole data graph, such as those with sh:sparql constraints, are
+            validated with all of it in this process. The results are the same as validating in one process. With
+            max_results or fail_fast, the data is validated in this process alone
+        incremental: Whether to reuse the results of the last validation of the same data files with the same shapes
+            for files that haven't changed since, and don't link to, or share IRIs with, files that have. The data
+            must be files or directories of files. Results are cached in ``~/.kurra/validations/``
+        max_results: The most results to report. Validation stops once there are this many and the data is known
+            not to conform, so the validation status is always that of validating all of it. A shape's focus nodes
+            are validated in batches of at least 100, so up to a batch's results may be made beyond this many
+        fail_fast: Whether to stop validating at the first shape the data doesn't conform to. Only the results of
+            that shape's first constraint the data doesn't conform to are reported
+        prune: Whether to keep only the triples of the data the shapes may look at: those of the predicates of their
+            paths, including those of the shapes they refer to with sh:node, sh:property and the like, and their
+            targets, rdf:type and rdfs:subClassOf triples and those about blank nodes. Files are pruned as they're
+            parsed, so data with many triples the shapes don't look at is loaded faster, in less memory. The results
+            are the same. Data validated with shapes that are sh:closed, or that may need the whole data graph, such
+            as those with sh:sparql constraints, isn't pruned. Not used in incremental validation
 
-    tf, g, msg = v(data_graph, shacl_graph=shapes_graph, allow_warnings=True)
+    Returns:
+        Tuple[bool, Graph, str, Graph]: The validation status, results graph, message and summary graph
+
+    Raises:
+        ValueError: If the ID of the SHACL validator is invalid, incremental validation is asked for of graphs or
+            with max_results or fail_fast, or max_results is less than 1
+        RuntimeError: If the IRI of the SHACL validator cannot be resolved locally or against the Semantic Background's validators
+    """
+    data_graph = None
+    if incremental and not all(
+        isinstance(x, Path) for x in (data if isinstance(data, list) else [data])
+    ):
+        raise ValueError(
+            "Only files and directories of files can be validated incrementally"
+        )
+    _check_limits(max_results, fail_fast, incremental)
+    shapes = _compile_shapes(shacl)
+
+    if incremental:
+        with span(
+            "shacl.validate",
+            shapes_triples=len(shapes.graph),
+            max_workers=max_workers,
+            incremental=True,
+        ):
+            tf, g, msg = _validate_incremental(
+                data if isinstance(data, list) else [data], shacl, shapes, max_workers
+            )
+    else:
+        predicates = _validated_predicates(shapes) if prune else None
+        if predicates is not None:
+            data_graph = _load_pruned(data, predicates)
+        elif isinstance(data, (Path, Graph)):
+            data_graph = load_graph(data)
+        elif isinstance(data, list):
+            data_graph = Graph()
+            for x in data:
+                g = load_graph(x)
+                data_graph += g
+                for prefix, namespace in g.namespaces():
+                    data_graph.bind(prefix, namespace, override=False)
+
+        with span(
+            "shacl.validate",
+            triples=len(data_graph),
+            shapes_triples=len(shapes.graph),
+            max_workers=max_workers,
+        ):
+            if max_workers > 1 and max_results is None and not fail_fast:
+                tf, g, msg = _validate_sharded(data_graph, shapes, max_workers)
+            else:
+                tf, g, msg = _run_pyshacl(data_graph, shapes, max_results, fail_fast)
 
     if hide_warnings:
-        for s in g.subjects(predicate=RDF.type, object=SH.ValidationResult):
-            if not g.value(subject=s, predicate=SH.resultSeverity) == SH.Violation:
-                g = g - g.cbd(s)
+        g = _hide_warnings(g)
 
     return tf, g, msg, _summarize_validation_results(g)
 
 
-def list_local_validators() -> dict[str, dict[str, int]] | None:
-    """Lists SHACL validators - IRI & name - stored in the local system's calidator cache.
+def _check_limits(max_results: int | None, fail_fast: bool, incremental: bool) -> None:
+    if max_results is not None and max_results < 1:
+        raise ValueError("max_results must be at least 1")
+    if incremental and (max_results is not None or fail_fast):
+        raise ValueError(
+            "Incremental validation keeps all the results of each file, so can't be limited by max_results or "
+            "fail_fast"
+        )
 
-    This function does not connect over the Internet."""
-    kurra_cache = Path().home() / ".kurra"
-    validators_cache = kurra_cache / "validators.pkl"
-    validator_ids_cache = kurra_cache / "validator_ids.pkl"
-
-    if Path.is_file(validators_cache):
-        local_validators = {}
-        cv = _load_pickle(validators_cache)
-        cv: Dataset
-        validator_iris = [
-            x.identifier
-            for x in cv.graphs()
-            if str(x.identifier) not in ["urn:x-rdflib:default"]
-        ]
 
-        validator_ids = _load_pickle(validator_ids_cache)
+def _hide_warnings(g: Graph) -> Graph:
+    """The validation results graph without results of Warning and Info severity"""
+    hidden = set()
+    for result, severity in g.subject_objects(SH.resultSeverity):
+        if severity != SH.Violation:
+            hidden.add(result)
+    if not hidden:
+        return g
+
+    # the results graph is made again, without the hidden results, in one pass, rather than removing each one's
+    # triples from it, which copies it for each
+    kept = Graph(bind_namespaces="none")
+    for prefix, namespace in g.namespaces():
+        kept.bind(prefix, namespace)
+    for report in g.subjects(RDF.type, SH.ValidationReport):
+        kept += (t for t in g.triples((report, None, None)) if t[2] not in hidden)
+    for result in g.subjects(RDF.type, SH.ValidationResult):
+        if result not in hidden:
+            kept += g.cbd(result)
+    return kept
+
+
+def _init_file_worker(
+    shapes: ShapesGraph,
+    max_results: int | None,
+    fail_fast: bool,
+    predicates: set | None,
+) -> None:
+    global _file_shapes, _file_max_results, _file_fail_fast, _file_predicates
+    _file_shapes = shapes
+    _file_max_results = max_results
+    _file_fail_fast = fail_fast
+    _file_predicates = predicates
+
+
+def _validate_file(path: Path) -> tuple[bool, Graph, str]:
+    return _validate_one_file(
+        path, _file_shapes, _file_max_results, _file_fail_fast, _file_predicates
+    )
+
+
+def _validate_one_file(
+    path: Path,
+    shapes: ShapesGraph,
+    max_results: int | None,
+    fail_fast: bool,
+    predicates: set | None,
+) -> tuple[bool, Graph, str]:
+    """Validates a file, loading only the triples of the given predicates, and those about blank nodes, if given"""
+    data_graph = (
+        load_graph(path) if predicates is None else _load_pruned(path, predicates)
+    )
+    return _run_pyshacl(data_graph, shapes, max_results, fail_fast)
+
+
+def validate_files(
+    data: list[Path],
+    shacl: Graph | Path | str | int,
+    hide_warnings: bool = False,
+    max_workers: int = 1,
+    max_results: int | None = None,
+    fail_fast: bool = False,
+    prune: bool = False,
+) -> dict[Path, tuple[bool, Graph, str, Graph]]:
+    """Validates each of a number of data files on its own, rather than merged into one data graph as
+    [`validate()`][kurra.shacl.validate] does, so that results are reported for the file they are in.
+
+    Args:
+        data: The RDF data files, or directories of them, to validate
+        shacl: The SHACL shapes to validate with
+        hide_warnings: Whether to remove results of Warning and Info severity from the results graphs
+        max_workers: The number of processes to validate files in at once
+        max_results: The most results to report for each file, as for [`validate()`][kurra.shacl.validate]
+        fail_fast: Whether to stop validating each file at the first shape it doesn't conform to, as for
+            [`validate()`][kurra.shacl.validate], and to stop validating files at the first that isn't valid
+        prune: Whether to keep only the triples of each file the shapes may look at, as for
+            [`validate()`][kurra.shacl.validate]
 
-        for validator_iri in sorted(validator_iris):
-            validator_id = validator_ids[validator_iri]
-            validator_name = load_graph(cv.graph(validator_iri)).value(
-                subject=validator_iri, predicate=SDO.name
+    Returns:
+        dict[Path, tuple[bool, Graph, str, Graph]]: The validation status, results graph, message and summary graph
+            of each file, in the order given, with the files in directories in name order. With fail_fast, the last
+            is that of the first file that isn't valid, the files after it not having been validated
+
+    Raises:
+        ValueError: If the ID of the SHACL validator is invalid, or max_results is less than 1
+        RuntimeError: If the IRI of the SHACL validator cannot be resolved locally or against the Semantic Background's validators
+    """
+    _check_limits(max_results, fail_fast, False)
+    shapes = _compile_shapes(shacl)
+    files = list(_data_files(data).values())
+    predicates = _validated_predicates(shapes) if prune else None
+
+    with span(
+        "shacl.validate",
+        files=len(files),
+        shapes_triples=len(shapes.graph),
+        max_workers=max_workers,
+    ):
+        if max_workers > 1 and len(files) > 1:
+            # forked processes share the compiled shapes with this one, others are each sent a copy of them
+            mp_context = (
+                multiprocessing.get_context("fork") if sys.platform == "linux" else None
             )
-            local_validators[str(validator_iri)] = {
-                "name": str(validator_name),
-                "id": str(validator_id),
-            }
+            with ProcessPoolExecutor(
+                max_workers,
+                mp_context=mp_context,
+                initializer=_init_file_worker,
+                initargs=(shapes, max_results, fail_fast, predicates),
+            ) as pool:
+                reports = []
+                for report in pool.map(
+                    _validate_file,
+                    files,
+                    chunksize=max(1, len(files) // (max_workers * 4)),
+                ):
+                    reports.append(report)
+                    if fail_fast and not report[0]:
+                        pool.shutdown(cancel_futures=True)
+                        break
+        else:
+            reports = []
+            for f in files:
+                reports.append(
+                    _validate_one_file(f, shapes, max_results, fail_fast, predicates)
+                )
+                if fail_fast and not reports[-1][0]:
+                    break
 
-        return local_validators
-    else:
-        return {}
+    results = {}
+    for f, (tf, g, msg) in zip(files, reports):
+        if hide_warnings:
+            g = _hide_warnings(g)
+        results[f] = tf, g, msg, _summarize_validation_results(g)
+    return results
 
 
-def sync_validators(http_client: httpx.Client | None = None):
+def list_local_validators() -> dict[str, dict[str, int]] | None:
+    """Lists SHACL validators - IRI & name - stored in the local system's calidator cache.
+
+    Only the cache's index is read, not the validators themselves. This function does not connect over the Internet."""
+    return {
+        iri: {"name": entry["name"], "id": str(entry["id"])}
+        for iri, entry in sorted(_read_validator_index().items())
+    }
+
+
+def _fetch_validator(
+    http_client: httpx.Client, gsp_endpoint: str, iri: str, entry: dict | None
+) -> tuple[Graph | None, dict]:
+    """Gets a validator's graph, conditionally if it's cached with an ETag or Last-Modified date.
+
+    Returns the graph, or None if it hasn't changed since it was cached, and the ETag and Last-Modified date it was
+    served with"""
+    headers = {"Accept": "text/turtle"}
+    if entry is not None and (VALIDATORS_CACHE / entry["file"]).is_file():
+        if entry.get("etag") is not None:
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified") is not None:
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    r = send_request(
+        http_client, "GET", gsp_endpoint, params={"graph": iri}, headers=headers
+    )
+    if r.status_code == 304:
+        return None, {}
+    if r.status_code == 422:
+        raise NotImplementedError(
+            "The KurrawongAI Semantic Background set of validators is not available yet."
+        )
+    if not r.is_success:
+        raise RuntimeError(
+            f"The graph {iri} was not obtained from the Graph Store {gsp_endpoint}: {r.status_code}"
+        )
+
+    with span("rdf.parse", format="text/turtle", characters=len(r.text)):
+        g = Graph(identifier=URIRef(iri)).parse(data=r.text, format="text/turtle")
+    return g, {
+        "etag": r.headers.get("ETag"),
+        "last_modified": r.headers.get("Last-Modified"),
+    }
+
+
+def sync_validators(http_client: httpx.Client | None = None, max_workers: int = 4):
     """Checks the Semantic Background's read-only SPARQL Endpoint, currently https://fuseki.dev.kurrawong.ai/semback/sparql, for validators.
 
     It then checks local storage, using ``list_local_calidators()``, to see which, if any, of those validators are stored locally.
 
-    For any missing, it pulls down and stores a copy locally.
+    Missing validators are pulled down and stored locally. Cached validators are refreshed if they have changed: those
+    whose modified date, as listed by the Semantic Background, is the one they were cached with are not requested at
+    all and the rest are requested conditionally, with the ETag or Last-Modified date they were served with, so that
+    unchanged validators are not sent again. Each validator is cached in its own file, written only if it has changed.
+
+    Args:
+        http_client: an HTTP client to use. Created internally, with max_workers connections, if not supplied
+        max_workers: the maximum number of validators fetched at once
+
+    Returns:
+        The local validators, as per [`list_local_validators()`][kurra.shacl.list_local_validators]
     """
-    kurra_cache = Path().home() / ".kurra"
-    validators_cache = kurra_cache / "validators.pkl"
-    validator_ids_cache = kurra_cache / "validator_ids.pkl"
     semback_sparql_endpoint = "https://fuseki.dev.kurrawong.ai/semback/sparql"
 
-    # get list of remote validators
+    close_http_client = False
+    if http_client is None:
+        http_client = httpx.Client(limits=httpx.Limits(max_connections=max_workers))
+        close_http_client = True
+
+    # get list of remote validators, with their modified dates where known
     q = """
+        PREFIX dcterms: <http://purl.org/dc/terms/>
         PREFIX schema: <https://schema.org/>
         
-        SELECT * 
+        SELECT ?p (MAX(STR(?m)) AS ?modified)
         WHERE { 
           <https://data.kurrawong.ai/sb/validators> schema:hasPart ?p
+          
+          OPTIONAL { 
+            ?p schema:dateModified|dcterms:modified ?m 
+          }
         }
+        GROUP BY ?p
         """
-    r = query(semback_sparql_endpoint, q, None, http_client, "python", True)
-
-    remote_validators = [row["p"] for row in r]
-
-    # get list of local validators
-    local_validators = list_local_validators()
-
-    # diff the lists
-    unknown_validators = list(set(remote_validators) - set(local_validators.keys()))
-
-    # prepare to cache
-    if len(unknown_validators) > 0:
-        if not kurra_cache.exists():
-            Path(kurra_cache).mkdir()
-
-        # get & add unknown remote validators to local
-        if validators_cache.exists():
-            d = _load_pickle(validators_cache)
-        else:
-            d = Dataset()
-
-        for v in unknown_validators:
-            g = gsp_get(semback_sparql_endpoint, v, http_client=http_client)
-            if g == 422:
-                raise NotImplementedError(
-                    "The KurrawongAI Semantic Background set of validators is not available yet."
-                )
-            if not isinstance(g, Graph):
-                raise RuntimeError(
-                    f"The graph {v} was not obtained from the SPARQL Endpoint {semback_sparql_endpoint}"
-                )
-            d.add_graph(g)
-            print(f"Caching validator {g.identifier}")
-
-        with open(validators_cache, "wb") as f:
-            dump(d, f)
-
-        validator_ids = {}
-        for i, v in enumerate(sorted([x.identifier for x in d.graphs()])):
-            validator_ids[v] = i + 1
-
-        with open(validator_ids_cache, "wb") as f2:
-            print("Dumping validator IDs")
-            dump(validator_ids, f2)
+    try:
+        r = query(semback_sparql_endpoint, q, None, http_client, "python", True)
+
+        # get list of local validators
+        index = _read_validator_index()
+
+        # validators not cached, or not known to be unchanged
+        stale = {}
+        for row in r:
+            iri = str(row["p"])
+            modified = str(row["modified"]) if row.get("modified") else None
+            entry = index.get(iri)
+            if (
+                entry is None
+                or modified is None
+                or entry.get("modified") != modified
+                or not (VALIDATORS_CACHE / entry["file"]).is_file()
+            ):
+                stale[iri] = modified
+
+        if len(stale) == 0:
+            return list_local_validators()
+
+        # get & add new or changed remote validators to local, one file each, recording those got before any failure
+        gsp_endpoint = make_system_specific_sparql_endpoint(
+            semback_sparql_endpoint, gsp_query_type=GspType.get
+        )
+        changed = False
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                fetches = {
+                    iri: executor.submit(
+                        _fetch_validator, http_client, gsp_endpoint, iri, index.get(iri)
+                    )
+                    for iri in sorted(stale)
+                }
+                for iri, fetch in fetches.items():
+                    g, cache_headers = fetch.result()
+                    if g is None:  # unchanged
+                        if index[iri].get("modified") != stale[iri]:
+                            index[iri]["modified"] = stale[iri]
+                            changed = True
+                        continue
+                    if _store_validator(g, index, modified=stale[iri], **cache_headers):
+                        print(f"Caching validator {g.identifier}")
+                    changed = True
+        finally:
+            if changed:
+                _write_validator_index(index)
+    finally:
+        if close_http_client:
+            http_client.close()
 
     local_validators = list_local_validators()
 
@@ -273,29 +1460,17 @@ def sync_validators(http_client: httpx.Client | None = None):
 def get_validator_graph(
     graph_or_file_or_url_or_id: Graph | Path | str | int,
 ) -> Graph | None:
-    kurra_cache = Path().home() / ".kurra"
-    validators_cache = kurra_cache / "validators.pkl"
-    validator_ids_cache = kurra_cache / "validator_ids.pkl"
-
     # it's a local ID so look it up in cache
     if isinstance(graph_or_file_or_url_or_id, int) or (
         isinstance(graph_or_file_or_url_or_id, str)
         and graph_or_file_or_url_or_id.isdigit()
     ):
-        validator_ids = _load_pickle(validator_ids_cache)
-        validator_iris = [
-            key
-            for key, value in validator_ids.items()
-            if value == int(graph_or_file_or_url_or_id)
-        ]
-        if len(validator_iris) != 1:
+        g = _load_validator_by_id(graph_or_file_or_url_or_id)
+        if g is None:
             raise ValueError(
                 f"Could not find validator for {graph_or_file_or_url_or_id}"
             )
-
-        cv = _load_pickle(validators_cache)
-        cv: Dataset
-        return cv.graph(URIRef(validator_iris[0]))
+        return g
 
     # cater for CLI making paths strings
     if isinstance(graph_or_file_or_url_or_id, str):
@@ -361,9 +1536,10 @@ def infer(
 
         return kurra.sparql.query(data_graph, rules)
 
-    interim_result = RuleEngine(SRLParser().parse(rules)).evaluate(
-        data_graph, inplace=False
-    )
+    with span("shacl.infer", triples=len(data_graph)):
+        interim_result = RuleEngine(SRLParser().parse(rules)).evaluate(
+            data_graph, inplace=False
+        )
 
     if include_base:
         return interim_result
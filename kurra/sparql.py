@@ -1,14 +1,22 @@
 """SPARQL query function. This includes SPARQL Update."""
 
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Literal
+from typing import Any, Iterable, Iterator, Literal
 
 import httpx
-from rdflib import Dataset, Graph
+from rdflib import BNode, Dataset, Graph, URIRef
+from rdflib import Literal as RDFLiteral
+from rdflib.term import Node
 
+from kurra.db.sparql import construct as db_construct
 from kurra.db.sparql import query as db_query
+from kurra.tracing import span
 from kurra.utils import (
+    Deadline,
     add_namespaces_to_query_or_data,
     convert_sparql_json_to_python,
     is_construct_or_describe_query,
@@ -20,6 +28,10 @@ from kurra.utils import (
     statement_type_for_query,
 )
 
+# RDFLib's SPARQL parser is not thread-safe so local sources are queried one at a time. Reentrant, so that
+# federated_query() can wait its turn for it with a timeout before calling query()
+_local_query_lock = threading.RLock()
+
 
 def query(
     p: Path | str | Graph | Dataset,
@@ -28,8 +40,15 @@ def query(
     http_client: httpx.Client = None,
     return_format: Literal["original", "python", "dataframe"] = "original",
     return_bindings_only: bool = False,
+    timeout: float | httpx.Timeout | None = None,
+    deadline: float | Deadline | None = None,
+    results_format: Literal["json", "tsv"] = "json",
 ):
-    """Pose a SPARQL query to a file, and RDF Graph or a SPARQL Endpoint"""
+    """Pose a SPARQL query to a file, and RDF Graph or a SPARQL Endpoint
+
+    The timeout, deadline and results_format apply only to SPARQL Endpoints. See
+    [`db.sparql.query()`][kurra.db.sparql.query]. Files, Graphs and Datasets are queried one at a time, as RDFLib's
+    SPARQL engine is not thread-safe, so this may be called from several threads at once."""
     if p is None:
         raise ValueError(
             "You must supply a Path, string (of data or a URL), Graph or a Dataset to query for variable p"
@@ -73,11 +92,19 @@ def query(
         s = None
         f = None
         if str(p).startswith("http"):
-            r = db_query(p, q, namespaces, http_client, "original", False)
-            s = load_graph(r)
+            # streamed into the Graph, as N-Triples, rather than read whole and then parsed
+            s = db_construct(
+                p,
+                q,
+                http_client=http_client,
+                timeout=timeout,
+                deadline=deadline,
+            )
 
         else:  # (isinstance(p, str) and not p.startswith("http")) or isinstance(p, Path):
-            f = load_graph(p).query(q)
+            g = load_graph(p)
+            with _local_query_lock:
+                f = g.query(q)
 
         if return_format == "dataframe":
             raise ValueError(
@@ -99,7 +126,16 @@ def query(
                 http_client = httpx.Client()
                 close_http_client = True
 
-            r = db_query(p, q, namespaces, http_client, return_format, False)
+            r = db_query(
+                p,
+                q,
+                namespaces,
+                http_client,
+                return_format,
+                False,
+                timeout=timeout,
+                deadline=deadline,
+            )
 
             if close_http_client:
                 http_client.close()
@@ -113,7 +149,8 @@ def query(
             )
         elif isinstance(p, (Graph, str, Path)):
             g = load_graph(p)
-            g.update(q)
+            with _local_query_lock:
+                g.update(q)
             return g
         else:
             raise NotImplementedError(
@@ -129,7 +166,15 @@ def query(
                 close_http_client = True
 
             r = db_query(
-                p, q, namespaces, http_client, return_format, return_bindings_only
+                p,
+                q,
+                namespaces,
+                http_client,
+                return_format,
+                return_bindings_only,
+                timeout=timeout,
+                deadline=deadline,
+                results_format=results_format,
             )
 
             if close_http_client:
@@ -138,7 +183,9 @@ def query(
         if r is not None:  # we have a result from the DB query to return
             return r
         else:  # querying a file or string RDF data
-            r = load_graph(p).query(q).serialize(format="json")
+            g = load_graph(p)
+            with span("sparql.query.local", triples=len(g)), _local_query_lock:
+                r = g.query(q).serialize(format="json")
 
             if return_format == "dataframe":
                 return make_sparql_dataframe(json.loads(r))
@@ -146,3 +193,432 @@ def query(
                 return convert_sparql_json_to_python(r, return_bindings_only)
             else:
                 return r.decode()
+
+
+def _source_name(p: Path | str | Graph | Dataset) -> str:
+    """A stable, printable name for a query source"""
+    if isinstance(p, Graph):
+        return str(p.identifier)
+    return str(p)
+
+
+def _source_term(p: Path | str | Graph | Dataset) -> dict:
+    """The SPARQL JSON binding used to tag result rows with their source"""
+    name = _source_name(p)
+    if name.startswith("http") or isinstance(p, Graph):
+        return {"type": "uri", "value": name}
+    return {"type": "literal", "value": name}
+
+
+def _source_graph_iri(p: Path | str | Graph | Dataset) -> URIRef:
+    """The named graph IRI used to hold CONSTRUCT or DESCRIBE results from a source"""
+    if isinstance(p, str) and not p.startswith("http") and len(p) < 260:
+        if Path(p).is_file():
+            p = Path(p)
+    if isinstance(p, Path):
+        return URIRef(p.resolve().as_uri())
+    return URIRef(_source_name(p))
+
+
+def federated_query(
+    sources: list[Path | str | Graph | Dataset],
+    q: str | Path,
+    namespaces: dict[str, str] | None = None,
+    http_client: httpx.Client = None,
+    return_format: Literal["original", "python", "dataframe"] = "python",
+    return_bindings_only: bool = False,
+    source_variable: str = "source",
+    deadline: float | None = None,
+    max_workers: int | None = None,
+) -> tuple:
+    """Pose the same SPARQL query to many sources concurrently and union the results
+
+    Sources may be anything accepted by ``query()``: files, RDF data strings, Graphs, Datasets or SPARQL Endpoints.
+    Remote sources share one pooled HTTP client and are queried concurrently. Local sources are queried one at a
+    time, as RDFLib's SPARQL engine isn't thread safe, and, unlike requests to remote sources, a query of a local
+    source can't be interrupted: one not finished by the deadline is reported as an error, but runs on in its thread
+    until it finishes, and the Python process can't exit before then. Local sources still waiting for their turn at
+    the deadline aren't queried, and an HTTP client created internally is closed once no source is using it.
+
+    Args:
+        sources: the files, Graphs, Datasets or SPARQL Endpoints to query
+        q: the SELECT, ASK, CONSTRUCT or DESCRIBE query to pose to every source
+        namespaces: prefixes to add to the query
+        http_client: an HTTP client shared by all remote sources. Created internally if not supplied
+        return_format: 'original' - JSON or TriG text, 'python' or 'dataframe'
+        return_bindings_only: for 'python' SELECT and ASK results, return only the bindings or boolean value
+        source_variable: the name of the variable added to each SELECT row to record its source
+        deadline: the number of seconds to wait for all sources. Requests to remote sources not finished by then
+            are aborted and reported as errors, as are queries of local sources, which aren't aborted
+        max_workers: the maximum number of sources queried at once. Defaults to the number of sources
+
+    Returns:
+        A tuple of the merged result and a report, keyed by source name, of each source's ``duration`` in seconds,
+        result ``count`` and ``error``, if any. SELECT rows are merged into one result set, ASK results are True if
+        any source returns True and CONSTRUCT or DESCRIBE results are returned as a Dataset with one named graph per
+        source.
+    """
+    if not sources:
+        raise ValueError("You must supply at least one source to query")
+
+    if q is None:
+        raise ValueError("You must supply a query")
+
+    if isinstance(q, str):
+        if len(q) < 260:
+            if Path(q).is_file():
+                q = Path(q).read_text()
+
+    if return_format not in ["original", "python", "dataframe"]:
+        raise ValueError(
+            f"return_format {return_format} must be either 'original', 'python' or 'dataframe'"
+        )
+
+    if namespaces is not None:
+        q = add_namespaces_to_query_or_data(q, namespaces)
+
+    # each source is queried once, even if given more than once
+    sources = list({_source_name(p): p for p in sources}.values())
+
+    statement = statement_type_for_query(q)
+
+    if is_update_query(q, statement):
+        raise ValueError(
+            "Only SELECT, ASK, CONSTRUCT or DESCRIBE queries can be federated"
+        )
+
+    is_graph_query = is_construct_or_describe_query(q, statement)
+
+    if return_format == "dataframe" and is_graph_query:
+        raise ValueError(
+            "DataFrames cannot be returned for CONSTRUCT or DESCRIBE queries"
+        )
+
+    close_http_client = False
+    if http_client is None:
+        http_client = httpx.Client(
+            limits=httpx.Limits(max_connections=max_workers or len(sources))
+        )
+        close_http_client = True
+
+    def _query_source(p):
+        start = time.perf_counter()
+        if str(p).startswith("http"):
+            r = query(
+                p,
+                q,
+                http_client=http_client,
+                return_format="python" if is_graph_query else "original",
+                deadline=shared_deadline,
+            )
+        else:
+            # a local source still waiting for its turn at the deadline isn't queried at all
+            remaining = shared_deadline.remaining()
+            if not _local_query_lock.acquire(
+                timeout=-1 if remaining is None else remaining
+            ):
+                raise TimeoutError(f"Deadline of {deadline} seconds exceeded")
+            try:
+                shared_deadline.check()
+                r = query(
+                    p, q, return_format="python" if is_graph_query else "original"
+                )
+            finally:
+                _local_query_lock.release()
+        return r, time.perf_counter() - start
+
+    # one deadline for all remote sources so that unfinished requests can be aborted together
+    shared_deadline = Deadline(deadline)
+
+    report = {_source_name(p): None for p in sources}
+    results = {}
+    executor = ThreadPoolExecutor(max_workers=max_workers or len(sources))
+    futures = {}
+    try:
+        futures = {executor.submit(_query_source, p): p for p in sources}
+        done, not_done = wait(futures, timeout=deadline)
+        if not_done:
+            shared_deadline.cancel()
+        for future in not_done:
+            future.cancel()
+            report[_source_name(futures[future])] = {
+                "duration": deadline,
+                "count": 0,
+                "error": f"Deadline of {deadline} seconds exceeded",
+            }
+        for future in done:
+            p = futures[future]
+            try:
+                r, duration = future.result()
+            except Exception as e:
+                report[_source_name(p)] = {
+                    "duration": None,
+                    "count": 0,
+                    "error": str(e),
+                }
+                continue
+            results[_source_name(p)] = r
+            report[_source_name(p)] = {
+                "duration": duration,
+                "count": None,
+                "error": None,
+            }
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        if close_http_client:
+            # sources still being queried past the deadline finish, or are aborted, with the client open
+            running = [f for f in futures if not f.done()]
+
+            def _close_http_client():
+                wait(running)
+                http_client.close()
+
+            if running:
+                threading.Thread(target=_close_http_client, daemon=True).start()
+            else:
+                _close_http_client()
+
+    # merge in the order the sources were given
+    ordered = [p for p in sources if _source_name(p) in results]
+
+    if is_graph_query:
+        d = Dataset()
+        for p in ordered:
+            g = d.graph(_source_graph_iri(p))
+            g += results[_source_name(p)]
+            report[_source_name(p)]["count"] = len(g)
+        if return_format == "python":
+            return d, report
+        return d.serialize(format="trig"), report
+
+    merged = {"head": {"vars": []}}
+    bindings = []
+    boolean = None
+    for p in ordered:
+        r = json.loads(results[_source_name(p)])
+        if r.get("boolean") is not None:  # ASK
+            boolean = bool(boolean) or bool(r["boolean"])
+            report[_source_name(p)]["count"] = 1
+            continue
+        for var in r["head"]["vars"]:
+            if var == source_variable:
+                raise ValueError(
+                    f"The source_variable {source_variable} is already used by the query. Choose another name"
+                )
+            if var not in merged["head"]["vars"]:
+                merged["head"]["vars"].append(var)
+        term = _source_term(p)
+        for row in r["results"]["bindings"]:
+            row[source_variable] = term
+            bindings.append(row)
+        report[_source_name(p)]["count"] = len(r["results"]["bindings"])
+
+    if boolean is not None and not bindings:
+        merged = {"head": {}, "boolean": boolean}
+    else:
+        merged["head"]["vars"].append(source_variable)
+        merged["results"] = {"bindings": bindings}
+
+    if return_format == "dataframe":
+        return make_sparql_dataframe(merged), report
+    elif return_format == "python":
+        return convert_sparql_json_to_python(merged, return_bindings_only), report
+    else:
+        return json.dumps(merged), report
+
+
+VALUES_PLACEHOLDER = "{{VALUES}}"
+
+
+def _values_term(value: Any) -> str:
+    if value is None:
+        return "UNDEF"
+    if isinstance(value, BNode):
+        raise ValueError("Blank nodes cannot be used in a VALUES block")
+    if isinstance(value, Node):
+        return value.n3()
+    return RDFLiteral(value).n3()
+
+
+def make_values_batches(
+    bindings: Iterable[dict[str, Any] | Any],
+    variables: list[str] | None = None,
+    batch_rows: int = 1000,
+    batch_bytes: int = 100_000,
+) -> Iterator[str]:
+    """Splits bindings into SPARQL VALUES blocks of at most batch_rows rows and, roughly, batch_bytes bytes each.
+
+    Args:
+        bindings: rows of values keyed by variable name or, if only one variable is given, single values. Values may
+            be RDFLib terms, Python values, which are made Literals, or None for UNDEF
+        variables: the VALUES variables, without '?'. Defaults to the keys of the first row
+        batch_rows: the maximum number of rows per block
+        batch_bytes: the size, in bytes, at which to start a new block. A single row larger than this gets a block of
+            its own
+
+    Returns:
+        Iterator[str]: VALUES blocks, e.g. ``VALUES (?iri) { (<http://example.com/a>) }``
+    """
+    if batch_rows < 1 or batch_bytes < 1:
+        raise ValueError("batch_rows and batch_bytes must be at least 1")
+
+    head = None
+    rows = []
+    size = 0
+    for binding in bindings:
+        if not isinstance(binding, dict):
+            if variables is None or len(variables) != 1:
+                raise ValueError(
+                    "Bindings must be dicts unless exactly one variable is given"
+                )
+            binding = {variables[0]: binding}
+        if variables is None:
+            variables = list(binding.keys())
+        if head is None:
+            head = "VALUES (" + " ".join(f"?{v}" for v in variables) + ") {\n"
+
+        row = (
+            "    (" + " ".join(_values_term(binding.get(v)) for v in variables) + ")\n"
+        )
+        row_size = len(row.encode())
+        if rows and (len(rows) >= batch_rows or size + row_size > batch_bytes):
+            yield head + "".join(rows) + "}"
+            rows = []
+            size = 0
+        rows.append(row)
+        size += row_size
+
+    if rows:
+        yield head + "".join(rows) + "}"
+
+
+def query_with_values(
+    p: Path | str | Graph | Dataset,
+    q: str | Path,
+    bindings: Iterable[dict[str, Any] | Any],
+    variables: list[str] | None = None,
+    namespaces: dict[str, str] | None = None,
+    http_client: httpx.Client = None,
+    return_format: Literal["original", "python", "dataframe"] = "python",
+    return_bindings_only: bool = False,
+    batch_rows: int = 1000,
+    batch_bytes: int = 100_000,
+    max_workers: int = 4,
+    timeout: float | httpx.Timeout | None = None,
+):
+    """Poses a query templated with a VALUES placeholder once per batch of bindings and merges the results
+
+    The query must contain ``{{VALUES}}`` where the VALUES block is to go. The bindings are split into batches - see
+    [`make_values_batches()`][kurra.sparql.make_values_batches] - so that no query is too large for the endpoint, and
+    the batches are posed to SPARQL Endpoints concurrently.
+
+    Args:
+        p: the file, Graph, Dataset or SPARQL Endpoint to query
+        q: the SELECT, ASK, CONSTRUCT or DESCRIBE query containing ``{{VALUES}}``
+        bindings: the rows of values to bind, as per ``make_values_batches()``
+        variables: the VALUES variables, as per ``make_values_batches()``
+        namespaces: prefixes to add to the query
+        http_client: an HTTP client to use. Created internally, with max_workers connections, if not supplied
+        return_format: 'original' - JSON or Turtle text, 'python' or 'dataframe'
+        return_bindings_only: for 'python' SELECT and ASK results, return only the bindings or boolean value
+        batch_rows: the maximum number of VALUES rows per query
+        batch_bytes: the size, in bytes, of VALUES block at which to start a new query
+        max_workers: the maximum number of queries posed to a SPARQL Endpoint at once
+        timeout: the timeout, in seconds, for each HTTP request
+
+    Returns:
+        The merged result: SELECT rows from all batches in one result set, ASK True if any batch returns True and
+        CONSTRUCT or DESCRIBE results in one Graph. With no bindings, the result of no batches is empty
+    """
+    if q is None:
+        raise ValueError("You must supply a query")
+
+    if isinstance(q, str):
+        if len(q) < 260:
+            if Path(q).is_file():
+                q = Path(q).read_text()
+
+    if VALUES_PLACEHOLDER not in q:
+        raise ValueError(f"The query must contain the placeholder {VALUES_PLACEHOLDER}")
+
+    if return_format not in ["original", "python", "dataframe"]:
+        raise ValueError(
+            f"return_format {return_format} must be either 'original', 'python' or 'dataframe'"
+        )
+
+    if namespaces is not None:
+        q = add_namespaces_to_query_or_data(q, namespaces)
+
+    statement = statement_type_for_query(q.replace(VALUES_PLACEHOLDER, ""))
+
+    if is_update_query(q, statement):
+        raise ValueError(
+            "Only SELECT, ASK, CONSTRUCT or DESCRIBE queries can be posed with VALUES batches"
+        )
+
+    is_graph_query = is_construct_or_describe_query(q, statement)
+
+    if return_format == "dataframe" and is_graph_query:
+        raise ValueError(
+            "DataFrames cannot be returned for CONSTRUCT or DESCRIBE queries"
+        )
+
+    remote = str(p).startswith("http")
+    if not remote:
+        # parse local data once, not once per batch
+        p = load_graph(p)
+
+    close_http_client = False
+    if http_client is None and remote:
+        http_client = httpx.Client(limits=httpx.Limits(max_connections=max_workers))
+        close_http_client = True
+
+    def _query_batch(values):
+        return query(
+            p,
+            q.replace(VALUES_PLACEHOLDER, values),
+            http_client=http_client,
+            return_format="python" if is_graph_query else "original",
+            timeout=timeout,
+        )
+
+    batches = make_values_batches(bindings, variables, batch_rows, batch_bytes)
+    try:
+        if remote:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(_query_batch, batches))
+        else:
+            results = [_query_batch(values) for values in batches]
+    finally:
+        if close_http_client:
+            http_client.close()
+
+    if is_graph_query:
+        g = Graph()
+        for r in results:
+            g += r
+        if return_format == "python":
+            return g
+        return g.serialize(format="longturtle")
+
+    merged = {"head": {"vars": []}, "results": {"bindings": []}}
+    boolean = None
+    for r in results:
+        r = json.loads(r)
+        if r.get("boolean") is not None:  # ASK
+            boolean = bool(boolean) or bool(r["boolean"])
+            continue
+        for var in r["head"]["vars"]:
+            if var not in merged["head"]["vars"]:
+                merged["head"]["vars"].append(var)
+        merged["results"]["bindings"].extend(r["results"]["bindings"])
+
+    if boolean is not None:
+        merged = {"head": {}, "boolean": boolean}
+
+    if return_format == "dataframe":
+        return make_sparql_dataframe(merged)
+    elif return_format == "python":
+        return convert_sparql_json_to_python(merged, return_bindings_only)
+    else:
+        return json.dumps(merged)
@@ -0,0 +1,195 @@
+"""Timing spans for kurra's HTTP requests and RDF processing.
+
+kurra opens a span around each HTTP request, each SPARQL query or Graph Store Protocol operation and each parse,
+serialize and response-decode step within them. Spans are passed to any tracers that have been added, so nothing is
+recorded unless a tracer is in use:
+
+```python
+from kurra.tracing import JsonLinesExporter, tracing
+
+with tracing(JsonLinesExporter("spans.jsonl")):
+    upload("http://localhost:3030/ds", Path("big.ttl"))
+```
+
+Spans nest: a span opened while another is open, in the same thread, records the other as its parent."""
+
+import contextvars
+import functools
+import itertools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Callable, Iterator
+
+_span_ids = itertools.count(1)
+_current_span: contextvars.ContextVar["Span | None"] = contextvars.ContextVar(
+    "kurra_current_span", default=None
+)
+_tracers: list["Tracer"] = []
+_tracers_lock = threading.Lock()
+
+
+class Span:
+    """A named, timed step, with attributes describing it such as URLs, status codes and byte counts"""
+
+    def __init__(self, name: str, parent: "Span | None" = None, **attributes):
+        self.name = name
+        self.id = next(_span_ids)
+        self.parent_id = parent.id if parent is not None else None
+        self.attributes = attributes
+        self.start = time.time()
+        self.duration = None
+        self.error = None
+        self._started = time.perf_counter()
+
+    def set(self, **attributes) -> None:
+        """Adds, or replaces, attributes of the span"""
+        self.attributes.update(attributes)
+
+    def elapsed(self) -> float:
+        """Seconds since the span started"""
+        return time.perf_counter() - self._started
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "id": self.id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration": self.duration,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class Tracer:
+    """Receives spans as they start and end. Subclass it and override either method.
+
+    Methods may be called from several threads at once."""
+
+    def on_start(self, span: Span) -> None:
+        pass
+
+    def on_end(self, span: Span) -> None:
+        pass
+
+
+class SpanCollector(Tracer):
+    """Keeps ended spans in memory, in the order they ended"""
+
+    def __init__(self):
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()
+
+    def on_end(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def totals(self) -> dict[str, dict[str, float]]:
+        """The number of spans and their total duration, in seconds, per span name"""
+        totals = {}
+        with self._lock:
+            for span in self.spans:
+                t = totals.setdefault(span.name, {"count": 0, "duration": 0.0})
+                t["count"] += 1
+                t["duration"] += span.duration
+        return totals
+
+
+class JsonLinesExporter(Tracer):
+    """Writes each ended span as a line of JSON to a file, or file object, such as ``sys.stderr``"""
+
+    def __init__(self, destination: Path | str | IO[str]):
+        if isinstance(destination, (Path, str)):
+            self._file = open(destination, "a")
+            self._close = True
+        else:
+            self._file = destination
+            self._close = False
+        self._lock = threading.Lock()
+
+    def on_end(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._close:
+            self._file.close()
+
+
+def add_tracer(tracer: Tracer) -> None:
+    """Passes spans to tracer from now on"""
+    with _tracers_lock:
+        _tracers.append(tracer)
+
+
+def remove_tracer(tracer: Tracer) -> None:
+    """Stops passing spans to tracer"""
+    with _tracers_lock:
+        if tracer in _tracers:
+            _tracers.remove(tracer)
+
+
+@contextmanager
+def tracing(tracer: Tracer) -> Iterator[Tracer]:
+    """Passes spans to tracer within the block, closing it afterwards if it can be closed"""
+    add_tracer(tracer)
+    try:
+        yield tracer
+    finally:
+        remove_tracer(tracer)
+        if hasattr(tracer, "close"):
+            tracer.close()
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Span]:
+    """Times the block as a span with the given name and attributes.
+
+    Attributes may be added within the block with ``Span.set()``. An exception raised within the block is recorded as
+    the span's error and re-raised."""
+    parent = _current_span.get()
+    s = Span(name, parent, **attributes)
+    tracers = list(_tracers)
+    for tracer in tracers:
+        tracer.on_start(s)
+
+    token = _current_span.set(s)
+    try:
+        yield s
+    except GeneratorExit:
+        raise  # a streamed result that wasn't read to the end, not an error
+    except BaseException as e:
+        s.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            pass  # ended in another context, e.g. when a streaming generator is garbage collected
+        s.duration = s.elapsed()
+        for tracer in tracers:
+            tracer.on_end(s)
+
+
+def traced(name: str) -> Callable:
+    """Decorates a function so that each call is timed as a span with the given name"""
+
+    def decorator(f):
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return f(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def current_span() -> Span | None:
+    """The innermost open span in this thread, if any"""
+    return _current_span.get()
@@ -1,22 +1,27 @@
 """Utilities used by the other modules."""
 
+import gzip
 import json
 import pickle
+import re
+import socket
+import threading
+import time
 import warnings
 from contextlib import contextmanager
 from enum import Enum
 from pathlib import Path
-from typing import Union
+from typing import TYPE_CHECKING, Iterable, Iterator, Union
+from typing import Literal as LiteralType
 
 import httpx
-from rdflib import BNode, Dataset, Graph, Literal, Namespace, URIRef
-from sparqlib import (
-    QuerySubType,
-    SparqlStatementType,
-    SparqlType,
-    UpdateSubType,
-    statement_type_from_string,
-)
+from rdflib import XSD, BNode, Dataset, Graph, Literal, Namespace, URIRef
+
+from kurra.tracing import span, traced
+
+if TYPE_CHECKING:
+    # sparqlib builds its parsers on import, which takes seconds, so it is imported only when a query is classified
+    from sparqlib import SparqlStatementType
 
 # Canonical RDFLib format codes are used as the keys in the following maps.  A
 # few serializers (pretty-xml and longturtle) have no distinct file syntax, so
@@ -148,14 +153,34 @@ def _suppress_rdflib_dataset_deprecations():
 
 def _parse_graph(source=None, *, data=None, format=None) -> Graph:
     """Parse a context-less graph while isolating RDFLib compatibility warnings."""
-    with _suppress_rdflib_dataset_deprecations():
-        return Graph().parse(source=source, data=data, format=format)
+    with (
+        span(
+            "rdf.parse",
+            source=str(source) if source is not None else None,
+            format=format,
+            characters=len(data) if data is not None else None,
+        ) as s,
+        _suppress_rdflib_dataset_deprecations(),
+    ):
+        g = Graph().parse(source=source, data=data, format=format)
+        s.set(triples=len(g))
+        return g
 
 
 def _parse_dataset(source=None, *, data=None, format=None) -> Dataset:
     """Parse a dataset while isolating RDFLib compatibility warnings."""
-    with _suppress_rdflib_dataset_deprecations():
-        return Dataset().parse(source=source, data=data, format=format)
+    with (
+        span(
+            "rdf.parse",
+            source=str(source) if source is not None else None,
+            format=format,
+            characters=len(data) if data is not None else None,
+        ) as s,
+        _suppress_rdflib_dataset_deprecations(),
+    ):
+        d = Dataset().parse(source=source, data=data, format=format)
+        s.set(triples=len(d))
+        return d
 
 
 def _serialize_dataset(
@@ -165,7 +190,10 @@ def _serialize_dataset(
     format: str = "trig",
 ) -> str | None:
     """Serialize a dataset while isolating RDFLib compatibility warnings."""
-    with _suppress_rdflib_dataset_deprecations():
+    with (
+        span("rdf.serialize", format=format, triples=len(dataset)),
+        _suppress_rdflib_dataset_deprecations(),
+    ):
         return dataset.serialize(destination=destination, format=format)
 
 
@@ -226,7 +254,8 @@ def load_graph(
                 gl = source.glob("*.ttl")
             for f in gl:
                 if f.is_file():
-                    g.parse(f)
+                    with span("rdf.parse", source=str(f), format="turtle"):
+                        g.parse(f)
             return g
         raise FileNotFoundError(f"Graph path does not exist: {source}")
 
@@ -317,6 +346,219 @@ def render_sparql_result(
         return output
 
 
+class RequestCancelledError(Exception):
+    """Raised when an HTTP request is aborted by cancelling its Deadline."""
+
+
+class Deadline:
+    """An overall time limit for an operation that may span several HTTP requests, such as a query and its fallback.
+
+    Per-request timeouts are capped by the time remaining and in-flight response streams are aborted when the
+    deadline passes or when ``cancel()`` is called, from any thread.
+    """
+
+    def __init__(self, seconds: float | None = None):
+        self.seconds = seconds
+        self.expires = None if seconds is None else time.monotonic() + seconds
+        self.cancelled = False
+        self._lock = threading.Lock()
+        self._in_flight = set()
+
+    def remaining(self) -> float | None:
+        """Seconds left before the deadline, or None if there is no limit"""
+        if self.expires is None:
+            return None
+        return max(self.expires - time.monotonic(), 0.0)
+
+    def check(self) -> None:
+        """Raises if the operation has been cancelled or has run out of time"""
+        if self.cancelled:
+            raise RequestCancelledError("The request was cancelled")
+        if self.expires is not None and time.monotonic() >= self.expires:
+            raise TimeoutError(f"Deadline of {self.seconds} seconds exceeded")
+
+    def cancel(self) -> None:
+        """Cancels the operation, aborting any response streams still being read"""
+        with self._lock:
+            self.cancelled = True
+            for response in list(self._in_flight):
+                _abort_response(response)
+
+    def timeout(
+        self,
+        timeout: float | httpx.Timeout | None,
+        http_client: httpx.Client,
+    ) -> httpx.Timeout:
+        """The timeout for the next request: the given or client timeout, capped by the time remaining"""
+        t = httpx.Timeout(timeout) if timeout is not None else http_client.timeout
+        remaining = self.remaining()
+        if remaining is None:
+            return t
+
+        def _cap(v):
+            return remaining if v is None else min(v, remaining)
+
+        return httpx.Timeout(
+            connect=_cap(t.connect),
+            read=_cap(t.read),
+            write=_cap(t.write),
+            pool=_cap(t.pool),
+        )
+
+    def _register(self, response: httpx.Response) -> None:
+        with self._lock:
+            if self.cancelled:
+                _abort_response(response)
+            self._in_flight.add(response)
+
+    def _unregister(self, response: httpx.Response) -> None:
+        with self._lock:
+            self._in_flight.discard(response)
+
+
+def _abort_response(response: httpx.Response) -> None:
+    """Stops a response stream that may be blocked reading from the network in another thread"""
+    network_stream = response.extensions.get("network_stream")
+    sock = (
+        network_stream.get_extra_info("socket") if network_stream is not None else None
+    )
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+@contextmanager
+def stream_request(
+    http_client: httpx.Client,
+    method: str,
+    url: str,
+    deadline: Deadline | None = None,
+    timeout: float | httpx.Timeout | None = None,
+    **kwargs,
+):
+    """Sends an HTTP request and yields its response, unread, for the body to be streamed within a Deadline.
+
+    If the deadline passes, or the operation is cancelled, while the body is being read, the stream is aborted and
+    TimeoutError or RequestCancelledError is raised."""
+    if deadline is None:
+        deadline = Deadline()
+
+    content = kwargs.get("content")
+    with span(
+        "http.request",
+        method=method,
+        url=str(url),
+        bytes_sent=len(content) if isinstance(content, (str, bytes)) else None,
+    ) as s:
+        deadline.check()
+        with http_client.stream(
+            method, url, timeout=deadline.timeout(timeout, http_client), **kwargs
+        ) as r:
+            s.set(status_code=r.status_code, time_to_headers=s.elapsed())
+            deadline._register(r)
+            expired = threading.Event()
+
+            def _expire():
+                expired.set()
+                _abort_response(r)
+
+            remaining = deadline.remaining()
+            timer = None
+            if remaining is not None:
+                timer = threading.Timer(remaining, _expire)
+                timer.daemon = True
+                timer.start()
+            try:
+                yield r
+            except Exception as e:
+                # errors from reading, or parsing, an aborted stream are due to the deadline
+                if (
+                    isinstance(e, httpx.TransportError)
+                    or expired.is_set()
+                    or deadline.cancelled
+                ):
+                    deadline.check()
+                raise
+            finally:
+                if timer is not None:
+                    timer.cancel()
+                deadline._unregister(r)
+                s.set(bytes_received=r.num_bytes_downloaded)
+
+        # an aborted stream may end early rather than raise, so the body is incomplete
+        if expired.is_set() or deadline.cancelled:
+            deadline.check()
+
+
+def send_request(
+    http_client: httpx.Client,
+    method: str,
+    url: str,
+    deadline: Deadline | None = None,
+    timeout: float | httpx.Timeout | None = None,
+    **kwargs,
+) -> httpx.Response:
+    """Sends an HTTP request and reads its response within a Deadline.
+
+    The response body is streamed so that a slow server, or a cancelled operation, cannot hold the caller beyond the
+    deadline. The returned response is fully read."""
+    with stream_request(http_client, method, url, deadline, timeout, **kwargs) as r:
+        body = b"".join(r.iter_bytes())
+
+    # the body is already decoded so drop the headers that describe its transfer
+    headers = [
+        (k, v)
+        for k, v in r.headers.multi_items()
+        if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")
+    ]
+    return httpx.Response(
+        r.status_code,
+        headers=headers,
+        content=body,
+        request=r.request,
+        extensions={"http_version": r.extensions.get("http_version", b"HTTP/1.1")},
+    )
+
+
+def compress(
+    content: str | bytes,
+    encoding: LiteralType["gzip", "zstd"] = "gzip",
+    level: int | None = None,
+) -> bytes:
+    """Compresses an HTTP request body for sending with a ``Content-Encoding`` header of the given encoding.
+
+    Args:
+        content: the body to compress. Strings are UTF-8 encoded first
+        encoding: 'gzip' or 'zstd'. zstd needs Python 3.14 or the zstandard package - ``pip install kurra[zstd]``
+        level: the compression level. Defaults to 6 for gzip and 3 for zstd, which favour speed over size
+    """
+    if isinstance(content, str):
+        content = content.encode()
+
+    if encoding == "gzip":
+        return gzip.compress(content, compresslevel=6 if level is None else level)
+    elif encoding == "zstd":
+        try:
+            from compression import zstd
+
+            return zstd.compress(content, level=3 if level is None else level)
+        except ImportError:
+            pass
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError(
+                'You selected "zstd" compression but the zstandard Python package is not installed.'
+            )
+        return zstandard.ZstdCompressor(level=3 if level is None else level).compress(
+            content
+        )
+    else:
+        raise ValueError(f"compression {encoding} must be either 'gzip' or 'zstd'")
+
+
 def make_httpx_client(
     sparql_username: str = None,
     sparql_password: str = None,
@@ -330,12 +572,14 @@ def make_httpx_client(
 
 
 def convert_sparql_json_to_python(
-    j: Union[str, bytes, httpx.Response], return_bindings_only=False
+    j: Union[str, bytes, dict, httpx.Response], return_bindings_only=False
 ) -> {}:
     if type(j) == str:
         r = json.loads(j)
     elif type(j) == bytes:
         r = json.loads(j.decode())
+    elif type(j) == dict:
+        r = j
     elif type(j) == httpx.Response:
         r = j.json()
 
@@ -361,8 +605,129 @@ def convert_sparql_json_to_python(
         return r
 
 
+SPARQL_TSV_MEDIA_TYPE = "text/tab-separated-values"
+
+_TSV_ESCAPE = re.compile(r"\\(u[0-9A-Fa-f]{4}|U[0-9A-Fa-f]{8}|.)")
+_TSV_ESCAPES = {
+    "t": "\t",
+    "b": "\b",
+    "n": "\n",
+    "r": "\r",
+    "f": "\f",
+    '"': '"',
+    "'": "'",
+    "\\": "\\",
+}
+
+
+def _unescape_tsv_string(match: re.Match) -> str:
+    escape = match.group(1)
+    if len(escape) > 1:
+        return chr(int(escape[1:], 16))
+    return _TSV_ESCAPES.get(escape, escape)
+
+
+def sparql_tsv_term_to_python(term: str):
+    """Converts an RDF term, as written in SPARQL TSV results, to the value
+    [`convert_sparql_json_to_python()`][kurra.utils.convert_sparql_json_to_python] gives for the same term.
+
+    IRIs become strings, literals their Python values and blank nodes remain ``{"type": "bnode", "value": ...}``
+    dicts."""
+    first = term[0]
+    if first == "<":
+        return term[1:-1]
+    elif first == '"':
+        end = term.rindex('"')
+        value = term[1:end]
+        if "\\" in value:
+            value = _TSV_ESCAPE.sub(_unescape_tsv_string, value)
+        if term.startswith("^^", end + 1):
+            return Literal(value, datatype=term[end + 4 : -1]).toPython()
+        return value  # plain and language-tagged literals are both given as strings
+    elif term.startswith("_:"):
+        return {"type": "bnode", "value": term[2:]}
+    elif term in ("true", "false"):
+        return term == "true"
+    # the remaining terms are numbers in their Turtle short forms
+    elif "e" in term or "E" in term:
+        return Literal(term, datatype=XSD.double).toPython()
+    elif "." in term:
+        return Literal(term, datatype=XSD.decimal).toPython()
+    else:
+        return int(term)
+
+
+def split_lines(chunks: Iterable[str]) -> Iterator[str]:
+    """Splits streamed text, e.g. from ``httpx.Response.iter_text()``, into lines, dropping the line ends.
+
+    Lines end at ``\\n`` or ``\\r\\n`` only. Unlike with ``str.splitlines()`` and ``httpx.Response.iter_lines()``,
+    other Unicode line breaks, such as U+2028, which may appear unescaped in SPARQL TSV and N-Triples literals, do
+    not end lines."""
+    pending = []
+    for chunk in chunks:
+        *lines, last = chunk.split("\n")
+        if lines:
+            lines[0] = "".join(pending) + lines[0]
+            pending = []
+            for line in lines:
+                yield line.removesuffix("\r")
+        pending.append(last)
+
+    tail = "".join(pending)
+    if tail:
+        yield tail.removesuffix("\r")
+
+
+def parse_sparql_tsv(lines: Iterable[str]) -> tuple[list[str], Iterator[dict]]:
+    """Parses SPARQL SELECT results in the TSV format, line by line.
+
+    Args:
+        lines: the lines of the results, e.g. from [`split_lines()`][kurra.utils.split_lines] or an open file
+
+    Returns:
+        tuple[list[str], Iterator[dict]]: The result variables and an iterator of result rows, keyed by variable,
+            with values as per [`sparql_tsv_term_to_python()`][kurra.utils.sparql_tsv_term_to_python]. Unbound
+            variables are left out of rows, as they are in SPARQL JSON results
+    """
+    lines = iter(lines)
+    header = next(lines, "").rstrip("\r\n")
+    variables = [v[1:] for v in header.split("\t")] if header else []
+
+    def rows():
+        for line in lines:
+            line = line.rstrip("\r\n")
+            if line == "":
+                continue
+            yield {
+                k: sparql_tsv_term_to_python(v)
+                for k, v in zip(variables, line.split("\t"))
+                if v != ""
+            }
+
+    return variables, rows()
+
+
+def convert_sparql_tsv_to_python(
+    t: Union[str, bytes, httpx.Response], return_bindings_only=False
+) -> Union[dict, list[dict]]:
+    """Converts SPARQL TSV SELECT results to the same Python form as
+    [`convert_sparql_json_to_python()`][kurra.utils.convert_sparql_json_to_python]"""
+    if type(t) == str:
+        lines = split_lines([t])
+    elif type(t) == bytes:
+        lines = split_lines([t.decode()])
+    elif type(t) == httpx.Response:
+        lines = split_lines(t.iter_text())
+
+    variables, rows = parse_sparql_tsv(lines)
+    bindings = list(rows)
+    if return_bindings_only:
+        return bindings
+    return {"head": {"vars": variables}, "results": {"bindings": bindings}}
+
+
 def sparql_statement_return_type(
-    query: str, statement: SparqlStatementType | None = None
+    query: str, statement: "SparqlStatementType | None" = None
 ) -> str:
     statement = _ensure_statement_type(query, statement)
     if is_construct_or_describe_query(query, statement):
@@ -370,19 +735,23 @@ def sparql_statement_return_type(
     return "application/sparql-results+json"
 
 
-def statement_type_for_query(query: str) -> SparqlStatementType:
+def statement_type_for_query(query: str) -> "SparqlStatementType":
+    from sparqlib import statement_type_from_string
+
     return statement_type_from_string(query)
 
 
 def _ensure_statement_type(
-    query: str, statement: SparqlStatementType | None = None
-) -> SparqlStatementType:
+    query: str, statement: "SparqlStatementType | None" = None
+) -> "SparqlStatementType":
     return statement if statement is not None else statement_type_for_query(query)
 
 
 def is_construct_query(
-    query: str, statement: SparqlStatementType | None = None
+    query: str, statement: "SparqlStatementType | None" = None
 ) -> bool:
+    from sparqlib import QuerySubType, SparqlType
+
     statement = _ensure_statement_type(query, statement)
     return (
         statement.type == SparqlType.QUERY
@@ -390,7 +759,11 @@ def is_construct_query(
     )
 
 
-def is_describe_query(query: str, statement: SparqlStatementType | None = None) -> bool:
+def is_describe_query(
+    query: str, statement: "SparqlStatementType | None" = None
+) -> bool:
+    from sparqlib import QuerySubType, SparqlType
+
     statement = _ensure_statement_type(query, statement)
     return (
         statement.type == SparqlType.QUERY
@@ -398,21 +771,27 @@ def is_describe_query(query: str, statement: SparqlStatementType | None = None)
     )
 
 
-def is_select_query(query: str, statement: SparqlStatementType | None = None) -> bool:
+def is_select_query(query: str, statement: "SparqlStatementType | None" = None) -> bool:
+    from sparqlib import QuerySubType, SparqlType
+
     statement = _ensure_statement_type(query, statement)
     return (
         statement.type == SparqlType.QUERY and statement.subtype == QuerySubType.SELECT
     )
 
 
-def is_ask_query(query: str, statement: SparqlStatementType | None = None) -> bool:
+def is_ask_query(query: str, statement: "SparqlStatementType | None" = None) -> bool:
+    from sparqlib import QuerySubType, SparqlType
+
     statement = _ensure_statement_type(query, statement)
     return statement.type == SparqlType.QUERY and statement.subtype == QuerySubType.ASK
 
 
 def is_construct_or_describe_query(
-    query: str, statement: SparqlStatementType | None = None
+    query: str, statement: "SparqlStatementType | None" = None
 ) -> bool:
+    from sparqlib import QuerySubType, SparqlType
+
     statement = _ensure_statement_type(query, statement)
     return statement.type == SparqlType.QUERY and statement.subtype in {
         QuerySubType.CONSTRUCT,
@@ -421,8 +800,10 @@ def is_construct_or_describe_query(
 
 
 def is_select_or_ask_query(
-    query: str, statement: SparqlStatementType | None = None
+    query: str, statement: "SparqlStatementType | None" = None
 ) -> bool:
+    from sparqlib import QuerySubType, SparqlType
+
     statement = _ensure_statement_type(query, statement)
     return statement.type == SparqlType.QUERY and statement.subtype in {
         QuerySubType.SELECT,
@@ -430,12 +811,16 @@ def is_select_or_ask_query(
     }
 
 
-def is_update_query(query: str, statement: SparqlStatementType | None = None) -> bool:
+def is_update_query(query: str, statement: "SparqlStatementType | None" = None) -> bool:
+    from sparqlib import SparqlType
+
     statement = _ensure_statement_type(query, statement)
     return statement.type == SparqlType.UPDATE
 
 
-def is_drop_update(query: str, statement: SparqlStatementType | None = None) -> bool:
+def is_drop_update(query: str, statement: "SparqlStatementType | None" = None) -> bool:
+    from sparqlib import SparqlType, UpdateSubType
+
     statement = _ensure_statement_type(query, statement)
     return (
         statement.type == SparqlType.UPDATE and statement.subtype == UpdateSubType.DROP
@@ -473,6 +858,26 @@ def make_sparql_dataframe(sparql_result: dict):
     return df
 
 
+def make_sparql_tsv_dataframe(t: Union[str, bytes, httpx.Response]):
+    """Makes a DataFrame from SPARQL TSV SELECT results, with the same values as
+    [`make_sparql_dataframe()`][kurra.utils.make_sparql_dataframe] gives for JSON results"""
+    try:
+        from pandas import DataFrame
+    except ImportError:
+        raise ValueError(
+            'You selected the output format "dataframe" but the pandas Python package is not installed.'
+        )
+
+    r = convert_sparql_tsv_to_python(t)
+    return DataFrame.from_records(
+        [
+            {k: v["value"] if isinstance(v, dict) else v for k, v in row.items()}
+            for row in r["results"]["bindings"]
+        ],
+        columns=r["head"]["vars"],
+    )
+
+
 def add_namespaces_to_query_or_data(q: str, namespaces: dict):
     preamble = ""
     for k, v in namespaces.items():
@@ -481,6 +886,7 @@ def add_namespaces_to_query_or_data(q: str, namespaces: dict):
     return preamble + q
 
 
+@traced("system_graph.get")
 def get_system_graph(
     system_graph_source: str | Path | Dataset | Graph = None,
     http_client: httpx.Client | None = None,
@@ -518,7 +924,9 @@ def get_system_graph(
             http_client = httpx.Client()
             close_http_client = True
 
-        r = http_client.get(
+        r = send_request(
+            http_client,
+            "GET",
             str(system_graph_source),
             params={"graph": SYSTEM_GRAPH_IRI},
             headers={"Accept": "text/turtle"},
@@ -528,7 +936,7 @@ def get_system_graph(
             http_client.close()
 
         if r.is_success:
-            system_graph += Graph().parse(data=r.text, format="turtle")
+            system_graph += _parse_graph(data=r.text, format="turtle")
         else:
             return r.status_code
     elif system_graph_source and not system_graph_source.startswith("http"):
@@ -543,6 +951,7 @@ def get_system_graph(
     return system_graph
 
 
+@traced("system_graph.put")
 def put_system_graph(
     system_graph: Graph,
     system_graph_source: str | Path | Dataset | Graph = None,
@@ -558,7 +967,10 @@ def put_system_graph(
             d.add_graph(system_graph)
             _serialize_dataset(d, destination=system_graph_source)
         else:
-            system_graph.serialize(destination=system_graph_source, format="longturtle")
+            with span("rdf.serialize", format="longturtle", triples=len(system_graph)):
+                system_graph.serialize(
+                    destination=system_graph_source, format="longturtle"
+                )
 
         return None
     elif isinstance(system_graph_source, Graph):
@@ -575,11 +987,16 @@ def put_system_graph(
             http_client = httpx.Client()
             close_http_client = True
 
-        r = http_client.put(
+        with span("rdf.serialize", format="turtle", triples=len(system_graph)):
+            content = system_graph.serialize(format="text/turtle")
+
+        r = send_request(
+            http_client,
+            "PUT",
             system_graph_source,
             params={"graph": SYSTEM_GRAPH_IRI},
             headers={"Content-Type": "text/turtle"},
-            content=system_graph.serialize(format="text/turtle"),
+            content=content,
         )
 
         if close_http_client:
@@ -598,7 +1015,7 @@ def put_system_graph(
 def make_system_specific_sparql_endpoint(
     sparql_endpoint: str,
     q: str = None,
-    statement: SparqlStatementType = None,
+    statement: "SparqlStatementType" = None,
     gsp_query_type: GspType = None,
 ) -> str:
     """Alters a given SPARQL Endpoint to meet specific system requirements.
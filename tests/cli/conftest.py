@@ -1,4 +1,6 @@
+import threading
 import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 
 import docker
@@ -61,3 +63,34 @@ def http_client(request: pytest.FixtureRequest):
 
     request.addfinalizer(cleanup)
     return _http_client
+
+
+@pytest.fixture(scope="function")
+def rdf_sparql_endpoint():
+    """A local endpoint that answers every query with a fixed RDF document in the media type asked for"""
+    documents = {
+        "text/turtle": b"# as sent by the server\nPREFIX ex: <http://example.com/>\nex:a ex:b ex:c .\n",
+        "application/n-triples": b"<http://example.com/a> <http://example.com/b> <http://example.com/c> .\n",
+    }
+
+    class RDFHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            media_type = self.headers["Accept"].split(",")[0].split(";")[0].strip()
+            body = documents.get(media_type, documents["text/turtle"])
+            self.send_response(200)
+            self.send_header(
+                "Content-Type",
+                media_type if media_type in documents else "text/turtle",
+            )
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RDFHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/sparql"
+    server.shutdown()
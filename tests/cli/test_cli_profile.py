@@ -0,0 +1,47 @@
+import pstats
+from pathlib import Path
+
+from typer.testing import CliRunner
+
+from kurra.cli import app
+from kurra.cli.profile import PhaseProfiler
+from kurra.tracing import span
+
+runner = CliRunner()
+
+LANG_TEST_VOC = Path(__file__).parent.parent.resolve() / "sparql" / "language-test.ttl"
+
+
+def test_profile(tmp_path):
+    profile_file = tmp_path / "kurra.prof"
+    result = runner.invoke(
+        app,
+        [
+            "--profile-file",
+            str(profile_file),
+            "sparql",
+            str(LANG_TEST_VOC),
+            "SELECT * WHERE { ?s ?p ?o } LIMIT 3",
+            "-f",
+            "json",
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    for phase in ["startup", "load/parse", "query", "other", "total"]:
+        assert phase in result.output
+    assert pstats.Stats(str(profile_file)).total_calls > 0
+
+
+def test_nested_phases_are_not_counted_twice():
+    profiler = PhaseProfiler(0.0)
+    profiler.start()
+    with span("sparql.query"):
+        with span("http.request"):
+            pass
+        with span("gsp.get"):  # not a phase itself, so counted against the query
+            pass
+    profiler.stop()
+
+    assert profiler.phases["query"]["count"] == 2
+    assert profiler.phases["network"]["count"] == 1
+    assert "gsp.get" not in profiler.phases
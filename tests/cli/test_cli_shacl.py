@@ -33,7 +33,16 @@ def test_validate_cli_shacl_types(tmp_path, monkeypatch, shacl_value, expected_t
 
     received = {}
 
-    def fake_validate(data, shacl, hide_warnings=False):
+    def fake_validate(
+        data,
+        shacl,
+        hide_warnings=False,
+        max_workers=1,
+        incremental=False,
+        max_results=None,
+        fail_fast=False,
+        prune=False,
+    ):
         received["data"] = data
         received["shacl"] = shacl
         return True, Graph(), "", Graph()
@@ -139,6 +148,70 @@ def test_validate_cli_rdf_output(
     assert unexpected_value not in result.output
 
 
+@pytest.mark.parametrize("workers", ["1", "2"])
+def test_validate_cli_per_file(workers):
+    SHACL_TEST_DIR = Path(__file__).parent.parent.resolve() / "shacl"
+    args = [
+        "shacl",
+        "validate",
+        str(SHACL_TEST_DIR / "vocab-valid.ttl"),
+        str(SHACL_TEST_DIR / "vocab-invalid.ttl"),
+        "--shacl",
+        str(SHACL_TEST_DIR / "validator-vocpub-410.ttl"),
+        "--per-file",
+        "--workers",
+        workers,
+    ]
+
+    result = runner.invoke(app, args)
+    assert result.exit_code == 1
+    assert "Files: 2, Valid: 1, Not valid: 1" in result.output
+
+    result = runner.invoke(app, [*args, "--format", "rdf"])
+    assert result.exit_code == 1
+    assert f"# {SHACL_TEST_DIR / 'vocab-valid.ttl'}" in result.output
+    assert f"# {SHACL_TEST_DIR / 'vocab-invalid.ttl'}" in result.output
+
+    result = runner.invoke(app, args[:3] + args[4:])
+    assert result.exit_code == 0
+
+
+def test_validate_cli_limits():
+    SHACL_TEST_DIR = Path(__file__).parent.parent.resolve() / "shacl"
+    args = [
+        "shacl",
+        "validate",
+        str(SHACL_TEST_DIR / "vocab-invalid2.ttl"),
+        "--shacl",
+        str(SHACL_TEST_DIR / "validator-vocpub-410.ttl"),
+    ]
+
+    result = runner.invoke(app, args)
+    assert result.exit_code == 0
+
+    result = runner.invoke(app, [*args, "--max-results", "1"])
+    assert result.exit_code == 0
+    assert "Only the first 1 results are shown" in result.output
+
+    result = runner.invoke(app, [*args, "--fail-fast"])
+    assert result.exit_code == 1
+    assert "The data is NOT valid" in result.output
+
+    result = runner.invoke(app, [*args, "--fail-fast", "--incremental"])
+    assert result.exit_code == 2
+
+    # results about blank nodes are described from the pruned data as from all of it
+    pruned = runner.invoke(app, [*args, "--prune"])
+    assert pruned.exit_code == 0
+    full = runner.invoke(app, args)
+    # blank node labels differ between runs, so only the shape of the outputs is compared
+    assert pruned.output.splitlines()[0] == full.output.splitlines()[0]
+    assert len(pruned.output.splitlines()) == len(full.output.splitlines())
+    pruned = runner.invoke(app, [*args, "--prune", "--per-file"])
+    assert pruned.exit_code == 1
+    assert "Not valid: 1" in pruned.output
+
+
 def shacl_valid():
     SHACL_TEST_DIR = Path(__file__).parent.parent.resolve() / "shacl"
 
@@ -231,6 +231,68 @@ https://example.com/demo-vocabs/language-test/three-lang"""
     )
 
 
+def test_return_tsv_and_ndjson(tmp_path):
+    source = tmp_path / "data.ttl"
+    source.write_text(
+        dedent(
+            """
+            PREFIX ex: <https://example.com/>
+
+            ex:a ex:label "tab\\there"@en ; ex:n 1 .
+            ex:b ex:n 2 .
+            """
+        )
+    )
+    q = "PREFIX ex: <https://example.com/> SELECT ?s ?label ?n WHERE { ?s ex:n ?n OPTIONAL { ?s ex:label ?label } } ORDER BY ?s"
+
+    result = runner.invoke(app, ["sparql", str(source), q, "-f", "tsv"])
+    assert result.exit_code == 0, result.output
+    assert result.output.splitlines() == [
+        "s\tlabel\tn",
+        "https://example.com/a\ttab\\there\t1",
+        "https://example.com/b\t\t2",
+    ]
+
+    output = tmp_path / "results.ndjson"
+    result = runner.invoke(
+        app, ["sparql", str(source), q, "-f", "ndjson", "-o", str(output)]
+    )
+    assert result.exit_code == 0, result.output
+    rows = [json.loads(line) for line in output.read_text().splitlines()]
+    assert rows == [
+        {"s": "https://example.com/a", "label": "tab\there", "n": 1},
+        {"s": "https://example.com/b", "n": 2},
+    ]
+
+    # only SELECT results are rows
+    for response_format in ["tsv", "ndjson"]:
+        result = runner.invoke(
+            app, ["sparql", str(source), "ASK { ?s ?p ?o }", "-f", response_format]
+        )
+        assert result.exit_code == 2
+        assert "SELECT" in result.output
+
+
+def test_large_table_prints_csv(tmp_path, monkeypatch):
+    import kurra.cli.commands.sparql as sparql_command
+
+    monkeypatch.setattr(sparql_command, "TABLE_MAX_ROWS", 5)
+    source = tmp_path / "data.ttl"
+    source.write_text(
+        "PREFIX ex: <https://example.com/>\n"
+        + "".join(f"ex:s{i} ex:n {i} .\n" for i in range(10))
+    )
+
+    result = runner.invoke(
+        app, ["sparql", str(source), "SELECT ?s ?n WHERE { ?s ?p ?n } ORDER BY ?n"]
+    )
+    assert result.exit_code == 0, result.output
+    lines = result.stdout.splitlines()
+    assert lines[0] == "s,n"
+    assert len(lines) == 11
+    assert "printing them as CSV" in result.stderr
+
+
 def test_return_json_serializes_rdf_literal_values(tmp_path):
     source = tmp_path / "literal-values.ttl"
     source.write_text(
@@ -321,3 +383,108 @@ def test_drop(fuseki_container, http_client):
     assert get(SPARQL_ENDPOINT, TESTING_GRAPH, http_client=http_client)[0] == 404
     assert get(SPARQL_ENDPOINT, TESTING_GRAPH, http_client=http_client)[0] == 404
     assert result.output.strip() == "Operation completed successfully"
+
+
+def test_query_many_sources(tmp_path):
+    other = tmp_path / "other.ttl"
+    other.write_text(
+        """
+        PREFIX skos: <http://www.w3.org/2004/02/skos/core#>
+        <https://example.com/other> a skos:Concept .
+        """
+    )
+
+    result = runner.invoke(
+        app,
+        [
+            "sparql",
+            str(LANG_TEST_VOC),
+            "PREFIX skos: <http://www.w3.org/2004/02/skos/core#> SELECT ?c WHERE { ?c a skos:Concept }",
+            "--source",
+            str(other),
+            "-f",
+            "json",
+        ],
+    )
+    assert result.exit_code == 0
+    rows = json.loads(result.output)["results"]["bindings"]
+    assert {"c": "https://example.com/other", "source": str(other)} in rows
+    assert {
+        "c": "https://example.com/demo-vocabs/language-test/en-only",
+        "source": str(LANG_TEST_VOC),
+    } in rows
+
+    # ASK results have no variables to write as rows
+    result = runner.invoke(
+        app,
+        [
+            "sparql",
+            str(LANG_TEST_VOC),
+            "ASK { ?s ?p ?o }",
+            "-s",
+            str(other),
+            "-f",
+            "csv",
+        ],
+    )
+    assert result.exit_code == 0
+
+
+def test_construct_passthrough(rdf_sparql_endpoint, tmp_path):
+    q = "CONSTRUCT WHERE { ?s ?p ?o }"
+
+    # the server's Turtle is written as sent, comment and all, rather than parsed and re-serialized
+    output = tmp_path / "result.ttl"
+    result = runner.invoke(app, ["sparql", rdf_sparql_endpoint, q, "-o", str(output)])
+    assert result.exit_code == 0
+    assert output.read_text().startswith("# as sent by the server")
+
+    result = runner.invoke(app, ["sparql", rdf_sparql_endpoint, q, "--format", "nt"])
+    assert result.exit_code == 0
+    assert result.output == (
+        "<http://example.com/a> <http://example.com/b> <http://example.com/c> .\n"
+    )
+
+    result = runner.invoke(
+        app, ["sparql", rdf_sparql_endpoint, q, "--format", "not-a-format"]
+    )
+    assert result.exit_code != 0
+
+
+def test_select_to_file(tmp_path):
+    output = tmp_path / "result.json"
+    q = "PREFIX skos: <http://www.w3.org/2004/02/skos/core#> SELECT ?c WHERE { ?c a skos:Concept }"
+
+    result = runner.invoke(app, ["sparql", str(LANG_TEST_VOC), q, "-o", str(output)])
+    assert result.exit_code != 0
+
+    result = runner.invoke(
+        app, ["sparql", str(LANG_TEST_VOC), q, "-o", str(output), "-f", "json"]
+    )
+    assert result.exit_code == 0
+    assert len(json.loads(output.read_text())["results"]["bindings"]) == 7
+
+
+def test_bench():
+    result = runner.invoke(
+        app,
+        [
+            "bench",
+            str(LANG_TEST_VOC),
+            "SELECT * WHERE { ?s ?p ?o } LIMIT 3",
+            "-n",
+            "3",
+            "-f",
+            "json",
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    report = json.loads(result.output)
+    assert report["runs"] == 3
+    assert report["result_size"] == 3
+
+    result = runner.invoke(
+        app, ["bench", str(LANG_TEST_VOC), "SELECT * WHERE { ?s ?p ?o } LIMIT 3"]
+    )
+    assert result.exit_code == 0, result.output
+    assert "p95" in result.output
@@ -0,0 +1,88 @@
+import importlib
+import subprocess
+import sys
+import time
+
+import pytest
+import typer
+from typer.testing import CliRunner
+
+from kurra.cli import app
+from kurra.cli.app import COMMANDS
+
+# seconds allowed for kurra --version, including starting Python. Typically well under half of this
+STARTUP_BUDGET = 1.0
+
+HEAVY_MODULES = [
+    "httpx",
+    "kurra.labels",
+    "kurra.shacl",
+    "kurra.sparql",
+    "pyshacl",
+    "rdflib",
+    "sparqlib",
+    "srl",
+]
+
+
+def run_kurra(*args: str) -> list[str]:
+    """Runs kurra in a new process, returning the heavy modules it imported"""
+    script = f"""
+import sys
+from kurra.cli import app
+try:
+    app({list(args)!r})
+except SystemExit:
+    pass
+print(",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))
+"""
+    result = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    )
+    return [m for m in result.stdout.splitlines()[-1].split(",") if m]
+
+
+def test_version_imports_no_commands():
+    assert run_kurra("--version") == []
+
+
+def test_commands_import_only_what_they_need(tmp_path):
+    data = tmp_path / "a.ttl"
+    data.write_text(
+        "<http://example.com/a> <http://example.com/b> <http://example.com/c> ."
+    )
+
+    imported = run_kurra("file", "merge", str(data))
+    assert "rdflib" in imported
+    assert not {"kurra.sparql", "kurra.shacl", "pyshacl", "sparqlib"} & set(imported)
+
+
+def test_startup_budget():
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", "from kurra.cli import app; app(['--version'])"],
+        capture_output=True,
+        check=False,
+    )
+    assert time.perf_counter() - start < STARTUP_BUDGET
+
+
+@pytest.mark.parametrize("name", COMMANDS)
+def test_lazy_commands_help(name):
+    # the help of a lazily loaded command is that of the command added to the app as usual
+    eager = typer.Typer(
+        context_settings={"help_option_names": ["-h", "--help"]},
+        add_completion=False,
+    )
+    eager.callback()(lambda: None)
+    module = importlib.import_module(COMMANDS[name])
+    if len(module.app.registered_commands) == 1 and not module.app.registered_groups:
+        eager.add_typer(module.app)
+    else:
+        eager.add_typer(module.app, name=name)
+
+    runner = CliRunner()
+    lazy = runner.invoke(app, [name, "--help"])
+    assert lazy.exit_code == 0
+    assert lazy.output == runner.invoke(eager, [name, "--help"]).output
+    assert "--install-completion" not in lazy.output
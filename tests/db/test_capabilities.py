@@ -0,0 +1,194 @@
+import gzip
+import json
+
+import httpx
+import pytest
+from rdflib import Graph
+
+from kurra.db import capabilities
+from kurra.db.capabilities import (
+    forget,
+    get_capabilities,
+    load_capabilities,
+    remember,
+)
+from kurra.db.gsp import upload
+from kurra.db.sparql import construct, query
+
+SPARQL_ENDPOINT = "http://example.com/sparql"
+
+
+@pytest.fixture(autouse=True)
+def clean_capabilities(monkeypatch):
+    monkeypatch.setattr(capabilities, "_persist_path", None)
+    forget()
+    yield
+    forget()
+
+
+@pytest.mark.parametrize("status", [405, 415, 501])
+def test_get_only_endpoint_is_remembered(status):
+    requests = []
+
+    def handler(request):
+        requests.append(request.method)
+        if request.method == "POST":
+            return httpx.Response(status)
+        if b"CONSTRUCT" in request.url.query:
+            return httpx.Response(
+                200, text="", headers={"Content-Type": "application/n-triples"}
+            )
+        return httpx.Response(200, json={"head": {}, "boolean": True})
+
+    with httpx.Client(transport=httpx.MockTransport(handler)) as http_client:
+        query(SPARQL_ENDPOINT, "ASK {?s ?p ?o}", http_client=http_client)
+        assert requests == ["POST", "GET"]
+        assert get_capabilities(SPARQL_ENDPOINT)["query_method"] == "GET"
+
+        query(SPARQL_ENDPOINT, "ASK {?s ?p ?o}", http_client=http_client)
+        assert requests == ["POST", "GET", "GET"]
+
+        # streamed results fall back in the same way
+        forget()
+        requests.clear()
+        construct(
+            SPARQL_ENDPOINT, "CONSTRUCT WHERE {?s ?p ?o}", http_client=http_client
+        )
+        assert requests == ["POST", "GET"]
+
+
+def test_bad_query_is_not_retried_once_post_is_known():
+    requests = []
+
+    def handler(request):
+        requests.append(request.method)
+        if b"broken" in request.content:
+            return httpx.Response(400, text="Parse error")
+        return httpx.Response(
+            200,
+            json={"head": {}, "boolean": True},
+            headers={"Content-Type": "application/sparql-results+json"},
+        )
+
+    with httpx.Client(transport=httpx.MockTransport(handler)) as http_client:
+        query(SPARQL_ENDPOINT, "ASK {?s ?p ?o}", http_client=http_client)
+        assert get_capabilities(SPARQL_ENDPOINT) == {
+            "query_method": "POST",
+            "results_media_types": ["application/sparql-results+json"],
+        }
+
+        with pytest.raises(RuntimeError):
+            query(SPARQL_ENDPOINT, "ASK {?s ?p <urn:broken>}", http_client=http_client)
+        assert requests == ["POST", "POST"]
+
+
+def test_server_error_is_not_retried_with_get():
+    requests = []
+
+    def handler(request):
+        requests.append(request.method)
+        if len(requests) == 1:
+            return httpx.Response(500, text="Busy")
+        return httpx.Response(
+            200,
+            json={"head": {}, "boolean": True},
+            headers={"Content-Type": "application/sparql-results+json"},
+        )
+
+    with httpx.Client(transport=httpx.MockTransport(handler)) as http_client:
+        with pytest.raises(RuntimeError):
+            query(SPARQL_ENDPOINT, "ASK {?s ?p ?o}", http_client=http_client)
+        assert get_capabilities(SPARQL_ENDPOINT) == {}
+
+        query(SPARQL_ENDPOINT, "ASK {?s ?p ?o}", http_client=http_client)
+        assert requests == ["POST", "POST"]
+        assert get_capabilities(SPARQL_ENDPOINT)["query_method"] == "POST"
+
+
+def test_capabilities_persistence(tmp_path):
+    cache = tmp_path / "endpoints.json"
+    assert load_capabilities(cache) == {}
+
+    remember(SPARQL_ENDPOINT, query_method="GET", results_media_types=["text/csv"])
+    remember(SPARQL_ENDPOINT, results_media_types=["text/csv", "text/turtle"])
+    assert json.loads(cache.read_text()) == {
+        SPARQL_ENDPOINT: {
+            "query_method": "GET",
+            "results_media_types": ["text/csv", "text/turtle"],
+        }
+    }
+
+    capabilities._capabilities.clear()
+    assert load_capabilities(cache)[SPARQL_ENDPOINT]["query_method"] == "GET"
+
+    forget(SPARQL_ENDPOINT)
+    assert json.loads(cache.read_text()) == {}
+
+
+def test_compressed_upload():
+    bodies = []
+
+    def handler(request):
+        assert request.headers["Content-Encoding"] == "gzip"
+        bodies.append(gzip.decompress(request.content).decode())
+        return httpx.Response(204)
+
+    with httpx.Client(transport=httpx.MockTransport(handler)) as http_client:
+        upload(
+            SPARQL_ENDPOINT,
+            "<http://example.com/a> <http://example.com/b> <http://example.com/c> .",
+            "http://example.com/g",
+            http_client=http_client,
+            compression="gzip",
+        )
+
+    assert len(Graph().parse(data=bodies[0], format="turtle")) == 1
+    assert get_capabilities(SPARQL_ENDPOINT)["compression"] == {"gzip": True}
+
+
+def test_rejected_compression_is_remembered():
+    encodings = []
+
+    def handler(request):
+        encodings.append(request.headers.get("Content-Encoding"))
+        if "Content-Encoding" in request.headers:
+            return httpx.Response(415)
+        return httpx.Response(204)
+
+    with httpx.Client(transport=httpx.MockTransport(handler)) as http_client:
+        for _ in range(2):
+            query(
+                SPARQL_ENDPOINT,
+                "INSERT DATA { <http://example.com/a> <http://example.com/b> 1 }",
+                http_client=http_client,
+                compression="gzip",
+            )
+
+    assert encodings == ["gzip", None, None]
+    assert get_capabilities(SPARQL_ENDPOINT)["compression"] == {"gzip": False}
+
+
+def test_compression_is_remembered_per_encoding():
+    pytest.importorskip("zstandard")
+    encodings = []
+
+    def handler(request):
+        encoding = request.headers.get("Content-Encoding")
+        encodings.append(encoding)
+        return httpx.Response(415 if encoding == "zstd" else 204)
+
+    with httpx.Client(transport=httpx.MockTransport(handler)) as http_client:
+        for compression in ["gzip", "zstd", "zstd", "gzip"]:
+            query(
+                SPARQL_ENDPOINT,
+                "INSERT DATA { <http://example.com/a> <http://example.com/b> 1 }",
+                http_client=http_client,
+                compression=compression,
+            )
+
+    # an endpoint taking gzip may still not take zstd
+    assert encodings == ["gzip", "zstd", None, None, "gzip"]
+    assert get_capabilities(SPARQL_ENDPOINT)["compression"] == {
+        "gzip": True,
+        "zstd": False,
+    }
@@ -0,0 +1,423 @@
+import threading
+from pathlib import Path
+
+import httpx
+import pyshacl
+import pytest
+from rdflib import Dataset, Graph, URIRef
+from rdflib.namespace import SH
+
+import kurra.shacl
+from kurra.db.shacl import validate
+
+SHACL_TESTS = Path(__file__).parent.parent / "shacl"
+
+DATA = """
+PREFIX ex: <http://example.com/>
+PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+
+ex:Student rdfs:subClassOf ex:Person .
+
+ex:a
+    a ex:Person ;
+    ex:name "A"@en , "B"@en ;
+    ex:age 30 ;
+    ex:code "AB12" ;
+    ex:status ex:active ;
+    ex:knows ex:b , ex:s ;
+    ex:start 5 ;
+    ex:end 3 ;
+    ex:email "a@example.com" ;
+.
+
+ex:b
+    a ex:Student ;
+    ex:name "B"@fr ;
+    ex:age 200 ;
+    ex:count "abc"^^xsd:integer ;
+    ex:code "zz" ;
+    ex:status ex:gone ;
+    ex:knows ex:c , ex:d ;
+    ex:start 1 ;
+    ex:end 2 ;
+    ex:extra 1 ;
+.
+
+ex:c
+    a ex:Person ;
+    ex:name "C"@de ;
+    ex:age -3 ;
+    ex:knows "c" ;
+    ex:address [ ex:postcode "12" ] ;
+.
+
+ex:d
+    ex:name "D"@en ;
+    ex:nick "D"@en , "E"@en ;
+    ex:address [ ex:street "Main St" ] ;
+.
+
+ex:e
+    a ex:Thing ;
+    ex:rel ex:a ;
+.
+
+ex:s
+    a ex:Student ;
+    ex:name "S"@en ;
+.
+"""
+
+SHAPES = """
+PREFIX ex: <http://example.com/>
+PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+PREFIX sh: <http://www.w3.org/ns/shacl#>
+PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+
+ex:PersonShape
+    a sh:NodeShape ;
+    sh:targetClass ex:Person ;
+    sh:closed true ;
+    sh:ignoredProperties ( rdf:type ex:email ex:count ) ;
+    sh:property
+        [
+            sh:path ex:name ;
+            sh:minCount 1 ;
+            sh:maxCount 1 ;
+            sh:uniqueLang true ;
+            sh:languageIn ( "en" "fr" ) ;
+        ] ,
+        [
+            sh:path ex:age ;
+            sh:datatype xsd:integer ;
+            sh:minInclusive 0 ;
+            sh:maxExclusive 150 ;
+        ] ,
+        [
+            sh:path ex:code ;
+            sh:pattern "^[A-Z]+[0-9]+$" ;
+            sh:minLength 3 ;
+            sh:maxLength 4 ;
+        ] ,
+        [
+            sh:path ex:status ;
+            sh:in ( ex:active ex:inactive ) ;
+        ] ,
+        [
+            sh:path ex:knows ;
+            sh:class ex:Person ;
+            sh:nodeKind sh:IRI ;
+            sh:qualifiedValueShape [ sh:class ex:Student ] ;
+            sh:qualifiedMaxCount 1 ;
+        ] ,
+        [
+            sh:path ex:start ;
+            sh:lessThan ex:end ;
+        ] ,
+        [
+            sh:path ex:address ;
+            sh:node ex:AddressShape ;
+        ] ,
+        [
+            sh:path ex:extra ;
+            sh:maxCount 0 ;
+            sh:severity sh:Warning ;
+            sh:message "No extras" ;
+        ] ;
+.
+
+ex:CountShape
+    a sh:NodeShape ;
+    sh:targetSubjectsOf ex:count ;
+    sh:property [
+        sh:path ex:count ;
+        sh:datatype xsd:integer ;
+    ] ;
+.
+
+ex:AddressShape
+    a sh:NodeShape ;
+    sh:property [
+        sh:path ex:postcode ;
+        sh:minCount 1 ;
+        sh:pattern "^[0-9]{4}$" ;
+    ] ;
+.
+
+ex:NickShape
+    a sh:NodeShape ;
+    sh:targetSubjectsOf ex:nick ;
+    sh:property
+        [
+            sh:path ex:nick ;
+            sh:disjoint ex:name ;
+        ] ,
+        [
+            sh:path ex:name ;
+            sh:equals ex:nick ;
+        ] ;
+    sh:or (
+        [ sh:class ex:Person ]
+        [ sh:path ex:address ; sh:minCount 1 ]
+    ) ;
+    sh:not [ sh:path ex:name ; sh:hasValue "D"@en ] ;
+.
+
+ex:RelShape
+    a sh:NodeShape ;
+    sh:targetObjectsOf ex:rel ;
+    sh:targetNode ex:z ;
+    sh:xone (
+        [ sh:class ex:Person ]
+        [ sh:class ex:Student ]
+    ) ;
+    sh:property
+        [
+            sh:path ( [ sh:inversePath ex:rel ] rdf:type ) ;
+            sh:hasValue ex:Thing ;
+        ] ,
+        [
+            sh:path [ sh:alternativePath ( ex:knows [ sh:oneOrMorePath ex:knows ] ) ] ;
+            sh:minCount 3 ;
+        ] ,
+        [
+            sh:path [ sh:zeroOrMorePath ex:knows ] ;
+            sh:nodeKind sh:BlankNodeOrIRI ;
+        ] ;
+.
+"""
+
+
+def _stand_in_endpoint(ds: Dataset) -> httpx.MockTransport:
+    """A SPARQL Endpoint that answers queries from ds"""
+    # RDFLib's SPARQL parser isn't thread safe
+    lock = threading.Lock()
+    queries = []
+
+    def handler(request):
+        q = request.content.decode() or request.url.params["query"]
+        with lock:
+            queries.append(q)
+            result = ds.query(q).serialize(format="json")
+        return httpx.Response(
+            200,
+            content=result,
+            headers={"Content-Type": "application/sparql-results+json"},
+        )
+
+    transport = httpx.MockTransport(handler)
+    transport.queries = queries
+    return transport
+
+
+def _results(g: Graph) -> set:
+    """The focus node, constraint component, source shape and value of each result of a report, other than those
+    detailing others"""
+    return {
+        (
+            g.value(r, SH.focusNode),
+            g.value(r, SH.sourceConstraintComponent),
+            g.value(r, SH.sourceShape),
+            g.value(r, SH.value),
+        )
+        for r in g.objects(None, SH.result)
+    }
+
+
+def test_validate():
+    data = Graph().parse(data=DATA, format="turtle")
+    shapes = Graph().parse(data=SHAPES, format="turtle")
+    ds = Dataset()
+    ds.default_graph += data
+
+    transport = _stand_in_endpoint(ds)
+    with httpx.Client(transport=transport) as http_client:
+        valid, g, txt, summary = validate(
+            "http://example.com/sparql", shapes, http_client=http_client
+        )
+
+    local_valid, local_g, local_txt, _ = kurra.shacl.validate(data, shapes)
+    assert valid == local_valid is False
+    assert _results(g) == _results(local_g)
+    assert len(_results(g)) == 25
+    assert txt.splitlines()[:3] == local_txt.splitlines()[:3]
+    assert summary
+    # one query per constraint, selecting only what doesn't conform to it
+    assert len(transport.queries) == 28
+
+
+def test_validate_nested_properties():
+    data = Graph().parse(
+        data="""
+        PREFIX ex: <http://example.com/>
+
+        ex:x a ex:A ; ex:p ex:y , ex:y3 .
+        ex:y ex:q 1 , 2 , 3 .
+        ex:x2 a ex:A ; ex:p ex:y2 .
+        ex:y3 ex:q 4 .
+        """,
+        format="turtle",
+    )
+    shapes = Graph().parse(
+        data="""
+        PREFIX ex: <http://example.com/>
+        PREFIX sh: <http://www.w3.org/ns/shacl#>
+        PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+
+        ex:AShape
+            a sh:NodeShape ;
+            sh:targetClass ex:A ;
+            sh:property [
+                sh:path ex:p ;
+                sh:maxCount 1 ;
+                sh:property [
+                    sh:path ex:q ;
+                    sh:minCount 1 ;
+                    sh:maxCount 2 ;
+                    sh:qualifiedValueShape [ sh:maxInclusive 3 ] ;
+                    sh:qualifiedMinCount 1 ;
+                ] ;
+            ] ;
+        .
+        """,
+        format="turtle",
+    )
+    ds = Dataset()
+    ds.default_graph += data
+
+    transport = _stand_in_endpoint(ds)
+    with httpx.Client(transport=transport) as http_client:
+        valid, g, txt, summary = validate(
+            "http://example.com/sparql", shapes, http_client=http_client
+        )
+
+    # the nested property shape's focus nodes are the values of ex:p, not the ex:A nodes
+    local_valid, local_g, local_txt, _ = kurra.shacl.validate(data, shapes)
+    assert valid == local_valid is False
+    assert _results(g) == _results(local_g)
+    assert {(str(r[0]), r[1].split("#")[1]) for r in _results(g)} == {
+        ("http://example.com/x", "MaxCountConstraintComponent"),
+        ("http://example.com/y", "MaxCountConstraintComponent"),
+        ("http://example.com/y2", "MinCountConstraintComponent"),
+        ("http://example.com/y2", "QualifiedMinCountConstraintComponent"),
+        ("http://example.com/y3", "QualifiedMinCountConstraintComponent"),
+    }
+    # counts are grouped, not joins of as many values as the count
+    assert len(transport.queries) == 4
+    for q in transport.queries:
+        assert "GROUP BY" in q and "sameTerm" not in q
+
+
+def test_validate_vocpub():
+    # the report is that of validating locally with pyshacl, as kurra does, text and all
+    data = Graph().parse(SHACL_TESTS / "vocab-invalid.ttl")
+    shapes = Graph().parse(SHACL_TESTS / "validator-vocpub-410.ttl")
+    ds = Dataset()
+    ds.default_graph += data
+
+    with httpx.Client(transport=_stand_in_endpoint(ds)) as http_client:
+        valid, g, txt, _ = validate(
+            "http://example.com/sparql", shapes, http_client=http_client
+        )
+
+    local_valid, local_g, local_txt = pyshacl.validate(
+        data, shacl_graph=shapes, allow_warnings=True
+    )
+    assert valid == local_valid is False
+    assert _results(g) == _results(local_g)
+    assert txt == local_txt
+
+
+def test_validate_graphs():
+    shapes = Graph().parse(
+        data="""
+        PREFIX ex: <http://example.com/>
+        PREFIX sh: <http://www.w3.org/ns/shacl#>
+        PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+
+        ex:CountShape
+            a sh:NodeShape ;
+            sh:targetSubjectsOf ex:count ;
+            sh:property
+                [
+                    sh:path ex:count ;
+                    sh:datatype xsd:integer ;
+                ] ,
+                [
+                    sh:path ex:count ;
+                    sh:maxInclusive 0 ;
+                    sh:severity sh:Warning ;
+                ] ;
+        .
+        """,
+        format="turtle",
+    )
+    ds = Dataset()
+    ds.graph(URIRef("https://example.com/valid")).parse(
+        data="""
+        PREFIX ex: <http://example.com/>
+        ex:x ex:count 1 .
+        """,
+        format="turtle",
+    )
+    ds.graph(URIRef("https://example.com/invalid")).parse(
+        data="""
+        PREFIX ex: <http://example.com/>
+        ex:y ex:count "one" .
+        """,
+        format="turtle",
+    )
+
+    with httpx.Client(transport=_stand_in_endpoint(ds)) as http_client:
+        # warnings don't stop the data being valid
+        valid, g, _, _ = validate(
+            "http://example.com/sparql",
+            shapes,
+            graph_iris=["https://example.com/valid"],
+            http_client=http_client,
+        )
+        assert valid
+        assert {r[:2] for r in _results(g)} == {
+            (URIRef("http://example.com/x"), SH.MaxInclusiveConstraintComponent)
+        }
+
+        valid, g, _, _ = validate(
+            "http://example.com/sparql",
+            shapes,
+            graph_iris=["https://example.com/valid"],
+            hide_warnings=True,
+            http_client=http_client,
+        )
+        assert valid
+        assert _results(g) == set()
+
+        valid, g, _, _ = validate(
+            "http://example.com/sparql",
+            shapes,
+            graph_iris=["https://example.com/valid", "https://example.com/invalid"],
+            hide_warnings=True,
+            http_client=http_client,
+        )
+        assert not valid
+        assert {r[:2] for r in _results(g)} == {
+            (URIRef("http://example.com/y"), SH.DatatypeConstraintComponent)
+        }
+
+
+def test_validate_unsupported():
+    shapes = Graph().parse(
+        data="""
+        PREFIX ex: <http://example.com/>
+        PREFIX sh: <http://www.w3.org/ns/shacl#>
+
+        ex:S
+            a sh:NodeShape ;
+            sh:targetClass ex:Person ;
+            sh:sparql [ sh:select "SELECT $this WHERE { $this ?p ?o }" ] ;
+        .
+        """,
+        format="turtle",
+    )
+    with pytest.raises(ValueError, match="SPARQL-based"):
+        validate("http://example.com/sparql", shapes)
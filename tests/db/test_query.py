@@ -1,7 +1,15 @@
+import threading
+import time
+
 import httpx
+import pytest
+from rdflib import BNode, Graph, Literal, URIRef
 
 from kurra.db.gsp import upload
+from kurra.db.sparql import construct, construct_triples, query_many, select_rows
+from kurra.db.sparql import query as db_query
 from kurra.sparql import query
+from kurra.utils import Deadline, RequestCancelledError
 
 
 def test_query(fuseki_container, http_client):
@@ -61,3 +69,315 @@ def test_query(fuseki_container, http_client):
         )
 
         assert r[0]["count"] == 0
+
+
+def test_query_timeout_defaults_to_client_timeout():
+    timeouts = []
+
+    def handler(request):
+        timeouts.append(request.extensions["timeout"])
+        return httpx.Response(200, json={"head": {}, "boolean": True})
+
+    with httpx.Client(
+        transport=httpx.MockTransport(handler), timeout=90
+    ) as http_client:
+        db_query("http://example.com/sparql", "ASK {?s ?p ?o}", http_client=http_client)
+        db_query(
+            "http://example.com/sparql",
+            "ASK {?s ?p ?o}",
+            http_client=http_client,
+            timeout=3,
+        )
+
+    assert timeouts[0]["read"] == 90
+    assert timeouts[1]["read"] == 3
+
+
+def test_query_deadline_covers_fallback(slow_sparql_endpoint):
+    # the POST is rejected and the GET fallback trickles its response out for ~6 seconds
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        db_query(slow_sparql_endpoint, "ASK {?s ?p ?o}", deadline=1)
+    assert time.monotonic() - start < 2
+
+    assert db_query(
+        slow_sparql_endpoint,
+        "ASK {?s ?p ?o}",
+        return_format="python",
+        return_bindings_only=True,
+        deadline=30,
+    )
+
+
+def test_query_cancel(slow_sparql_endpoint):
+    deadline = Deadline()
+    threading.Timer(0.5, deadline.cancel).start()
+
+    start = time.monotonic()
+    with pytest.raises(RequestCancelledError):
+        db_query(slow_sparql_endpoint, "ASK {?s ?p ?o}", deadline=deadline)
+    assert time.monotonic() - start < 1.5
+
+
+def test_query_tsv_results():
+    accepts = []
+
+    def handler(request):
+        accepts.append(request.headers["Accept"])
+        if request.headers["Accept"].startswith("text/tab-separated-values"):
+            return httpx.Response(
+                200,
+                text='?s\t?o\n<http://example.com/a>\t"1"^^<http://www.w3.org/2001/XMLSchema#integer>\n<http://example.com/b>\t\n',
+                headers={"Content-Type": "text/tab-separated-values; charset=utf-8"},
+            )
+        return httpx.Response(
+            200,
+            json={
+                "head": {"vars": ["s", "o"]},
+                "results": {
+                    "bindings": [
+                        {
+                            "s": {"type": "uri", "value": "http://example.com/a"},
+                            "o": {
+                                "type": "literal",
+                                "value": "1",
+                                "datatype": "http://www.w3.org/2001/XMLSchema#integer",
+                            },
+                        },
+                        {"s": {"type": "uri", "value": "http://example.com/b"}},
+                    ]
+                },
+            },
+            headers={"Content-Type": "application/sparql-results+json"},
+        )
+
+    q = "SELECT ?s ?o WHERE { ?s ?p ?o }"
+    with httpx.Client(transport=httpx.MockTransport(handler)) as http_client:
+        from_json = db_query(
+            "http://example.com/sparql", q, None, http_client, "python"
+        )
+        from_tsv = db_query(
+            "http://example.com/sparql",
+            q,
+            None,
+            http_client,
+            "python",
+            results_format="tsv",
+        )
+        assert from_tsv == from_json
+        assert from_tsv["results"]["bindings"][0]["o"] == 1
+
+        df = db_query(
+            "http://example.com/sparql",
+            q,
+            None,
+            http_client,
+            "dataframe",
+            results_format="tsv",
+        )
+        assert list(df.columns) == ["s", "o"]
+        assert df["s"].tolist() == ["http://example.com/a", "http://example.com/b"]
+
+    assert accepts[0] == "application/sparql-results+json"
+    assert accepts[1].startswith("text/tab-separated-values")
+
+
+def test_select_rows():
+    tsv = (
+        '?s\t?o\n<http://example.com/a>\t"1"^^<http://www.w3.org/2001/XMLSchema#integer>\n<http://example.com/b>\t\n'
+        '<http://example.com/c>\t"x\u2028y"\n'
+    ).encode()
+
+    def tsv_handler(request):
+        assert request.headers["Accept"].startswith("text/tab-separated-values")
+        return httpx.Response(
+            200,
+            # sent in small chunks, so that lines are split across them
+            content=(tsv[i : i + 7] for i in range(0, len(tsv), 7)),
+            headers={"Content-Type": "text/tab-separated-values; charset=utf-8"},
+        )
+
+    def json_handler(request):
+        return httpx.Response(
+            200,
+            json={
+                "head": {"vars": ["s", "o"]},
+                "results": {
+                    "bindings": [
+                        {
+                            "s": {"type": "uri", "value": "http://example.com/a"},
+                            "o": {
+                                "type": "literal",
+                                "value": "1",
+                                "datatype": "http://www.w3.org/2001/XMLSchema#integer",
+                            },
+                        },
+                        {"s": {"type": "uri", "value": "http://example.com/b"}},
+                        {
+                            "s": {"type": "uri", "value": "http://example.com/c"},
+                            "o": {"type": "literal", "value": "x\u2028y"},
+                        },
+                    ]
+                },
+            },
+            headers={"Content-Type": "application/sparql-results+json"},
+        )
+
+    q = "SELECT ?s ?o WHERE { ?s ?p ?o }"
+    results = []
+    for handler in [tsv_handler, json_handler]:
+        with httpx.Client(transport=httpx.MockTransport(handler)) as http_client:
+            with select_rows(
+                "http://example.com/sparql", q, http_client=http_client
+            ) as (variables, rows):
+                results.append((variables, list(rows)))
+
+    assert results[0] == results[1]
+    variables, rows = results[0]
+    assert variables == ["s", "o"]
+    assert rows[0]["o"] == 1
+    assert "o" not in rows[1] or rows[1]["o"] is None
+    assert rows[2]["o"] == "x\u2028y"
+
+    with pytest.raises(ValueError):
+        with select_rows("http://example.com/sparql", "ASK { ?s ?p ?o }"):
+            pass
+
+
+NT_RESULT = (
+    "<http://example.com/a> <http://example.com/b> _:x .\n"
+    '_:x <http://example.com/label> "line one\\nline two"@en .\n'
+    '_:x <http://example.com/note> "x\u2028y" .\n'
+    '_:x <http://example.com/n> "1"^^<http://www.w3.org/2001/XMLSchema#integer> .\n'
+)
+
+
+def test_construct_streams_n_triples(tmp_path):
+    def handler(request):
+        assert request.headers["Accept"].startswith("application/n-triples")
+        return httpx.Response(
+            200,
+            # sent in small chunks, so that lines are split across them
+            content=(
+                NT_RESULT.encode()[i : i + 7]
+                for i in range(0, len(NT_RESULT.encode()), 7)
+            ),
+            headers={"Content-Type": "application/n-triples"},
+        )
+
+    q = "CONSTRUCT WHERE { ?s ?p ?o }"
+    with httpx.Client(transport=httpx.MockTransport(handler)) as http_client:
+        triples = list(
+            construct_triples("http://example.com/sparql", q, http_client=http_client)
+        )
+        assert len(triples) == 4
+        assert triples[0][:2] == (
+            URIRef("http://example.com/a"),
+            URIRef("http://example.com/b"),
+        )
+        assert isinstance(triples[0][2], BNode)
+        assert triples[1][0] == triples[0][2]
+        assert triples[1][2] == Literal("line one\nline two", lang="en")
+        assert triples[2][2] == Literal("x\u2028y")
+
+        g = construct(
+            "http://example.com/sparql", q, http_client=http_client, batch_size=2
+        )
+        assert len(g) == 4
+
+        nt = construct(
+            "http://example.com/sparql",
+            q,
+            tmp_path / "result.nt",
+            http_client=http_client,
+            batch_size=2,
+        )
+        assert len(Graph().parse(nt, format="nt")) == 4
+
+
+def test_construct_falls_back_to_other_formats():
+    def handler(request):
+        return httpx.Response(
+            200,
+            text="PREFIX ex: <http://example.com/> ex:a ex:b ex:c, ex:d .",
+            headers={"Content-Type": "text/turtle"},
+        )
+
+    with httpx.Client(transport=httpx.MockTransport(handler)) as http_client:
+        g = query(
+            "http://example.com/sparql",
+            "CONSTRUCT WHERE { ?s ?p ?o }",
+            http_client=http_client,
+            return_format="python",
+        )
+
+    assert len(g) == 2
+
+
+def test_query_many():
+    in_flight = 0
+    most_in_flight = 0
+    lock = threading.Lock()
+
+    def handler(request):
+        nonlocal in_flight, most_in_flight
+        q = request.content.decode() or request.url.params["query"]
+        n = int(q.split("#")[1])
+        with lock:
+            in_flight += 1
+            most_in_flight = max(most_in_flight, in_flight)
+        # later queries finish first
+        time.sleep(0.05 * (10 - n))
+        with lock:
+            in_flight -= 1
+        if n == 3:
+            return httpx.Response(500, text="broken")
+        return httpx.Response(
+            200,
+            json={"head": {}, "boolean": n % 2 == 0},
+            headers={"Content-Type": "application/sparql-results+json"},
+        )
+
+    queries = (f"ASK {{ ?s ?p ?o }} #{n}" for n in range(10))
+    with httpx.Client(transport=httpx.MockTransport(handler)) as http_client:
+        start = time.monotonic()
+        results = list(
+            query_many(
+                "http://example.com/sparql",
+                queries,
+                http_client=http_client,
+                return_bindings_only=True,
+                max_concurrency=4,
+            )
+        )
+        # run one at a time, the queries would take 2.75 seconds
+        assert time.monotonic() - start < 2
+
+    assert most_in_flight == 4
+    assert [i for i, _, _ in results] == list(range(10))
+    assert [r for _, r, _ in results] == [
+        True,
+        False,
+        True,
+        None,
+        True,
+        False,
+        True,
+        False,
+        True,
+        False,
+    ]
+    assert "500" in str(results[3][2])
+
+    with httpx.Client(transport=httpx.MockTransport(handler)) as http_client:
+        results = list(
+            query_many(
+                "http://example.com/sparql",
+                [f"ASK {{ ?s ?p ?o }} #{n}" for n in range(10)],
+                http_client=http_client,
+                max_concurrency=4,
+                ordered=False,
+            )
+        )
+    assert sorted(i for i, _, _ in results) == list(range(10))
+    assert [i for i, _, _ in results] != list(range(10))
@@ -0,0 +1,92 @@
+import json
+import time
+
+import httpx
+import pytest
+
+from kurra.db.replay import load_workload, query_class, replay
+
+SPARQL_ENDPOINT = "http://example.com/sparql"
+
+
+def handler(request):
+    if b"broken" in request.content or "broken" in request.url.params.get("query", ""):
+        return httpx.Response(400, text="Parse error")
+    return httpx.Response(
+        200,
+        json={"head": {}, "boolean": True},
+        headers={"Content-Type": "application/sparql-results+json"},
+    )
+
+
+def test_query_class():
+    a = query_class(
+        'PREFIX ex: <http://example.com/>\nSELECT * WHERE { ?s ex:p "a" } LIMIT 10'
+    )
+    b = query_class(
+        "PREFIX ex: <http://example.org/>\nSELECT *  WHERE { ?s ex:p 'b' } LIMIT 5 # paged"
+    )
+    assert a == b
+    assert a.startswith("SELECT-")
+    assert query_class("ASK { ?s ?p ?o }").startswith("ASK-")
+    assert query_class("SELECT ?s WHERE { ?s ?p ?o }") != a
+
+
+def test_load_workload(tmp_path):
+    log = tmp_path / "log.jsonl"
+    log.write_text(
+        "\n".join(
+            json.dumps(e)
+            for e in [
+                {"query": "ASK { ?s ?p 1 }", "timestamp": "2025-03-01T09:00:00Z"},
+                {"query": "ASK { ?s ?p 2 }", "timestamp": "2025-03-01T09:00:01.5Z"},
+                {"query": "SELECT * { ?s ?p ?o }", "class": "all"},
+            ]
+        )
+    )
+    workload = load_workload(log)
+    assert [e["offset"] for e in workload] == [0, 1.5, 1.5]
+    assert workload[0]["class"] == workload[1]["class"]
+    assert workload[2]["class"] == "all"
+
+    queries = tmp_path / "queries"
+    queries.mkdir()
+    (queries / "b.rq").write_text("ASK { ?s ?p ?o }")
+    (queries / "a.sparql").write_text("SELECT * { ?s ?p ?o }")
+    (queries / "notes.txt").write_text("not a query")
+    assert [e["class"] for e in load_workload(queries)] == ["a", "b"]
+
+    log.write_text('{"timestamp": 1}')
+    with pytest.raises(ValueError):
+        load_workload(log)
+
+
+def test_replay():
+    workload = [
+        {"query": "ASK { ?s ?p ?o }", "class": "ok", "offset": 0.0},
+        {"query": "ASK { ?s ?p <urn:broken> }", "class": "broken", "offset": 0.2},
+        {"query": "ASK { ?s ?p ?o }", "class": "ok", "offset": 0.4},
+    ]
+
+    with httpx.Client(transport=httpx.MockTransport(handler)) as http_client:
+        start = time.perf_counter()
+        report = replay(SPARQL_ENDPOINT, workload, http_client=http_client)
+        assert time.perf_counter() - start >= 0.4
+
+        assert report["queries"] == 3
+        assert report["errors"] == 1
+        assert report["classes"]["ok"]["count"] == 2
+        assert report["classes"]["ok"]["latency"]["p50"] > 0
+        assert report["classes"]["broken"]["latency"] is None
+        assert len(report["classes"]["broken"]["error_messages"]) == 1
+
+        # a fixed concurrency ignores the logged pace
+        start = time.perf_counter()
+        report = replay(
+            SPARQL_ENDPOINT, workload, concurrency=2, http_client=http_client
+        )
+        assert time.perf_counter() - start < 0.4
+        assert report["queries"] == 3
+
+        with pytest.raises(ValueError):
+            replay(SPARQL_ENDPOINT, workload, speed=0, http_client=http_client)
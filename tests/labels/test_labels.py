@@ -33,3 +33,19 @@ def test_get_missing_labels():
 
     assert type(rdf) == dict
     assert len(rdf.keys()) == 29
+
+
+def test_get_missing_labels_from_local_context():
+    iris = find_missing_labels(Path(__file__).parent / "GeologicMaterialTypes.ttl")
+    context = Path(__file__).parent / "labels.ttl"
+
+    rdf = get_missing_labels(iris, context)
+    assert type(rdf) == Graph
+    assert len(rdf) == 42 - len(
+        find_missing_labels(
+            Path(__file__).parent / "GeologicMaterialTypes.ttl", context
+        )
+    )
+
+    labels = get_missing_labels(iris, context, return_type="dict")
+    assert len(labels) == len(rdf)
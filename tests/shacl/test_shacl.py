@@ -1,16 +1,23 @@
+import json
 import shutil
+from collections import OrderedDict
 from pathlib import Path
-from pickle import dump, load
+from pickle import dump
 
-from rdflib import Dataset, Literal, Namespace, URIRef
+import httpx
+import pytest
+from rdflib import BNode, Dataset, Graph, Literal, Namespace, URIRef
 from rdflib.compare import isomorphic
 from rdflib.namespace import RDF, SH
 
+import kurra.shacl
 from kurra.shacl import (
     check_validator_known,
+    get_validator_graph,
     list_local_validators,
     sync_validators,
     validate,
+    validate_files,
 )
 from kurra.sparql import query
 from kurra.utils import load_graph
@@ -81,7 +88,7 @@ def test_validate_multiple_data_files():
 
 def test_sync_validators():
     kurra_cache = Path().home() / ".kurra"
-    validators_cache = kurra_cache / "validators.pkl"
+    validators_index = kurra_cache / "validators" / "index.json"
 
     # get number of SemBack validators
     q = """
@@ -111,11 +118,9 @@ def test_sync_validators():
 
     assert len(known_validators) == num_remote_validators
 
-    d = load(open(validators_cache, "rb"))
-    d: Dataset
-    d.remove_graph(d.get_graph(URIRef("https://prez.dev/manifest-validator")))
-    with open(validators_cache, "wb") as f:
-        dump(d, f)
+    index = json.loads(validators_index.read_text())
+    del index["validators"]["https://prez.dev/manifest-validator"]
+    validators_index.write_text(json.dumps(index))
 
     assert len(list_local_validators().keys()) == (num_remote_validators - 1)
 
@@ -148,6 +153,664 @@ def test_validate_by_id():
     assert len(list(g.subjects(predicate=RDF.type, object=SH.ValidationResult))) == 3
 
 
+def test_local_validator_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(kurra.shacl, "VALIDATORS_CACHE", tmp_path / "validators")
+    monkeypatch.setattr(kurra.shacl, "SHAPES_CACHE", tmp_path / "shapes")
+    monkeypatch.setattr(kurra.shacl, "_compiled_shapes", OrderedDict())
+
+    # a pickled cache from an earlier version of kurra is moved to the new cache on first use
+    shapes = load_graph(SHACL_TEST_DIR / "validator-vocpub-410.ttl")
+    vocpub = URIRef("https://linked.data.gov.au/def/vocpub/validator")
+    d = Dataset()
+    g = d.graph(vocpub)
+    g += shapes
+    other = d.graph(URIRef("https://example.com/a-validator"))
+    other.add((other.identifier, RDF.type, SH.NodeShape))
+    with open(tmp_path / "validators.pkl", "wb") as f:
+        dump(d, f)
+
+    validators = list_local_validators()
+    assert list(validators) == [
+        "https://example.com/a-validator",
+        "https://linked.data.gov.au/def/vocpub/validator",
+    ]
+    assert validators[str(vocpub)] == {
+        "name": str(shapes.value(vocpub, kurra.shacl.SDO.name)),
+        "id": "2",
+    }
+    assert (tmp_path / "validators" / "index.json").is_file()
+
+    # only the validator used is loaded, and only once, as its compiled shapes are cached after that
+    loaded = []
+    load_validator = kurra.shacl._load_validator
+    monkeypatch.setattr(
+        kurra.shacl,
+        "_load_validator",
+        lambda iri, index=None: loaded.append(str(iri)) or load_validator(iri, index),
+    )
+    for shacl in [2, "2", str(vocpub)]:
+        valid, g, txt, summary = validate(SHACL_TEST_DIR / "vocab-invalid.ttl", shacl)
+        assert not valid
+    assert loaded == [str(vocpub)]
+
+    validator = get_validator_graph(2)
+    assert validator.identifier == vocpub
+    assert len(validator) == len(shapes)
+
+
+def test_sync_validators_conditional(tmp_path, monkeypatch):
+    monkeypatch.setattr(kurra.shacl, "VALIDATORS_CACHE", tmp_path / "validators")
+
+    # a validator with a modified date, one served with an ETag and one with a Last-Modified date
+    upstream = {
+        "https://example.com/a": {"modified": "2025-01-01", "headers": {}},
+        "https://example.com/b": {"headers": {"ETag": '"b1"'}},
+        "https://example.com/c": {
+            "headers": {"Last-Modified": "Wed, 01 Jan 2025 00:00:00 GMT"}
+        },
+    }
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        iri = request.url.params.get("graph")
+        if iri is None:
+            requests.append("query")
+            bindings = []
+            for v, u in upstream.items():
+                row = {"p": {"type": "uri", "value": v}}
+                if u.get("modified") is not None:
+                    row["modified"] = {"type": "literal", "value": u["modified"]}
+                bindings.append(row)
+            return httpx.Response(
+                200,
+                json={
+                    "head": {"vars": ["p", "modified"]},
+                    "results": {"bindings": bindings},
+                },
+                headers={"Content-Type": "application/sparql-results+json"},
+            )
+
+        u = upstream[iri]
+        etag = u["headers"].get("ETag")
+        last_modified = u["headers"].get("Last-Modified")
+        if (etag is not None and request.headers.get("If-None-Match") == etag) or (
+            last_modified is not None
+            and request.headers.get("If-Modified-Since") == last_modified
+        ):
+            requests.append(f"304 {iri}")
+            return httpx.Response(304)
+
+        requests.append(f"200 {iri}")
+        name = u.get("name", iri[-1])
+        return httpx.Response(
+            200,
+            text=f'<{iri}> <https://schema.org/name> "{name}" .',
+            headers={"Content-Type": "text/turtle", **u["headers"]},
+        )
+
+    written = []
+    write_atomic = kurra.shacl._write_atomic
+    monkeypatch.setattr(
+        kurra.shacl,
+        "_write_atomic",
+        lambda path, content: written.append(path.name) or write_atomic(path, content),
+    )
+
+    def sync():
+        requests.clear()
+        written.clear()
+        with httpx.Client(transport=httpx.MockTransport(handler)) as http_client:
+            return sync_validators(http_client=http_client, max_workers=2)
+
+    validators = sync()
+    assert list(validators) == list(upstream)
+    assert sorted(requests) == ["200 " + v for v in upstream] + ["query"]
+    assert len(written) == 4  # a file per validator and the index
+
+    # nothing to do: the validator with a modified date isn't requested and the others aren't sent or written
+    sync()
+    assert sorted(requests) == [
+        "304 https://example.com/b",
+        "304 https://example.com/c",
+        "query",
+    ]
+    assert written == []
+
+    # an updated validator is fetched and only its file and the index are rewritten
+    upstream["https://example.com/a"].update(modified="2025-02-01", name="A")
+    upstream["https://example.com/b"]["headers"]["ETag"] = '"b2"'
+    validators = sync()
+    assert sorted(requests) == [
+        "200 https://example.com/a",
+        "200 https://example.com/b",
+        "304 https://example.com/c",
+        "query",
+    ]
+    index = kurra.shacl._read_validator_index()
+    assert set(written) == {"index.json", index["https://example.com/a"]["file"]}
+    assert validators["https://example.com/a"]["name"] == "A"
+    assert index["https://example.com/a"]["modified"] == "2025-02-01"
+    assert index["https://example.com/b"]["etag"] == '"b2"'
+
+
+def test_compiled_shapes_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(kurra.shacl, "SHAPES_CACHE", tmp_path / "shapes")
+    monkeypatch.setattr(kurra.shacl, "_compiled_shapes", OrderedDict())
+    compiled = []
+    shapes_graph = kurra.shacl.ShapesGraph
+    monkeypatch.setattr(
+        kurra.shacl,
+        "ShapesGraph",
+        lambda g: compiled.append(len(g)) or shapes_graph(g),
+    )
+
+    shapes_file = tmp_path / "validator.ttl"
+    shutil.copy(SHACL_TEST_DIR / "validator-vocpub-410.ttl", shapes_file)
+    data_file = SHACL_TEST_DIR / "vocab-invalid.ttl"
+
+    expected = validate(data_file, load_graph(shapes_file))
+    assert len(compiled) == 1
+
+    # the same shapes, as a file, are compiled once
+    for _ in range(2):
+        valid, g, txt, summary = validate(data_file, shapes_file)
+        assert len(compiled) == 2
+        assert not valid
+        assert isomorphic(g, expected[1])
+    cached = list((tmp_path / "shapes").glob("*.pkl"))
+    assert len(cached) == 1
+
+    # and reused from disk, as by a later process
+    kurra.shacl._compiled_shapes.clear()
+    valid, g, txt, summary = validate(data_file, shapes_file)
+    assert len(compiled) == 2
+    assert isomorphic(g, expected[1])
+
+    # a cached copy that can't be loaded is replaced
+    kurra.shacl._compiled_shapes.clear()
+    cached[0].write_bytes(b"not a pickle")
+    valid, g, txt, summary = validate(data_file, shapes_file)
+    assert len(compiled) == 3
+    assert isomorphic(g, expected[1])
+    kurra.shacl._compiled_shapes.clear()
+    validate(data_file, shapes_file)
+    assert len(compiled) == 3
+
+    # graphs, which may have changed since, are compiled each time, without changing them
+    shapes = load_graph(shapes_file)
+    triples = len(shapes)
+    validate(data_file, shapes)
+    validate(data_file, shapes)
+    assert len(compiled) == 5
+    assert len(shapes) == triples
+    assert len(list((tmp_path / "shapes").glob("*.pkl"))) == 1
+
+    # changed shapes are compiled again
+    with shapes_file.open("a") as f:
+        f.write(
+            "\n<https://example.com/s> a <http://www.w3.org/ns/shacl#NodeShape> .\n"
+        )
+    validate(data_file, shapes_file)
+    assert len(compiled) == 6
+
+
+def _results(g):
+    # blank node results and paths differ between validations, so results are compared by their values
+    return sorted(
+        tuple(
+            "_" if isinstance(g.value(r, p), BNode) else str(g.value(r, p))
+            for p in [
+                SH.focusNode,
+                SH.resultPath,
+                SH.value,
+                SH.resultSeverity,
+                SH.resultMessage,
+                SH.sourceConstraintComponent,
+            ]
+        )
+        for r in g.subjects(RDF.type, SH.ValidationResult)
+    )
+
+
+def test_validate_sharded():
+    shapes = load_graph(SHACL_TEST_DIR / "validator-vocpub-410.ttl")
+    for data_file in ["vocab-valid.ttl", "vocab-invalid.ttl", "vocab-invalid2.ttl"]:
+        valid, g, txt, summary = validate(SHACL_TEST_DIR / data_file, shapes)
+        valid2, g2, txt2, summary2 = validate(
+            SHACL_TEST_DIR / data_file, shapes, max_workers=2
+        )
+        assert valid2 == valid
+        assert _results(g2) == _results(g)
+        assert sorted(txt2.splitlines()) == sorted(txt.splitlines())
+        assert len(list(g2.subjects(RDF.type, SH.ValidationReport))) == 1
+
+
+def test_validate_sharded_sparql_constraints():
+    # partners are found from the other side, which isn't on any path of the shapes, so shapes with SPARQL constraints
+    # must be validated with the whole data graph
+    shapes = Graph().parse(
+        data="""
+        PREFIX ex: <http://example.com/>
+        PREFIX sh: <http://www.w3.org/ns/shacl#>
+
+        ex:PersonShape
+            a sh:NodeShape ;
+            sh:targetClass ex:Person ;
+            sh:property [
+                sh:path ex:name ;
+                sh:minCount 1 ;
+            ] ;
+            sh:sparql [
+                sh:select "SELECT $this WHERE { $this ex:partner ?p . FILTER NOT EXISTS { ?p ex:partner $this } }" ;
+                sh:prefixes [ sh:declare [ sh:prefix "ex" ; sh:namespace "http://example.com/"^^<http://www.w3.org/2001/XMLSchema#anyURI> ] ] ;
+            ] ;
+        .
+
+        ex:PetShape
+            a sh:NodeShape ;
+            sh:targetClass ex:Pet ;
+            sh:property [
+                sh:path ex:owner ;
+                sh:class ex:Person ;
+            ] ;
+        .
+        """,
+        format="turtle",
+    )
+    data = Graph().parse(
+        data="""
+        PREFIX ex: <http://example.com/>
+
+        ex:a a ex:Person ; ex:name "a" ; ex:partner ex:b .
+        ex:b a ex:Person ; ex:name "b" ; ex:partner ex:a .
+        ex:c a ex:Person ; ex:partner ex:d .
+        ex:d a ex:Person ; ex:name "d" .
+        ex:e a ex:Pet ; ex:owner ex:a .
+        ex:f a ex:Pet ; ex:owner ex:x .
+        """,
+        format="turtle",
+    )
+
+    valid, g, txt, summary = validate(data, shapes)
+    valid2, g2, txt2, summary2 = validate(data, shapes, max_workers=2)
+    assert not valid and not valid2
+    assert _results(g2) == _results(g)
+    assert {str(r[0]) for r in _results(g)} == {
+        "http://example.com/c",
+        "http://example.com/f",
+    }
+
+
+def test_validate_incremental(tmp_path, monkeypatch):
+    monkeypatch.setattr(kurra.shacl, "VALIDATIONS_CACHE", tmp_path / "validations")
+    shapes = tmp_path / "shapes.ttl"
+    shapes.write_text(
+        """
+        PREFIX ex: <http://example.com/>
+        PREFIX sh: <http://www.w3.org/ns/shacl#>
+
+        ex:PetShape
+            a sh:NodeShape ;
+            sh:targetClass ex:Pet ;
+            sh:property
+                [
+                    sh:path ex:friend ;
+                    sh:class ex:Pet ;
+                ] ,
+                [
+                    sh:path ex:name ;
+                    sh:minCount 1 ;
+                ] ;
+        .
+        """
+    )
+    data = tmp_path / "data"
+    data.mkdir()
+    prefix = "PREFIX ex: <http://example.com/>\n"
+    (data / "a.ttl").write_text(
+        prefix + 'ex:a a ex:Pet ; ex:name "a" ; ex:friend ex:b .'
+    )
+    (data / "b.ttl").write_text(prefix + 'ex:b a ex:Pet ; ex:name "b" .')
+    (data / "c.ttl").write_text(prefix + "ex:c a ex:Pet ; ex:friend ex:c .")
+
+    validated = []
+    validate_focus = kurra.shacl._validate_focus
+
+    def spy(data_graph, sg, untargeted, focus):
+        validated.extend(str(n) for n in focus)
+        return validate_focus(data_graph, sg, untargeted, focus)
+
+    monkeypatch.setattr(kurra.shacl, "_validate_focus", spy)
+
+    def check():
+        validated.clear()
+        valid, g, txt, summary = validate([data], shapes)
+        valid2, g2, txt2, summary2 = validate([data], shapes, incremental=True)
+        assert valid2 == valid
+        assert _results(g2) == _results(g)
+        assert txt2 == txt
+        return {str(r[0]) for r in _results(g)}
+
+    assert check() == {"http://example.com/c"}
+    assert sorted(validated) == [
+        "http://example.com/a",
+        "http://example.com/b",
+        "http://example.com/c",
+    ]
+
+    # nothing has changed
+    assert check() == {"http://example.com/c"}
+    assert validated == []
+
+    # a, linking to b, is validated again though unchanged, but not c
+    (data / "b.ttl").write_text(prefix + 'ex:b a ex:Rock ; ex:name "b" .')
+    assert check() == {"http://example.com/a", "http://example.com/c"}
+    assert sorted(validated) == ["http://example.com/a"]
+
+    (data / "c.ttl").unlink()
+    assert check() == {"http://example.com/a"}
+
+
+def test_validate_incremental_prefixes(tmp_path, monkeypatch):
+    monkeypatch.setattr(kurra.shacl, "VALIDATIONS_CACHE", tmp_path / "validations")
+    shapes = tmp_path / "shapes.ttl"
+    shapes.write_text(
+        """
+        PREFIX ex: <http://example.com/>
+        PREFIX sh: <http://www.w3.org/ns/shacl#>
+
+        ex:PetShape
+            a sh:NodeShape ;
+            sh:targetClass ex:Pet ;
+            sh:property
+                [
+                    sh:path ex:friend ;
+                    sh:class ex:Pet ;
+                ] ;
+        .
+        """
+    )
+    data = tmp_path / "data"
+    data.mkdir()
+    prefix = "PREFIX ex: <http://example.com/>\n"
+    (data / "a.ttl").write_text(prefix + "ex:a a ex:Pet ; ex:friend ex:b .")
+    (data / "b.ttl").write_text(prefix + "ex:b a ex:Thing .")
+
+    for d in [data, [data]]:
+        valid, g, txt, summary = validate(d, shapes)
+        valid2, g2, txt2, summary2 = validate(d, shapes, incremental=True)
+        assert "Value Node: ex:b" in txt
+        assert txt2 == txt
+
+
+def test_validate_incremental_paths(tmp_path, monkeypatch):
+    monkeypatch.setattr(kurra.shacl, "VALIDATIONS_CACHE", tmp_path / "validations")
+    prefix = """
+        PREFIX ex: <http://example.com/>
+        PREFIX sh: <http://www.w3.org/ns/shacl#>
+        """
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "a.ttl").write_text(prefix + "ex:x a ex:A ; ex:a ex:y .")
+    (data / "b.ttl").write_text(prefix + "ex:y a ex:C ; ex:b ex:z .")
+
+    # results looking two links away, and any number of them, follow changes that far
+    for path in [
+        "( ex:a ex:b )",
+        "[ sh:oneOrMorePath [ sh:alternativePath ( ex:a ex:b ) ] ]",
+    ]:
+        shapes = tmp_path / "shapes.ttl"
+        shapes.write_text(
+            prefix
+            + f"""
+            ex:AShape
+                a sh:NodeShape ;
+                sh:targetClass ex:A ;
+                sh:property [
+                    sh:path {path} ;
+                    sh:class ex:C ;
+                ] ;
+            .
+            """
+        )
+        (data / "c.ttl").write_text(prefix + "ex:z a ex:C .")
+        assert validate([data], shapes, incremental=True)[0]
+
+        (data / "c.ttl").write_text(prefix + "ex:z a ex:D .")
+        valid, g, txt, summary = validate([data], shapes)
+        assert not valid
+        valid2, g2, txt2, summary2 = validate([data], shapes, incremental=True)
+        assert not valid2
+        assert _results(g2) == _results(g)
+
+
+def test_validate_files():
+    shapes = SHACL_TEST_DIR / "validator-vocpub-410.ttl"
+    files = [SHACL_TEST_DIR / "vocab-invalid.ttl", SHACL_TEST_DIR / "vocab-valid.ttl"]
+
+    for max_workers in [1, 2]:
+        reports = validate_files(files, shapes, max_workers=max_workers)
+        assert list(reports) == files
+        for f, (valid, g, txt, summary) in reports.items():
+            valid2, g2, txt2, summary2 = validate(f, shapes)
+            assert valid == valid2
+            assert _results(g) == _results(g2)
+            assert txt == txt2
+
+    reports = validate_files(files, shapes, hide_warnings=True)
+    assert all(
+        g.value(r, SH.resultSeverity) == SH.Violation
+        for _, g, _, _ in reports.values()
+        for r in g.subjects(RDF.type, SH.ValidationResult)
+    )
+
+
+def test_validate_limits():
+    shapes = SHACL_TEST_DIR / "validator-vocpub-410.ttl"
+    data = SHACL_TEST_DIR / "vocab-invalid2.ttl"
+    valid, g, txt, summary = validate(data, shapes)
+    n = len(_results(g))
+    assert not valid and n > 2
+
+    valid, g, txt, summary = validate(data, shapes, max_results=2)
+    assert not valid
+    assert len(_results(g)) == 2
+    assert "Results (2):" in txt
+
+    valid, g, txt, summary = validate(data, shapes, fail_fast=True)
+    assert not valid
+    assert 0 < len(_results(g)) < n
+
+    # a capped validation of valid data still validates all of it
+    valid, g, txt, summary = validate(
+        SHACL_TEST_DIR / "vocab-valid.ttl", shapes, max_results=1
+    )
+    assert valid
+
+    files = [data, SHACL_TEST_DIR / "vocab-invalid.ttl"]
+    assert list(validate_files(files, shapes, fail_fast=True)) == [data]
+    assert list(validate_files(files, shapes, fail_fast=True, max_workers=2)) == [data]
+
+    with pytest.raises(ValueError):
+        validate(data, shapes, max_results=0)
+    with pytest.raises(ValueError):
+        validate(data, shapes, incremental=True, fail_fast=True)
+
+
+def test_validate_limits_within_shape(monkeypatch):
+    from pyshacl.shape import Shape
+
+    shapes = Graph().parse(
+        data="""
+        PREFIX ex: <http://example.com/>
+        PREFIX sh: <http://www.w3.org/ns/shacl#>
+
+        ex:ThingShape
+            a sh:NodeShape ;
+            sh:targetClass ex:Thing ;
+            sh:class ex:Other ;
+        .
+        """,
+        format="turtle",
+    )
+    data = Graph()
+    EX = Namespace("http://example.com/")
+    for i in range(1000):
+        data.add((EX[f"thing{i}"], RDF.type, EX.Thing))
+
+    validated = []
+    shape_validate = Shape.validate
+
+    def spy(self, executor, target_graph, focus=None, _evaluation_path=None):
+        validated.extend(focus)
+        return shape_validate(self, executor, target_graph, focus, _evaluation_path)
+
+    monkeypatch.setattr(Shape, "validate", spy)
+    valid, g, txt, summary = validate(data, shapes, max_results=2)
+    assert not valid
+    assert len(_results(g)) == 2
+    assert len(validated) == kurra.shacl.FOCUS_BATCH_MIN
+
+
+def test_validate_hide_warnings():
+    shapes = Graph().parse(
+        data="""
+        PREFIX ex: <http://example.com/>
+        PREFIX sh: <http://www.w3.org/ns/shacl#>
+
+        ex:PetShape
+            a sh:NodeShape ;
+            sh:targetClass ex:Pet ;
+            sh:property
+                [
+                    sh:path ex:name ;
+                    sh:minCount 1 ;
+                    sh:severity sh:Warning ;
+                ] ,
+                [
+                    sh:path ex:owner ;
+                    sh:minCount 1 ;
+                ] ;
+        .
+        """,
+        format="turtle",
+    )
+    data = Graph().parse(
+        data="""
+        PREFIX ex: <http://example.com/>
+
+        ex:a a ex:Pet .
+        ex:b a ex:Pet ; ex:owner ex:x .
+        ex:c a ex:Pet ; ex:name "c" .
+        """,
+        format="turtle",
+    )
+
+    valid, g, txt, summary = validate(data, shapes)
+    assert len(_results(g)) == 4
+    valid, g, txt, summary = validate(data, shapes, hide_warnings=True)
+    assert not valid
+    assert {(r[0], r[3]) for r in _results(g)} == {
+        ("http://example.com/a", str(SH.Violation)),
+        ("http://example.com/c", str(SH.Violation)),
+    }
+    # the report links to no more than the results kept
+    assert len(set(g.objects(None, SH.result))) == 2
+    assert len(set(g.subjects(RDF.type, SH.ValidationReport))) == 1
+
+
+def test_validate_prune(tmp_path):
+    shapes = """
+        PREFIX ex: <http://example.com/>
+        PREFIX sh: <http://www.w3.org/ns/shacl#>
+
+        ex:PetShape
+            a sh:NodeShape ;
+            sh:targetClass ex:Pet ;
+            sh:property
+                [
+                    sh:path ex:owner ;
+                    sh:class ex:Person ;
+                    sh:node ex:PersonShape ;
+                ] ;
+        .
+
+        ex:PersonShape
+            a sh:NodeShape ;
+            sh:property
+                [
+                    sh:path ( ex:address ex:postcode ) ;
+                    sh:minCount 1 ;
+                ] ;
+        .
+        """
+    data = tmp_path / "data.ttl"
+    data.write_text(
+        """
+        PREFIX ex: <http://example.com/>
+        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+
+        ex:Dog rdfs:subClassOf ex:Pet .
+        ex:a a ex:Dog ; ex:owner ex:b ; ex:colour "black" .
+        ex:b a ex:Person ; ex:address [ ex:postcode "1234" ; ex:street "1 Main St" ] .
+        ex:c a ex:Pet ; ex:owner ex:d .
+        ex:d a ex:Person ; ex:address [ ex:street "2 Main St" ] ; ex:age 7 .
+        ex:e a ex:Pet ; ex:owner ex:f .
+        ex:f a ex:Thing ; ex:name "f" .
+        ex:x ex:name "x" ; ex:knows ex:y .
+        """
+    )
+
+    shapes_graph = Graph().parse(data=shapes, format="turtle")
+    pruned = kurra.shacl._load_pruned(
+        data,
+        kurra.shacl._validated_predicates(kurra.shacl._compile_shapes(shapes_graph)),
+    )
+    assert len(pruned) < len(load_graph(data))
+    assert (EX.a, EX.colour, Literal("black")) not in pruned
+    assert (EX.x, EX.knows, EX.y) not in pruned
+    assert (EX.b, EX.address, None) in pruned
+
+    valid, g, txt, summary = validate(data, shapes_graph)
+    valid2, g2, txt2, summary2 = validate(data, shapes_graph, prune=True)
+    assert not valid and not valid2
+    assert _results(g2) == _results(g)
+    assert txt2 == txt
+    # c's owner has no postcode and e's isn't a person, the nested results being those of d and f
+    assert {r[0] for r in _results(g)} == {
+        "http://example.com/c",
+        "http://example.com/d",
+        "http://example.com/e",
+        "http://example.com/f",
+    }
+
+    # closed shapes look at every triple of their focus nodes, so the data isn't pruned
+    closed = Graph().parse(
+        data=shapes.replace(
+            "sh:targetClass ex:Pet ;", "sh:targetClass ex:Pet ; sh:closed true ;"
+        ),
+        format="turtle",
+    )
+    assert (
+        kurra.shacl._validated_predicates(kurra.shacl._compile_shapes(closed)) is None
+    )
+    valid, g, txt, summary = validate(data, closed)
+    valid2, g2, txt2, summary2 = validate(data, closed, prune=True)
+    assert _results(g2) == _results(g)
+
+
+def test_validate_prune_blank_node_results():
+    shapes = SHACL_TEST_DIR / "validator-vocpub-410.ttl"
+    data = SHACL_TEST_DIR / "vocab-invalid2.ttl"
+    valid, g, txt, summary = validate(data, shapes)
+    assert any(isinstance(f, BNode) for f in g.objects(None, SH.focusNode))
+
+    valid2, g2, txt2, summary2 = validate(data, shapes, prune=True)
+    assert not valid and not valid2
+    assert _results(g2) == _results(g)
+    assert txt2 == txt
+
+
 def test_check_validator_known():
     assert check_validator_known("https://linked.data.gov.au/def/vocpub/validator")
     assert not check_validator_known("https://linked.data.gov.au/def/vocpub/validatorx")
@@ -1,13 +1,21 @@
 import datetime
 import json
+import time
 from pathlib import Path
 
 import httpx
 import pytest
+from rdflib import Graph, Literal, URIRef
 from rdflib.namespace import SKOS
 
+from kurra.bench import bench
 from kurra.db.gsp import clear, get, upload
-from kurra.sparql import query
+from kurra.sparql import (
+    federated_query,
+    make_values_batches,
+    query,
+    query_with_values,
+)
 from kurra.utils import RenderFormat, render_sparql_result
 
 LANG_TEST_VOC = Path(__file__).parent / "language-test.ttl"
@@ -830,3 +838,232 @@ def test_drop(fuseki_container, http_client):
 
     # check it's all gone
     assert get(SPARQL_ENDPOINT, TESTING_GRAPH, http_client=http_client)[0] == 404
+
+
+def test_federated_query():
+    q = """
+        PREFIX skos: <http://www.w3.org/2004/02/skos/core#>
+        SELECT ?c
+        WHERE {
+            ?c a skos:Concept ;
+                skos:prefLabel "English only"@en ;
+            .
+        }"""
+
+    def handler(request):
+        if request.url.host == "slow.example.com":
+            time.sleep(4)
+        if request.url.host == "broken.example.com":
+            return httpx.Response(500, text="broken")
+        return httpx.Response(
+            200,
+            json={
+                "head": {"vars": ["c"]},
+                "results": {
+                    "bindings": [
+                        {"c": {"type": "uri", "value": "https://example.com/remote"}}
+                    ]
+                },
+            },
+        )
+
+    with httpx.Client(transport=httpx.MockTransport(handler)) as http_client:
+        r, report = federated_query(
+            [
+                LANG_TEST_VOC,
+                "http://ok.example.com/sparql",
+                "http://broken.example.com/sparql",
+                "http://slow.example.com/sparql",
+            ],
+            q,
+            http_client=http_client,
+            return_bindings_only=True,
+            deadline=2,
+        )
+
+    assert r == [
+        {
+            "c": "https://example.com/demo-vocabs/language-test/en-only",
+            "source": str(LANG_TEST_VOC),
+        },
+        {"c": "https://example.com/remote", "source": "http://ok.example.com/sparql"},
+    ]
+    assert report[str(LANG_TEST_VOC)]["count"] == 1
+    assert report["http://ok.example.com/sparql"]["error"] is None
+    assert "500" in report["http://broken.example.com/sparql"]["error"]
+    assert "Deadline" in report["http://slow.example.com/sparql"]["error"]
+
+
+def test_federated_query_deadline_local_sources():
+    class SlowGraph(Graph):
+        def query(self, *args, **kwargs):
+            time.sleep(1)
+            return super().query(*args, **kwargs)
+
+    sources = [SlowGraph().parse(LANG_TEST_VOC) for _ in range(4)]
+    r, report = federated_query(
+        sources, "ASK { ?s ?p ?o }", return_bindings_only=True, deadline=0.5
+    )
+    assert all("Deadline" in report[str(g.identifier)]["error"] for g in sources)
+
+    # only the source being queried at the deadline runs on, the others waiting their turn aren't queried
+    start = time.perf_counter()
+    assert query(LANG_TEST_VOC, "ASK { ?s ?p ?o }", return_bindings_only=True)
+    assert time.perf_counter() - start < 1.5
+
+
+def test_federated_query_ask_and_construct():
+    r, report = federated_query(
+        [LANG_TEST_VOC, "PREFIX ex: <http://example.com/> ex:a ex:b ex:c ."],
+        "ASK { ?s ?p <http://example.com/c> }",
+        return_bindings_only=True,
+    )
+    assert r
+
+    d, report = federated_query(
+        [LANG_TEST_VOC, "PREFIX ex: <http://example.com/> ex:a ex:b ex:c ."],
+        "CONSTRUCT WHERE { ?s a ?o }",
+    )
+    assert len(d.graph(LANG_TEST_VOC.resolve().as_uri())) == 8
+    assert report[str(LANG_TEST_VOC)]["count"] == 8
+
+
+def test_make_values_batches():
+    batches = list(
+        make_values_batches(
+            [
+                {"iri": URIRef("http://example.com/a"), "n": 1},
+                {"iri": URIRef("http://example.com/b"), "n": None},
+                {"iri": URIRef("http://example.com/c"), "n": Literal("x", lang="en")},
+            ],
+            batch_rows=2,
+        )
+    )
+    assert batches == [
+        'VALUES (?iri ?n) {\n    (<http://example.com/a> "1"^^<http://www.w3.org/2001/XMLSchema#integer>)\n    (<http://example.com/b> UNDEF)\n}',
+        'VALUES (?iri ?n) {\n    (<http://example.com/c> "x"@en)\n}',
+    ]
+
+    # split by size
+    iris = [URIRef(f"http://example.com/{n}") for n in range(100)]
+    batches = list(make_values_batches(iris, ["iri"], batch_bytes=500))
+    assert all(len(b) < 600 for b in batches)
+    assert sum(b.count("<http") for b in batches) == 100
+
+    with pytest.raises(ValueError):
+        list(make_values_batches(iris))
+
+
+def test_query_with_values():
+    concepts = [
+        URIRef("https://example.com/demo-vocabs/language-test/en-only"),
+        URIRef("https://example.com/demo-vocabs/language-test/no-lang"),
+        URIRef("https://example.com/demo-vocabs/language-test/not-in-vocab"),
+    ]
+    q = """
+        PREFIX skos: <http://www.w3.org/2004/02/skos/core#>
+        SELECT ?c ?label
+        WHERE {
+            {{VALUES}}
+            ?c skos:prefLabel ?label .
+        }"""
+
+    r = query_with_values(
+        LANG_TEST_VOC, q, concepts, ["c"], return_bindings_only=True, batch_rows=1
+    )
+    assert sorted(row["label"] for row in r) == [
+        "English only",
+        "No-language prefLabel",
+    ]
+
+    g = query_with_values(
+        LANG_TEST_VOC,
+        "CONSTRUCT { ?c a ?type } WHERE { {{VALUES}} ?c a ?type }",
+        concepts,
+        ["c"],
+        batch_rows=2,
+    )
+    assert len(g) == 2
+
+    with pytest.raises(ValueError):
+        query_with_values(LANG_TEST_VOC, "SELECT * WHERE { ?s ?p ?o }", concepts, ["c"])
+
+
+def test_query_with_values_batches_requests():
+    sizes = []
+
+    def handler(request):
+        sizes.append(request.content.count(b"<http://example.com/"))
+        return httpx.Response(
+            200,
+            json={
+                "head": {"vars": ["iri"]},
+                "results": {
+                    "bindings": [
+                        {"iri": {"type": "uri", "value": "http://example.com/x"}}
+                    ]
+                },
+            },
+        )
+
+    with httpx.Client(transport=httpx.MockTransport(handler)) as http_client:
+        r = query_with_values(
+            "http://example.com/sparql",
+            "SELECT ?iri WHERE { {{VALUES}} ?iri ?p ?o }",
+            (URIRef(f"http://example.com/{n}") for n in range(250)),
+            ["iri"],
+            http_client=http_client,
+            return_bindings_only=True,
+            batch_rows=100,
+        )
+
+    assert sorted(sizes) == [50, 100, 100]
+    assert len(r) == 3
+
+
+def test_bench():
+    report = bench(
+        LANG_TEST_VOC,
+        "SELECT ?c WHERE { ?c a <http://www.w3.org/2004/02/skos/core#Concept> }",
+        runs=5,
+        warmup=1,
+    )
+    assert report["runs"] == 5
+    assert report["errors"] == 0
+    assert report["result_size"] > 0
+    latency = report["latency"]
+    assert latency["min"] <= latency["p50"] <= latency["p95"] <= latency["max"]
+
+    def handler(request):
+        if b"broken" in request.content or "broken" in request.url.params.get(
+            "query", ""
+        ):
+            return httpx.Response(400, text="Parse error")
+        return httpx.Response(
+            200,
+            json={"head": {}, "boolean": True},
+            headers={"Content-Type": "application/sparql-results+json"},
+        )
+
+    with httpx.Client(transport=httpx.MockTransport(handler)) as http_client:
+        report = bench(
+            "http://example.com/sparql",
+            "ASK { ?s ?p ?o }",
+            runs=4,
+            concurrency=2,
+            http_client=http_client,
+        )
+        assert report["errors"] == 0
+        assert report["result_size"] == 1
+        assert report["throughput"] > 0
+
+        report = bench(
+            "http://example.com/sparql",
+            "ASK { ?s ?p <urn:broken> }",
+            runs=3,
+            warmup=0,
+            http_client=http_client,
+        )
+        assert report["error_rate"] == 1
+        assert report["latency"] is None
+        assert len(report["error_messages"]) == 1
@@ -0,0 +1,85 @@
+import io
+import json
+
+import httpx
+import pytest
+
+from kurra.db.gsp import upload
+from kurra.db.sparql import query
+from kurra.tracing import JsonLinesExporter, SpanCollector, span, tracing
+
+
+def test_spans_nest_and_record_errors():
+    with tracing(SpanCollector()) as collector:
+        with span("outer", a=1) as outer:
+            with span("inner"):
+                pass
+            outer.set(b=2)
+
+        with pytest.raises(ValueError):
+            with span("broken"):
+                raise ValueError("oops")
+
+    inner, outer, broken = collector.spans
+    assert inner.parent_id == outer.id
+    assert outer.parent_id is None
+    assert outer.attributes == {"a": 1, "b": 2}
+    assert outer.duration >= inner.duration
+    assert broken.error == "ValueError: oops"
+
+    # nothing is passed on once the tracer is removed
+    with span("untraced"):
+        pass
+    assert len(collector.spans) == 3
+
+
+def test_upload_and_query_spans():
+    def handler(request):
+        if request.method == "PUT":
+            return httpx.Response(204)
+        return httpx.Response(
+            200,
+            json={"head": {}, "boolean": True},
+            headers={"Content-Type": "application/sparql-results+json"},
+        )
+
+    out = io.StringIO()
+    with (
+        tracing(SpanCollector()) as collector,
+        tracing(JsonLinesExporter(out)),
+        httpx.Client(transport=httpx.MockTransport(handler)) as http_client,
+    ):
+        upload(
+            "http://example.com/sparql",
+            "PREFIX ex: <http://example.com/> ex:a ex:b ex:c .",
+            "http://example.com/g",
+            http_client=http_client,
+        )
+        query(
+            "http://example.com/sparql",
+            "ASK { ?s ?p ?o }",
+            http_client=http_client,
+            return_format="python",
+        )
+
+    spans = {s.name: s for s in collector.spans}
+    assert set(spans) >= {
+        "rdf.parse",
+        "rdf.serialize",
+        "http.request",
+        "gsp.put",
+        "sparql.query",
+        "sparql.decode",
+    }
+    assert spans["rdf.serialize"].parent_id == spans["gsp.put"].id
+    assert spans["rdf.serialize"].attributes["triples"] == 1
+
+    requests = [s for s in collector.spans if s.name == "http.request"]
+    assert requests[0].attributes["method"] == "PUT"
+    assert requests[0].attributes["status_code"] == 204
+    assert requests[0].attributes["bytes_sent"] > 0
+    assert "bytes_received" in requests[1].attributes
+    assert requests[1].parent_id == spans["sparql.query"].id
+
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [line["name"] for line in lines] == [s.name for s in collector.spans]
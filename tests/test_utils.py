@@ -1,3 +1,4 @@
+import gzip
 import json
 import pickle
 from pathlib import Path
@@ -14,6 +15,9 @@ from kurra.utils import (
     RDF_SUFFIX_MAP,
     GspType,
     RenderFormat,
+    compress,
+    convert_sparql_json_to_python,
+    convert_sparql_tsv_to_python,
     guess_format_from_data,
     is_ask_query,
     is_construct_or_describe_query,
@@ -27,9 +31,16 @@ from kurra.utils import (
     make_system_specific_sparql_endpoint,
     render_sparql_result,
     sparql_statement_return_type,
+    split_lines,
     statement_type_for_query,
 )
 
+XSD_INTEGER = "http://www.w3.org/2001/XMLSchema#integer"
+XSD_DECIMAL = "http://www.w3.org/2001/XMLSchema#decimal"
+XSD_DOUBLE = "http://www.w3.org/2001/XMLSchema#double"
+XSD_BOOLEAN = "http://www.w3.org/2001/XMLSchema#boolean"
+XSD_DATE = "http://www.w3.org/2001/XMLSchema#date"
+
 
 def test_rdf_format_maps_are_harmonised():
     assert RDF_FILE_SUFFIXES.keys() == RDF_FORMAT_LABELS.keys()
@@ -693,3 +704,80 @@ def test_make_system_specific_sparql_endpoint():
     se = "http://localhost:7200/repositories/test"
     ssse = make_system_specific_sparql_endpoint(se, gsp_query_type=GspType.delete)
     assert ssse == "http://localhost:7200/repositories/test/rdf-graphs/service"
+
+
+def test_compress():
+    data = (
+        "<http://example.com/a> <http://example.com/b> <http://example.com/c> .\n" * 100
+    )
+
+    assert gzip.decompress(compress(data)) == data.encode()
+    assert len(compress(data, level=9)) < len(data)
+
+    zstandard = pytest.importorskip("zstandard")
+    assert (
+        zstandard.ZstdDecompressor().decompressobj().decompress(compress(data, "zstd"))
+        == data.encode()
+    )
+
+    with pytest.raises(ValueError):
+        compress(data, "brotli")
+
+
+def test_convert_sparql_tsv_to_python():
+    tsv = (
+        "?s\t?label\t?n\t?d\t?x\n"
+        '<http://example.com/a>\t"tab\\there \\"q\\" \\u00e9"@en\t42\t1.5\t_:b0\n'
+        '<http://example.com/b>\t"x"\t"7"^^<http://www.w3.org/2001/XMLSchema#integer>\t1.0e2\t\n'
+        '<http://example.com/c>\t""\ttrue\t"2024-01-01"^^<http://www.w3.org/2001/XMLSchema#date>\t\n'
+    )
+    j = {
+        "head": {"vars": ["s", "label", "n", "d", "x"]},
+        "results": {
+            "bindings": [
+                {
+                    "s": {"type": "uri", "value": "http://example.com/a"},
+                    "label": {
+                        "type": "literal",
+                        "value": 'tab\there "q" \u00e9',
+                        "xml:lang": "en",
+                    },
+                    "n": {"type": "literal", "value": "42", "datatype": XSD_INTEGER},
+                    "d": {"type": "literal", "value": "1.5", "datatype": XSD_DECIMAL},
+                    "x": {"type": "bnode", "value": "b0"},
+                },
+                {
+                    "s": {"type": "uri", "value": "http://example.com/b"},
+                    "label": {"type": "literal", "value": "x"},
+                    "n": {"type": "literal", "value": "7", "datatype": XSD_INTEGER},
+                    "d": {"type": "literal", "value": "1.0e2", "datatype": XSD_DOUBLE},
+                },
+                {
+                    "s": {"type": "uri", "value": "http://example.com/c"},
+                    "label": {"type": "literal", "value": ""},
+                    "n": {"type": "literal", "value": "true", "datatype": XSD_BOOLEAN},
+                    "d": {
+                        "type": "literal",
+                        "value": "2024-01-01",
+                        "datatype": XSD_DATE,
+                    },
+                },
+            ]
+        },
+    }
+
+    j = json.dumps(j)
+    assert convert_sparql_tsv_to_python(tsv) == convert_sparql_json_to_python(j)
+    assert convert_sparql_tsv_to_python(
+        tsv.encode(), True
+    ) == convert_sparql_json_to_python(j, True)
+
+    # other Unicode line breaks may appear unescaped in literals
+    assert convert_sparql_tsv_to_python(
+        '?a\t?b\r\n"x\u2028y\x85z"\t<http://e/>\n', True
+    ) == [{"a": "x\u2028y\x85z", "b": "http://e/"}]
+    assert list(split_lines(['?a\n"x', '\u2028y"\r', "\n<http", "://e/>"])) == [
+        "?a",
+        '"x\u2028y"',
+        "<http://e/>",
+    ]